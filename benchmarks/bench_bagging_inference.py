@@ -0,0 +1,126 @@
+import json
+import argparse
+import numpy
+from scipy.special import expit
+from benchmarks.bench_tomek_links import make_transactions
+from benchmarks.bench_predict_one import fit_voting_model, time_calls
+
+
+def gathered_bagging_predict(
+    bagging_clf,
+    X: numpy.ndarray
+) -> numpy.ndarray:
+    """
+    Predict the encoded labels of a fitted bagging classifier of logistic regressions estimator by estimator,
+    Each gathering its own feature subset, like BaggingClassifier but without its validation.
+
+    :param bagging_clf:
+        Fitted SKLearn BaggingClassifier of LogisticRegression, for two classes.
+    :param X:
+        2D float64 array of the input data.
+
+    :returns:
+        Array of encoded labels.
+    """
+    first, second = numpy.zeros(len(X)), numpy.zeros(len(X))
+    for estimator, features in zip(bagging_clf.estimators_, bagging_clf.estimators_features_):
+        probability = expit(X[:, features] @ estimator.coef_[0] + estimator.intercept_[0])
+        first += 1 - probability
+        second += probability
+    return bagging_clf.classes_[(second > first).astype(numpy.intp)]
+
+
+def bench_bagging_inference(
+    batch_sizes: list=None,
+    train_rows: int=800,
+    min_seconds: float=0.5,
+    random_state: int=42
+) -> list:
+    """
+    Time the bagged logistic regressions of a fitted VotingClassifierModel at each batch size: SKLearn's predict,
+    The estimators one by one on their feature subsets, and the fused matrix product of FastVotingClassifier,
+    And check that the fused labels are the same as SKLearn's.
+
+    :param batch_sizes:
+        List of batch sizes. Default: [1, 100, 100000].
+    :param train_rows:
+        Number of training rows. Default: 800.
+    :param min_seconds:
+        The least time to repeat the calls of each batch size for. Default: 0.5.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        List of result dictionaries, one per batch size.
+    """
+    model = fit_voting_model(train_rows=train_rows, random_state=random_state)
+    bagging_clf = model.voting_clf.estimators_[2]
+    fast_clf = model.compile()
+
+    results = []
+    for batch_size in (batch_sizes or [1, 100, 100000]):
+        X, _ = make_transactions(rows=batch_size * 4, fraud_rate=0.5, random_state=random_state + batch_size)
+        batches = [X[i * batch_size:(i + 1) * batch_size] for i in range(4)]
+        same = all((fast_clf.bagging_predict(batch) == bagging_clf.predict(batch)).all() for batch in batches)
+        timings = {
+            'sklearn': time_calls(bagging_clf.predict, batches, min_seconds),
+            'gathered': time_calls(lambda batch: gathered_bagging_predict(bagging_clf, batch), batches, min_seconds),
+            'fused': time_calls(fast_clf.bagging_predict, batches, min_seconds)
+        }
+        result = {
+            'batch_size': batch_size,
+            'n_estimators': len(bagging_clf.estimators_),
+            **{f'{name}_us_per_batch': round(seconds * 1e6, 2) for name, seconds in timings.items()},
+            **{f'{name}_rows_per_second': round(batch_size / seconds, 1) for name, seconds in timings.items()},
+            'fused_speedup': round(timings['sklearn'] / timings['fused'], 2),
+            'same_as_sklearn': bool(same)
+        }
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--batch_sizes', nargs='+', type=int, required=False, default=[1, 100, 100000],
+        help='Batch sizes. Default: 1 100 100000.'
+        )
+    parser.add_argument(
+        '--train_rows', type=int, required=False, default=800,
+        help='Number of training rows. Default: 800.'
+        )
+    parser.add_argument(
+        '--min_seconds', type=float, required=False, default=0.5,
+        help='The least time to repeat the calls of each batch size for. Default: 0.5.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the fused bagging inference, printing one JSON line per batch size.
+    Run from the repository root, e.g. python -m benchmarks.bench_bagging_inference --batch_sizes 1 100 100000.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_bagging_inference(batch_sizes=args.batch_sizes, train_rows=args.train_rows, min_seconds=args.min_seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+import io
+import os
+import json
+import time
+import argparse
+import contextlib
+import multiprocessing
+from benchmarks.bench_inplace_memory import proc_status_mb
+from model.training.data_preparation.data_prep_utils.synthetic_transactions import write_synthetic_csv
+from model.training.data_preparation.data_prep_utils.feature_store import count_csv_rows
+
+
+# Pipeline stages in order: name, input file and output file relative to the size folder
+STAGES = [
+    ('create', os.path.join('raw', 'creditcard.csv'), os.path.join('raw', 'train_test', 'train.csv')),
+    ('clean', os.path.join('raw', 'train_test', 'train.csv'), os.path.join('clean', 'clean_train.csv')),
+    ('process', os.path.join('clean', 'clean_train.csv'), os.path.join('processed', 'processed_train.csv')),
+    ('fit', os.path.join('processed', 'processed_train.csv'), os.path.join('classifiers', 'fitted_model.pkl'))
+]
+
+
+def run_stage(
+    stage: str,
+    size_dir: str,
+    options: dict
+) -> None:
+    """
+    Run one pipeline stage on the data files of one size folder.
+
+    :param stage:
+        Name of the stage in STAGES.
+    :param size_dir:
+        Folder of the data files of one dataset size.
+    :param options:
+        Dictionary of prep options: chunksize, in_memory, tomek_links_engine, compact_schema and use_cache.
+    """
+    from model.training.data_preparation.data_prep_process import create_train_test_sets, clean_training_data, process_training_data
+    from model.training.modelling import create_model, fit_model
+
+    raw_path = os.path.join(size_dir, 'raw')
+    train_test_path = os.path.join(raw_path, 'train_test')
+    clean_path = os.path.join(size_dir, 'clean')
+    processed_path = os.path.join(size_dir, 'processed')
+    clf_path = os.path.join(size_dir, 'classifiers')
+
+    if stage == 'create':
+        create_train_test_sets.create(
+            raw_path=raw_path, use_cache=options['use_cache'], chunksize=options['chunksize'],
+            compact_schema=options['compact_schema']
+        )
+    elif stage == 'clean':
+        clean_training_data.clean(
+            train_test_path=train_test_path, clean_path=clean_path, use_cache=options['use_cache'],
+            chunksize=options['chunksize'], compact_schema=options['compact_schema']
+        )
+    elif stage == 'process':
+        process_training_data.process(
+            clean_path=clean_path, processed_path=processed_path, tomek_links_engine=options['tomek_links_engine'],
+            use_cache=options['use_cache'], in_memory=options['in_memory'], compact_schema=options['compact_schema']
+        )
+    elif stage == 'fit':
+        create_model.create(clf_path=clf_path)
+        fit_model.fit(clf_path=clf_path, data_location=processed_path, compact_schema=options['compact_schema'])
+    else:
+        raise ValueError(f'Unknown stage: {stage}')
+
+
+def measure_stage(
+    stage: str,
+    size_dir: str,
+    options: dict,
+    queue
+) -> None:
+    """
+    Measure the wall time and peak RSS of one pipeline stage. Runs in a fresh process,
+    So the peak RSS is that of the stage alone and no data is cached from the previous stage.
+
+    :param stage:
+        Name of the stage in STAGES.
+    :param size_dir:
+        Folder of the data files of one dataset size.
+    :param options:
+        Dictionary of prep options, see run_stage.
+    :param queue:
+        Queue to put the result dictionary on.
+    """
+    # Import the pipeline before the measurement, so the import time and memory are not part of it
+    from model.training.data_preparation.data_prep_process import create_train_test_sets, clean_training_data, process_training_data
+    from model.training.modelling import create_model, fit_model
+
+    # Reset the peak RSS to the current RSS
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    baseline_rss = proc_status_mb('VmRSS')
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_stage(stage=stage, size_dir=size_dir, options=options)
+    seconds = time.perf_counter() - start
+
+    queue.put({
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': round(proc_status_mb('VmHWM'), 1),
+        'baseline_rss_mb': round(baseline_rss, 1)
+    })
+
+
+def bench_data_prep_scaling(
+    rows: list,
+    work_dir: str,
+    stages: list=None,
+    chunksize: int=None,
+    in_memory: bool=False,
+    tomek_links_engine: str='fast',
+    compact_schema: bool=False,
+    use_cache: bool=False,
+    random_state: int=42,
+    n_jobs: int=1
+) -> list:
+    """
+    Benchmark how the pipeline stages scale with the dataset size. For every size, a synthetic creditcard.csv
+    Is generated in work_dir/<rows>/raw (or reused if already there), then each stage runs in a fresh process.
+    The stages run in order, so a stage can only be measured after the stages before it.
+
+    :param rows:
+        List of dataset sizes, in rows of creditcard.csv.
+    :param work_dir:
+        Folder for the data files of every size.
+    :param stages:
+        List of stage names to run, a prefix of create, clean, process and fit. If not specified, all of them.
+    :param chunksize:
+        chunksize option of the create and clean stages. Default: None.
+    :param in_memory:
+        in_memory option of the process stage. Default: False.
+    :param tomek_links_engine:
+        'imblearn' or 'fast'. Default: 'fast', as imblearn's TomekLinks takes hours on millions of rows.
+    :param compact_schema:
+        If the compact dataset schema should be used. Default: False.
+    :param use_cache:
+        If the columnar binary cache should be used. Default: False.
+    :param random_state:
+        Random state of the synthetic data. Default: 42.
+    :param n_jobs:
+        The number of worker processes writing the synthetic data. Default: 1.
+
+    :returns:
+        List of result dictionaries, one per size and stage.
+    """
+    options = dict(chunksize=chunksize, in_memory=in_memory, tomek_links_engine=tomek_links_engine,
+                   compact_schema=compact_schema, use_cache=use_cache)
+    stages = stages or [stage[0] for stage in STAGES]
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for size in rows:
+        size_dir = os.path.join(work_dir, str(size))
+
+        # Synthetic raw data
+        raw_csv = os.path.join(size_dir, 'raw', 'creditcard.csv')
+        if not os.path.exists(raw_csv):
+            start = time.perf_counter()
+            write_synthetic_csv(csv_file_path=raw_csv, rows=size, random_state=random_state, n_jobs=n_jobs)
+            print(json.dumps({'rows': size, 'stage': 'generate', 'seconds': round(time.perf_counter() - start, 3)}))
+
+        for stage, input_file, output_file in STAGES:
+            if stage not in stages:
+                continue
+            input_rows = count_csv_rows(os.path.join(size_dir, input_file))
+            queue = context.Queue()
+            process = context.Process(target=measure_stage, args=(stage, size_dir, options, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            result = {
+                'rows': size,
+                'stage': stage,
+                'input_rows': input_rows,
+                'seconds': result['seconds'],
+                'rows_per_second': round(input_rows / max(result['seconds'], 1e-9)),
+                'peak_rss_mb': result['peak_rss_mb'],
+                'baseline_rss_mb': result['baseline_rss_mb'],
+                'output_mb': round(os.path.getsize(os.path.join(size_dir, output_file)) / 1e6, 1),
+                **options
+            }
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--rows', nargs='*', type=int, required=False, default=[1000000, 2000000],
+        help='Dataset sizes in rows. Default: 1000000 2000000.'
+        )
+    parser.add_argument(
+        '--work_dir', type=str, required=False, default='benchmark_data',
+        help='Folder for the data files of every size. Default: benchmark_data.'
+        )
+    parser.add_argument(
+        '--stages', nargs='*', type=str, required=False, default=None,
+        help='Stages to run, of create, clean, process and fit. Default: all.'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=None,
+        help='Split and clean out of core in chunks of this many rows. Default: None.'
+        )
+    parser.add_argument(
+        '--in_memory', action='store_true',
+        help='Chain the processing steps in memory.'
+        )
+    parser.add_argument(
+        '--tomek_links_engine', type=str, required=False, default='fast', choices=['imblearn', 'fast'],
+        help='The Tomek links engine of the process stage. Default: fast.'
+        )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import every CSV file with float32 features and an int8 target.'
+        )
+    parser.add_argument(
+        '--use_cache', action='store_true',
+        help='Use the columnar binary cache.'
+        )
+    parser.add_argument(
+        '--random_state', type=int, required=False, default=42,
+        help='Random state of the synthetic data. Default: 42.'
+        )
+    parser.add_argument(
+        '--n_jobs', type=int, required=False, default=1,
+        help='The number of worker processes writing the synthetic data. Default: 1.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the pipeline stages at several dataset sizes, printing one JSON line per result.
+    Linux only, as the peak RSS is reset with /proc/self/clear_refs.
+    Run from the repository root, e.g. python -m benchmarks.bench_data_prep_scaling --rows 1000000 10000000.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_data_prep_scaling(
+        rows=args.rows,
+        work_dir=args.work_dir,
+        stages=args.stages,
+        chunksize=args.chunksize,
+        in_memory=args.in_memory,
+        tomek_links_engine=args.tomek_links_engine,
+        compact_schema=args.compact_schema,
+        use_cache=args.use_cache,
+        random_state=args.random_state,
+        n_jobs=args.n_jobs
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+# CLI entry points, run as modules from the repository root
+ENTRY_POINTS = [
+    'model.training.data_preparation.data_prep_utils.train_test_csv_creator',
+    'model.training.data_preparation.data_prep_utils.csv_robust_scaler',
+    'model.training.data_preparation.data_prep_utils.csv_random_undersampler',
+    'model.training.data_preparation.data_prep_utils.csv_tomek_links_undersampler',
+    'model.training.data_preparation.data_prep_utils.feature_store_creator',
+    'model.training.data_preparation.data_prep_utils.synthetic_csv_creator',
+    'model.training.modelling.modelling_utils.csv_fitter',
+    'model.training.modelling.modelling_utils.csv_scorer',
+    'model.serving.scoring_server',
+    'model.serving.load_generator'
+]
+
+# Modules without a CLI that the entry points and pickled models load, imported on their own
+MODULES = [
+    'model.training.modelling.model_classes.voting_classifier_model',
+    'model.training.modelling.model_classes.pipeline_model'
+]
+
+# Top-level packages whose import is reported separately
+HEAVY_PACKAGES = ('sklearn', 'imblearn', 'scipy', 'pandas', 'numpy')
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """
+    Parse the -X importtime report of a Python process.
+
+    :param stderr:
+        Standard error of the process.
+
+    :returns:
+        Tuple containing the total import microseconds, of the modules imported at the top level,
+        And a dictionary of the cumulative microseconds of every module, by name.
+    """
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        # Nested imports are indented under the module importing them
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return total, modules
+
+
+def bench_import_time(
+    entry_points: list=None,
+    modules: list=None,
+    repeats: int=3
+) -> list:
+    """
+    Run every entry point with --help, and import every module, in a new Python process with -X importtime,
+    And measure the wall time of the process and the import time of its modules, with which heavy packages
+    Were imported. The fastest of the repeats is kept, once the files are in the page cache.
+
+    :param entry_points:
+        List of entry point modules. Default: ENTRY_POINTS.
+    :param modules:
+        List of modules to import. Default: MODULES.
+    :param repeats:
+        Number of runs of each entry point and module. Default: 3.
+
+    :returns:
+        List of result dictionaries, one per entry point and module.
+    """
+    commands = [(module, ['-m', module, '--help']) for module in (entry_points or ENTRY_POINTS)] \
+        + [(module, ['-c', f'import {module}']) for module in (modules or MODULES)]
+    results = []
+    for module, command in commands:
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', *command], capture_output=True, text=True
+            )
+            wall_seconds = time.perf_counter() - start
+            if process.returncode != 0:
+                raise RuntimeError(f'{" ".join(command)} failed:\n{process.stderr[-2000:]}')
+            if best is None or wall_seconds < best[0]:
+                best = (wall_seconds, *parse_importtime(process.stderr))
+
+        wall_seconds, total, modules = best
+        result = {
+            'entry_point': module,
+            'command': command[-1] if command[0] == '-m' else 'import',
+            'wall_ms': round(wall_seconds * 1000, 1),
+            'import_ms': round(total / 1000, 1),
+            **{f'{package}_ms': round(modules.get(package, 0) / 1000, 1) for package in HEAVY_PACKAGES},
+            'heavy_imported': [package for package in HEAVY_PACKAGES if package in modules]
+        }
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--entry_points', nargs='+', type=str, required=False, default=None,
+        help='Entry point modules, run with --help. Default: every CLI entry point.'
+        )
+    parser.add_argument(
+        '--modules', nargs='+', type=str, required=False, default=None,
+        help='Modules to import. Default: the model class modules.'
+        )
+    parser.add_argument(
+        '--repeats', type=int, required=False, default=3,
+        help='Number of runs of each entry point. Default: 3.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the start up of the CLI entry points and the import of the model modules,
+    Printing one JSON line per entry point and module.
+    Run from the repository root, e.g. python -m benchmarks.bench_import_time --repeats 5.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_import_time(entry_points=args.entry_points, modules=args.modules, repeats=args.repeats)
+
+
+if __name__ == '__main__':
+    main()
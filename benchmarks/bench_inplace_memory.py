@@ -0,0 +1,182 @@
+import io
+import json
+import argparse
+import contextlib
+import multiprocessing
+import numpy
+import pandas
+from benchmarks.bench_tomek_links import make_transactions
+
+
+# Method calls to measure: name, DataFrameManipulator method and keyword arguments
+CASES = [
+    ('robust_scale_df', 'robust_scale_df', dict(scale_columns=['Time', 'Amount'], sort_by='Time', reset_index=True)),
+    ('robust_scale_df_inplace', 'robust_scale_df',
+     dict(scale_columns=['Time', 'Amount'], sort_by='Time', reset_index=True, inplace=True)),
+    ('sort_reset_df', 'sort_reset_df', dict(sort_by='Time', reset_index=True)),
+    ('sort_reset_df_inplace', 'sort_reset_df', dict(sort_by='Time', reset_index=True, inplace=True)),
+    ('random_undersample_df', 'random_undersample_df',
+     dict(target_variable='Class', sort_by='Time', reset_index=True, random_state=42)),
+    ('tomek_links_undersample_df', 'tomek_links_undersample_df',
+     dict(target_variable='Class', sort_by='Time', reset_index=True, engine='fast'))
+]
+
+
+def proc_status_mb(field: str) -> float:
+    """
+    Read a memory field of /proc/self/status.
+
+    :param field:
+        The field name, e.g. 'VmRSS' or 'VmHWM'.
+
+    :returns:
+        The value in MB.
+    """
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def make_df(
+    rows: int,
+    sort: bool
+) -> pandas.DataFrame:
+    """
+    Make a Kaggle-shaped transaction DataFrame: Time, V1 to V28, Amount and Class.
+
+    :param rows:
+        Number of rows.
+    :param sort:
+        If the rows should be ordered by Time.
+
+    :returns:
+        The DataFrame.
+    """
+    X, y = make_transactions(rows=rows)
+    rng = numpy.random.default_rng(0)
+    time = rng.integers(0, 172792, rows).astype(numpy.float64)
+    if sort:
+        time.sort()
+    columns = {'Time': time}
+    columns.update({f'V{i}': X[:, i - 1] for i in range(1, 29)})
+    columns['Amount'] = numpy.round(rng.exponential(88, rows), 2)
+    columns['Class'] = y
+
+    # One block per dtype, like a DataFrame read from a csv file
+    return pandas.DataFrame(columns)
+
+
+def measure_case(
+    case: str,
+    rows: int,
+    sort: bool,
+    queue
+) -> None:
+    """
+    Measure the peak RSS of one method call above the RSS before it. Runs in a fresh process.
+
+    :param case:
+        Name of the case in CASES.
+    :param rows:
+        Number of rows.
+    :param sort:
+        If the input should already be ordered by Time.
+    :param queue:
+        Queue to put the result dictionary on.
+    """
+    from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+
+    _, method, kwargs = next(item for item in CASES if item[0] == case)
+    dataframe_man = DataFrameManipulator()
+    df = make_df(rows=rows, sort=sort)
+
+    # Reset the peak RSS to the current RSS
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    rss_before = proc_status_mb('VmRSS')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        getattr(dataframe_man, method)(df=df, **kwargs)
+
+    queue.put({
+        'case': case,
+        'rows': rows,
+        'sorted_input': sort,
+        'frame_mb': round(df.memory_usage(deep=True).sum() / 1e6, 1),
+        'extra_peak_rss_mb': round(proc_status_mb('VmHWM') - rss_before, 1)
+    })
+
+
+def bench_inplace_memory(
+    rows: int,
+    cases: list=None
+) -> list:
+    """
+    Measure the peak RSS of each DataFrameManipulator transform, with unsorted and already sorted input,
+    Each in a fresh process.
+
+    :param rows:
+        Number of rows.
+    :param cases:
+        List of case names to measure. If not specified, all of CASES.
+
+    :returns:
+        List of result dictionaries.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for case in cases or [item[0] for item in CASES]:
+        for sort in (False, True):
+            queue = context.Queue()
+            process = context.Process(target=measure_case, args=(case, rows, sort, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--rows', type=int, required=False, default=2000000,
+        help='Number of rows. Default: 2000000.'
+        )
+    parser.add_argument(
+        '--cases', nargs='*', type=str, required=False, default=None,
+        help='Cases to measure. Default: all.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the peak memory of the DataFrame transforms, printing one JSON line per result.
+    Linux only, as the peak RSS is reset with /proc/self/clear_refs.
+    Run from the repository root, e.g. python -m benchmarks.bench_inplace_memory.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_inplace_memory(rows=args.rows, cases=args.cases)
+
+
+if __name__ == '__main__':
+    main()
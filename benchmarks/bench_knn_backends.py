@@ -0,0 +1,180 @@
+import json
+import time
+import argparse
+import numpy
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import RobustScaler
+from model.training.data_preparation.data_prep_utils.synthetic_transactions import generate_chunk
+from model.training.modelling.model_classes.knn_backends import make_knn_classifier
+
+
+# Backends to measure: name, backend and parameters
+CONFIGS = [
+    ('exact', 'exact', {}),
+    ('kd_tree', 'kd_tree', {}),
+    ('ball_tree', 'ball_tree', {}),
+    ('ivf_probe_4', 'ivf', {'n_probe': 4}),
+    ('ivf_probe_16', 'ivf', {'n_probe': 16}),
+    ('condensed', 'condensed', {})
+]
+
+
+def make_split(
+    rows: int,
+    queries: int,
+    fraud_rate: float=0.02,
+    random_state: int=42
+) -> tuple:
+    """
+    Make a training set and query set of synthetic transactions, scaled like the processed data
+    But not undersampled, as if the KNN classifier were fitted on all the clean rows.
+
+    :param rows:
+        Number of rows, of training and query sets together.
+    :param queries:
+        Number of query rows.
+    :param fraud_rate:
+        The probability of a row being fraud. Default: 0.02.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        Tuple containing the training features, training labels, query features and query labels.
+    """
+    df = generate_chunk(start=0, rows=rows, seed=numpy.random.SeedSequence(random_state), clock=0.0, fraud_rate=fraud_rate)
+    df[['Time', 'Amount']] = RobustScaler().fit_transform(df[['Time', 'Amount']])
+    X = df.drop(columns=['Class']).to_numpy()
+    y = df['Class'].to_numpy()
+    return train_test_split(X, y, test_size=queries, stratify=y, random_state=random_state)
+
+
+def recall_specificity(
+    y_true: numpy.ndarray,
+    y_pred: numpy.ndarray
+) -> tuple:
+    """
+    Get the recall and specificity of fraud predictions.
+
+    :param y_true:
+        Array of true labels, 1 for fraud.
+    :param y_pred:
+        Array of predicted labels.
+
+    :returns:
+        Tuple containing the recall and the specificity.
+    """
+    fraud = y_true == 1
+    return float((y_pred[fraud] == 1).mean()), float((y_pred[~fraud] == 0).mean())
+
+
+def bench_knn_backends(
+    rows: int=200000,
+    queries: int=5000,
+    fraud_rate: float=0.02,
+    configs: list=None,
+    random_state: int=42
+) -> list:
+    """
+    Measure every neighbour backend of the KNN member on the same synthetic training and query sets:
+    Fit seconds, queries per second, the number of rows searched, the recall and specificity of its predictions,
+    Their deltas from the exact backend and the share of predictions the same as the exact backend's.
+
+    :param rows:
+        Number of rows, of training and query sets together. Default: 200000.
+    :param queries:
+        Number of query rows. Default: 5000.
+    :param fraud_rate:
+        The probability of a row being fraud. Default: 0.02.
+    :param configs:
+        List of config names of CONFIGS to measure. 'exact' is always measured first. Default: all.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        List of result dictionaries, one per config.
+    """
+    X_train, X_query, y_train, y_query = make_split(rows=rows, queries=queries, fraud_rate=fraud_rate,
+                                                    random_state=random_state)
+    names = ['exact'] + [name for name in (configs or [config[0] for config in CONFIGS]) if name != 'exact']
+    exact = None
+    results = []
+    for name in names:
+        _, backend, params = next(config for config in CONFIGS if config[0] == name)
+        clf = make_knn_classifier(backend=backend, random_state=random_state, **params)
+
+        start = time.perf_counter()
+        clf.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = clf.predict(X_query)
+        predict_seconds = time.perf_counter() - start
+
+        recall, specificity = recall_specificity(y_true=y_query, y_pred=y_pred)
+        if exact is None:
+            exact = {'y_pred': y_pred, 'recall': recall, 'specificity': specificity}
+        result = {
+            'config': name,
+            'train_rows': len(X_train),
+            'searched_rows': len(getattr(clf, 'prototype_indices_', X_train)),
+            'fit_seconds': round(fit_seconds, 3),
+            'queries_per_second': round(len(X_query) / max(predict_seconds, 1e-9), 1),
+            'recall': round(recall, 4),
+            'specificity': round(specificity, 6),
+            'recall_delta': round(recall - exact['recall'], 4),
+            'specificity_delta': round(specificity - exact['specificity'], 6),
+            'agreement_with_exact': round(float((y_pred == exact['y_pred']).mean()), 6)
+        }
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--rows', type=int, required=False, default=200000,
+        help='Number of rows, of training and query sets together. Default: 200000.'
+        )
+    parser.add_argument(
+        '--queries', type=int, required=False, default=5000,
+        help='Number of query rows. Default: 5000.'
+        )
+    parser.add_argument(
+        '--fraud_rate', type=float, required=False, default=0.02,
+        help='The probability of a row being fraud. Default: 0.02.'
+        )
+    parser.add_argument(
+        '--configs', nargs='*', type=str, required=False, default=None,
+        help='Configs to measure. Default: all.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the neighbour backends of the KNN member, printing one JSON line per config.
+    Run from the repository root, e.g. python -m benchmarks.bench_knn_backends --rows 200000.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_knn_backends(rows=args.rows, queries=args.queries, fraud_rate=args.fraud_rate, configs=args.configs)
+
+
+if __name__ == '__main__':
+    main()
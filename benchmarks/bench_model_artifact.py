@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import numpy
+from benchmarks.bench_tomek_links import make_transactions
+from benchmarks.bench_predict_one import fit_voting_model
+from model.training.modelling.model_classes.model_artifact import save_artifact, load_artifact
+
+
+def time_load(
+    load,
+    repeats: int=20
+) -> tuple:
+    """
+    Time the loads of a model and its first prediction of one transaction.
+
+    :param load:
+        Function loading the model, returning a function predicting one transaction.
+    :param repeats:
+        Number of loads. Default: 20.
+
+    :returns:
+        Tuple containing the median load milliseconds and the median milliseconds of the load and first prediction.
+    """
+    x = numpy.zeros(30)
+    load_ms, first_ms = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_one = load()
+        load_ms.append((time.perf_counter() - start) * 1000)
+        predict_one(x)
+        first_ms.append((time.perf_counter() - start) * 1000)
+    return float(numpy.median(load_ms)), float(numpy.median(first_ms))
+
+
+def bench_model_artifact(
+    train_rows_list: list=None,
+    repeats: int=20,
+    random_state: int=42
+) -> list:
+    """
+    Compare loading a fitted VotingClassifierModel from its pickle file with loading its model artifact:
+    File sizes, median load milliseconds, and milliseconds to the first predict_one, with the loaded artifact's
+    Predictions checked against the model's.
+
+    :param train_rows_list:
+        List of numbers of training rows, which the size of the KNN training copy grows with.
+        Default: [800, 20000, 100000].
+    :param repeats:
+        Number of loads of each file. Default: 20.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        List of result dictionaries, one per number of training rows.
+    """
+    results = []
+    X_test, _ = make_transactions(rows=5000, fraud_rate=0.5, random_state=random_state + 1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for train_rows in (train_rows_list or [800, 20000, 100000]):
+            model = fit_voting_model(train_rows=train_rows, random_state=random_state)
+            pkl_path = os.path.join(tmp_dir, f'model_{train_rows}.pkl')
+            artifact_path = os.path.join(tmp_dir, f'model_{train_rows}.artifact')
+            with open(pkl_path, 'wb') as f:
+                pickle.dump(model, f)
+            save_artifact(fast_clf=model.compile(), file_path=artifact_path)
+
+            def load_pickle():
+                with open(pkl_path, 'rb') as f:
+                    return pickle.load(f).predict_one
+
+            pickle_load_ms, pickle_first_ms = time_load(load_pickle, repeats=repeats)
+            artifact_load_ms, artifact_first_ms = time_load(lambda: load_artifact(artifact_path).predict_one,
+                                                            repeats=repeats)
+            result = {
+                'train_rows': train_rows,
+                'pickle_mb': round(os.path.getsize(pkl_path) / 1e6, 3),
+                'artifact_mb': round(os.path.getsize(artifact_path) / 1e6, 3),
+                'pickle_load_ms': round(pickle_load_ms, 3),
+                'artifact_load_ms': round(artifact_load_ms, 3),
+                'load_speedup': round(pickle_load_ms / artifact_load_ms, 1),
+                'pickle_first_prediction_ms': round(pickle_first_ms, 3),
+                'artifact_first_prediction_ms': round(artifact_first_ms, 3),
+                'same_predictions': bool((load_artifact(artifact_path).predict(X_test) == model.predict_fast(X_test)).all())
+            }
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--train_rows', nargs='+', type=int, required=False, default=[800, 20000, 100000],
+        help='Numbers of training rows. Default: 800 20000 100000.'
+        )
+    parser.add_argument(
+        '--repeats', type=int, required=False, default=20,
+        help='Number of loads of each file. Default: 20.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark loading model artifacts against pickle files, printing one JSON line per model.
+    Run from the repository root, e.g. python -m benchmarks.bench_model_artifact --train_rows 800 100000.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_model_artifact(train_rows_list=args.train_rows, repeats=args.repeats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import io
+import os
+import json
+import time
+import argparse
+import contextlib
+import numpy
+from benchmarks.bench_tomek_links import make_transactions
+from model.training.modelling.model_classes.voting_classifier_model import VotingClassifierModel
+
+
+def fit_model(
+    X: numpy.ndarray,
+    y: numpy.ndarray,
+    n_jobs: int,
+    parallel_backend: str,
+    random_state: int=42
+) -> tuple:
+    """
+    Fit a VotingClassifierModel with parallel workers and time it.
+
+    :param X:
+        Training data.
+    :param y:
+        Training labels.
+    :param n_jobs:
+        The number of parallel workers.
+    :param parallel_backend:
+        The joblib backend of the workers.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        Tuple containing the fitted model and the fit seconds.
+    """
+    model = VotingClassifierModel(random_state=random_state, n_jobs=n_jobs, parallel_backend=parallel_backend)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def bench_parallel_fit(
+    train_rows: int=10000,
+    test_rows: int=20000,
+    n_jobs_list: list=None,
+    backends: list=None,
+    random_state: int=42
+) -> list:
+    """
+    Time the fit of a VotingClassifierModel on balanced, overlapping Kaggle-shaped classes with each number of workers
+    And backend, against one job, and check the fitted model is the same: its predictions and bagging coefficients.
+
+    :param train_rows:
+        Number of training rows. Default: 10000.
+    :param test_rows:
+        Number of rows to compare the predictions on. Default: 20000.
+    :param n_jobs_list:
+        List of numbers of workers. Default: 2, 4 and the number of cores.
+    :param backends:
+        List of joblib backends. Default: ['loky', 'threading'].
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        List of result dictionaries, one per backend and number of workers.
+    """
+    X, y = make_transactions(rows=train_rows, fraud_rate=0.5, random_state=random_state)
+    X_test, _ = make_transactions(rows=test_rows, fraud_rate=0.5, random_state=random_state + 1)
+    cores = os.cpu_count()
+    n_jobs_list = n_jobs_list or sorted({2, 4, cores})
+
+    # One job, after a fit to warm up
+    fit_model(X, y, n_jobs=None, parallel_backend='loky', random_state=random_state)
+    reference, sequential_seconds = fit_model(X, y, n_jobs=None, parallel_backend='loky', random_state=random_state)
+    reference_pred = reference.predict_fast(X_test)
+    reference_coef = reference.compile().bagging['weights']
+    results = [{'backend': 'sequential', 'n_jobs': 1, 'cores': cores, 'fit_seconds': round(sequential_seconds, 3),
+                'speedup': 1.0, 'same_model': True}]
+    print(json.dumps(results[0]))
+
+    for backend in (backends or ['loky', 'threading']):
+        for n_jobs in n_jobs_list:
+            model, seconds = fit_model(X, y, n_jobs=n_jobs, parallel_backend=backend, random_state=random_state)
+            same = bool((model.predict_fast(X_test) == reference_pred).all()) \
+                and bool((model.compile().bagging['weights'] == reference_coef).all())
+            result = {
+                'backend': backend,
+                'n_jobs': n_jobs,
+                'cores': cores,
+                'fit_seconds': round(seconds, 3),
+                'speedup': round(sequential_seconds / seconds, 2),
+                'same_model': same
+            }
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--train_rows', type=int, required=False, default=10000,
+        help='Number of training rows. Default: 10000.'
+        )
+    parser.add_argument(
+        '--test_rows', type=int, required=False, default=20000,
+        help='Number of rows to compare the predictions on. Default: 20000.'
+        )
+    parser.add_argument(
+        '--n_jobs', nargs='+', type=int, required=False, default=None,
+        help='Numbers of workers. Default: 2, 4 and the number of cores.'
+        )
+    parser.add_argument(
+        '--backends', nargs='+', type=str, required=False, default=None,
+        help='joblib backends: loky, multiprocessing or threading. Default: loky threading.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark parallel fitting, printing one JSON line per backend and number of workers.
+    Run from the repository root, e.g. python -m benchmarks.bench_parallel_fit --n_jobs 2 4 8.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_parallel_fit(
+        train_rows=args.train_rows, test_rows=args.test_rows, n_jobs_list=args.n_jobs, backends=args.backends
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import io
+import json
+import time
+import argparse
+import contextlib
+import numpy
+from benchmarks.bench_tomek_links import make_transactions
+from model.training.modelling.model_classes.voting_classifier_model import VotingClassifierModel
+
+
+def fit_voting_model(
+    train_rows: int=800,
+    random_state: int=42
+) -> VotingClassifierModel:
+    """
+    Fit a VotingClassifierModel on a balanced Kaggle-shaped training set, about the size of the processed data
+    After random undersampling.
+
+    :param train_rows:
+        Number of training rows. Default: 800.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        The fitted model.
+    """
+    X, y = make_transactions(rows=train_rows, fraud_rate=0.5, random_state=random_state)
+    model = VotingClassifierModel(random_state=random_state)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.fit(X, y)
+    return model
+
+
+def time_calls(
+    func,
+    batches: list,
+    min_seconds: float=0.5
+) -> float:
+    """
+    Time calls of a function over batches, repeating them for at least min_seconds.
+
+    :param func:
+        Function of one batch.
+    :param batches:
+        List of batches to call func with, in turn.
+    :param min_seconds:
+        The least time to repeat the calls for. Default: 0.5.
+
+    :returns:
+        The mean seconds per call.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for batch in batches:
+            func(batch)
+        calls += len(batches)
+        seconds = time.perf_counter() - start
+        if seconds >= min_seconds:
+            return seconds / calls
+
+
+def bench_predict_one(
+    batch_sizes: list,
+    train_rows: int=800,
+    rows: int=2000,
+    min_seconds: float=0.5
+) -> list:
+    """
+    Compare the latency of VotingClassifierModel.predict, the VotingClassifier it wraps, and the compiled
+    predict_one and predict_fast paths, and check that the compiled paths predict the same labels.
+
+    :param batch_sizes:
+        List of batch sizes. predict_one is measured for batch size 1.
+    :param train_rows:
+        Number of training rows. Default: 800.
+    :param rows:
+        Number of rows to predict, split into batches. Default: 2000.
+    :param min_seconds:
+        The least time to measure each path for. Default: 0.5.
+
+    :returns:
+        List of result dictionaries, one per batch size and path.
+    """
+    model = fit_voting_model(train_rows=train_rows)
+    model.compile()
+    X, _ = make_transactions(rows=rows, random_state=1)
+    expected = model.voting_clf.predict(X)
+    results = []
+    for batch_size in batch_sizes:
+        batches = [X[start:start + batch_size] for start in range(0, rows, batch_size)]
+        paths = {
+            'predict': lambda batch: model.predict(batch),
+            'voting_clf.predict': model.voting_clf.predict,
+            'predict_fast': model.predict_fast
+        }
+        if batch_size == 1:
+            paths['predict_one'] = lambda batch: model.predict_one(batch[0])
+
+        for path, func in paths.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = time_calls(func=func, batches=batches, min_seconds=min_seconds)
+                predictions = numpy.concatenate([numpy.atleast_1d(func(batch)) for batch in batches])
+            result = {
+                'batch_size': batch_size,
+                'path': path,
+                'us_per_call': round(seconds * 1e6, 1),
+                'us_per_row': round(seconds * 1e6 / batch_size, 2),
+                'identical': bool(numpy.array_equal(predictions, expected))
+            }
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--batch_sizes', nargs='*', type=int, required=False, default=[1, 10, 100],
+        help='Batch sizes. Default: 1 10 100.'
+        )
+    parser.add_argument(
+        '--train_rows', type=int, required=False, default=800,
+        help='Number of training rows. Default: 800.'
+        )
+    parser.add_argument(
+        '--rows', type=int, required=False, default=2000,
+        help='Number of rows to predict. Default: 2000.'
+        )
+    parser.add_argument(
+        '--min_seconds', type=float, required=False, default=0.5,
+        help='The least time to measure each path for. Default: 0.5.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the single transaction and small batch prediction paths,
+    Printing one JSON line per result.
+    Run from the repository root, e.g. python -m benchmarks.bench_predict_one.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_predict_one(
+        batch_sizes=args.batch_sizes,
+        train_rows=args.train_rows,
+        rows=args.rows,
+        min_seconds=args.min_seconds
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import io
+import json
+import argparse
+import contextlib
+from benchmarks.bench_tomek_links import make_transactions
+from benchmarks.bench_predict_one import time_calls
+from model.training.modelling.model_classes.svm_backends import svm_fidelity_report
+from model.training.modelling.model_classes.voting_classifier_model import VotingClassifierModel
+
+
+# Approximations to compare with the exact SVC: name, backend and parameters
+CONFIGS = [
+    ('nystroem_100', 'nystroem', {'n_components': 100}),
+    ('nystroem_300', 'nystroem', {'n_components': 300}),
+    ('rff_300', 'rff', {'n_components': 300}),
+    ('rff_1000', 'rff', {'n_components': 1000}),
+    ('reduced_50', 'reduced', {'n_vectors': 50}),
+    ('reduced_150', 'reduced', {'n_vectors': 150})
+]
+
+
+def bench_svm_backends(
+    train_rows: int=4000,
+    test_rows: int=20000,
+    configs: list=None,
+    min_seconds: float=0.5,
+    random_state: int=42
+) -> list:
+    """
+    Compare the SVM approximations with the exact SVC on balanced, overlapping Kaggle-shaped classes:
+    The fidelity report of svm_fidelity_report for the SVM alone, and the microseconds of predict_one of a
+    VotingClassifierModel with each SVM backend, with the share of its test predictions the same as the exact model's.
+
+    :param train_rows:
+        Number of training rows. Default: 4000.
+    :param test_rows:
+        Number of test rows. Default: 20000.
+    :param configs:
+        List of config names of CONFIGS to compare with the exact SVC. Default: all.
+    :param min_seconds:
+        The least time to repeat the predict_one calls for. Default: 0.5.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        List of result dictionaries, one per config, 'exact' first.
+    """
+    X_train, y_train = make_transactions(rows=train_rows, fraud_rate=0.5, random_state=random_state)
+    X_test, y_test = make_transactions(rows=test_rows, fraud_rate=0.5, random_state=random_state + 1)
+    backends = [config for config in CONFIGS if configs is None or config[0] in configs]
+
+    # Fidelity of the SVM alone
+    report = svm_fidelity_report(
+        X_train, y_train, X_test, y_test, backends=backends, random_state=random_state
+    )
+
+    # Whole model with each SVM backend
+    results = []
+    exact_pred = None
+    for name, backend, params in [('exact', 'exact', {})] + backends:
+        model = VotingClassifierModel(random_state=random_state, svm_backend=backend, svm_params=params)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.fit(X_train, y_train)
+        pred = model.predict_fast(X_test)
+        exact_pred = pred if exact_pred is None else exact_pred
+        result = {'config': name, **{f'svm_{key}': value for key, value in report[name].items()}}
+        result['model_agreement'] = float((pred == exact_pred).mean())
+        result['model_predict_one_us'] = round(time_calls(model.predict_one, list(X_test[:200]), min_seconds) * 1e6, 2)
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--train_rows', type=int, required=False, default=4000,
+        help='Number of training rows. Default: 4000.'
+        )
+    parser.add_argument(
+        '--test_rows', type=int, required=False, default=20000,
+        help='Number of test rows. Default: 20000.'
+        )
+    parser.add_argument(
+        '--configs', nargs='*', type=str, required=False, default=None,
+        help='Configs to compare with the exact SVC. Default: all.'
+        )
+    parser.add_argument(
+        '--min_seconds', type=float, required=False, default=0.5,
+        help='The least time to repeat the predict_one calls for. Default: 0.5.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark the SVM approximations, printing one JSON line per config.
+    Run from the repository root, e.g. python -m benchmarks.bench_svm_backends --train_rows 4000.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_svm_backends(
+        train_rows=args.train_rows, test_rows=args.test_rows, configs=args.configs, min_seconds=args.min_seconds
+    )
+
+
+if __name__ == '__main__':
+    main()
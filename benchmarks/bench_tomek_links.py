@@ -0,0 +1,133 @@
+import json
+import time
+import argparse
+import numpy
+from model.training.data_preparation.data_prep_utils.tomek_links import tomek_links_sample_indices
+
+
+def make_transactions(
+    rows: int,
+    fraud_rate: float=0.00172,
+    random_state: int=42
+) -> tuple:
+    """
+    Make a Kaggle-shaped feature matrix and target: 30 features, of which fraud rows are shifted.
+
+    :param rows:
+        Number of rows.
+    :param fraud_rate:
+        The portion of fraud rows. Default: 0.00172.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        Tuple containing X and y.
+    """
+    rng = numpy.random.default_rng(random_state)
+    y = (rng.random(rows) < fraud_rate).astype(numpy.int64)
+    X = rng.standard_normal((rows, 30))
+    X[y == 1] += rng.normal(1.0, 0.5, 30)
+    return X, y
+
+
+def bench_tomek_links(
+    rows: list,
+    engines: list,
+    imblearn_max_rows: int=300000,
+    n_jobs: int=None
+) -> list:
+    """
+    Time Tomek links undersampling of imblearn's TomekLinks against the fast Tomek links finder,
+    And check that both keep the same rows.
+
+    :param rows:
+        List of dataset sizes.
+    :param engines:
+        List of fast engine algorithms to time: 'brute', 'kd_tree' or 'ball_tree'.
+    :param imblearn_max_rows:
+        imblearn is only timed up to this many rows. Default: 300000.
+    :param n_jobs:
+        The number of parallel jobs for the neighbour search. Default: None.
+
+    :returns:
+        List of result dictionaries.
+    """
+    from imblearn.under_sampling import TomekLinks
+
+    results = []
+    for n in rows:
+        X, y = make_transactions(rows=n)
+        reference = None
+        if n <= imblearn_max_rows:
+            start = time.perf_counter()
+            tl = TomekLinks(n_jobs=n_jobs)
+            tl.fit_resample(X, y)
+            seconds = time.perf_counter() - start
+            reference = tl.sample_indices_
+            results.append({'rows': n, 'engine': 'imblearn', 'seconds': seconds, 'removed': int(n - len(reference))})
+            print(json.dumps(results[-1]))
+        for algorithm in engines:
+            start = time.perf_counter()
+            kept = tomek_links_sample_indices(X, y, algorithm=algorithm, n_jobs=n_jobs)
+            seconds = time.perf_counter() - start
+            result = {'rows': n, 'engine': f'fast_{algorithm}', 'seconds': seconds, 'removed': int(n - len(kept))}
+            if reference is not None:
+                result['same_as_imblearn'] = bool(numpy.array_equal(kept, reference))
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--rows', nargs='*', type=int, required=False, default=[284807, 2848070],
+        help='Dataset sizes. Default: 284807 2848070 (the Kaggle size and 10 times it).'
+        )
+    parser.add_argument(
+        '--engines', nargs='*', type=str, required=False, default=['brute'],
+        help='Fast engine algorithms to time. Default: brute.'
+        )
+    parser.add_argument(
+        '--imblearn_max_rows', type=int, required=False, default=300000,
+        help='imblearn is only timed up to this many rows. Default: 300000.'
+        )
+    parser.add_argument(
+        '--n_jobs', type=int, required=False, default=None,
+        help='The number of parallel jobs for the neighbour search. Default: None.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to benchmark Tomek links undersampling, printing one JSON line per result.
+    Run from the repository root, e.g. python -m benchmarks.bench_tomek_links.
+    """
+    # Get args
+    args = get_args()
+
+    # Benchmark
+    bench_tomek_links(
+        rows=args.rows,
+        engines=args.engines,
+        imblearn_max_rows=args.imblearn_max_rows,
+        n_jobs=args.n_jobs
+    )
+
+
+if __name__ == '__main__':
+    main()
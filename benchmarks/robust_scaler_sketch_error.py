@@ -0,0 +1,101 @@
+import json
+import argparse
+from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.streaming_robust_scaler import sketch_error_report
+
+
+def robust_scaler_sketch_error(
+    csv_file_name: str,
+    import_dir: str=None,
+    scale_columns: list=None,
+    chunksize: int=100000,
+    ks: list=None,
+    random_state: int=42
+) -> dict:
+    """
+    Report the exact-vs-approximate centre and scale of the streaming robust scaler on a csv file,
+    For several sketch sizes.
+
+    :param csv_file_name:
+        The name of the csv file, e.g. creditcard.csv.
+    :param import_dir:
+        The location path of the csv file. If not specified, uses current directory.
+    :param scale_columns:
+        List of column names to scale. Default: ['Time', 'Amount'].
+    :param chunksize:
+        The number of rows in each chunk given to the streaming scaler. Default: 100000.
+    :param ks:
+        List of sketch sizes to report. Default: [200, 2000].
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        Dictionary of error reports by sketch size.
+    """
+    df = DataFrameManipulator().csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir)
+    reports = {}
+    for k in ks or [200, 2000]:
+        reports[k] = sketch_error_report(
+            df=df,
+            scale_columns=scale_columns or ['Time', 'Amount'],
+            chunksize=chunksize,
+            k=k,
+            random_state=random_state
+        )
+    return reports
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--csv_file_name', type=str, required=False, default='creditcard.csv',
+        help='The name of the csv file. Default: creditcard.csv.'
+        )
+    parser.add_argument(
+        '--import_dir', type=str, required=False, default='data/raw',
+        help='The path to the folder containing the csv file. Default: data/raw.'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=100000,
+        help='The number of rows in each chunk given to the streaming scaler. Default: 100000.'
+        )
+    parser.add_argument(
+        '--ks', nargs='*', type=int, required=False, default=[200, 2000],
+        help='Sketch sizes to report. Default: 200 2000.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to print the streaming robust scaler error report as JSON.
+    Run from the repository root, e.g. python -m benchmarks.robust_scaler_sketch_error.
+    """
+    # Get args
+    args = get_args()
+
+    # Report
+    reports = robust_scaler_sketch_error(
+        csv_file_name=args.csv_file_name,
+        import_dir=args.import_dir,
+        chunksize=args.chunksize,
+        ks=args.ks
+    )
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+import io
+import os
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import numpy
+from model.training.data_preparation.data_prep import data_prep
+from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from model.training.modelling.model_classes.voting_classifier_model import VotingClassifierModel
+
+
+def recall_specificity(
+    y_true: numpy.ndarray,
+    y_pred: numpy.ndarray
+) -> tuple:
+    """
+    Compute the recall (true positive rate) and specificity (true negative rate) of binary predictions.
+
+    :param y_true:
+        True labels.
+    :param y_pred:
+        Predicted labels.
+
+    :returns:
+        Tuple containing recall and specificity.
+    """
+    y_true = numpy.asarray(y_true) == 1
+    y_pred = numpy.asarray(y_pred) == 1
+    recall = (y_true & y_pred).sum() / max(y_true.sum(), 1)
+    specificity = (~y_true & ~y_pred).sum() / max((~y_true).sum(), 1)
+    return float(recall), float(specificity)
+
+
+def run_schema(
+    raw_csv_path: str,
+    work_dir: str,
+    compact_schema: bool,
+    tomek_links_engine: str='fast',
+    random_state: int=42
+) -> tuple:
+    """
+    Prepare the data, fit the voting classifier and score the test set with one dataset schema.
+
+    :param raw_csv_path:
+        Path of the raw creditcard.csv file.
+    :param work_dir:
+        Folder for the data files of this run.
+    :param compact_schema:
+        If the compact dataset schema should be used.
+    :param tomek_links_engine:
+        'imblearn' or 'fast'. Default: 'fast'.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        Tuple containing the result dictionary and the test set predictions.
+    """
+    dataframe_man = DataFrameManipulator()
+    schema = get_schema(compact_schema)
+    raw_path = os.path.join(work_dir, 'raw')
+    processed_path = os.path.join(work_dir, 'processed')
+    os.makedirs(raw_path, exist_ok=True)
+    if not os.path.exists(os.path.join(raw_path, 'creditcard.csv')):
+        os.symlink(os.path.abspath(raw_csv_path), os.path.join(raw_path, 'creditcard.csv'))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Prep
+        start = time.perf_counter()
+        data_prep(
+            raw_path=raw_path,
+            train_test_path=os.path.join(raw_path, 'train_test'),
+            clean_path=os.path.join(work_dir, 'clean'),
+            processed_path=processed_path,
+            in_memory=True,
+            random_state=random_state,
+            tomek_links_engine=tomek_links_engine,
+            compact_schema=compact_schema
+        )
+        prep_seconds = time.perf_counter() - start
+
+        # Fit
+        train_df = dataframe_man.csv_to_df(csv_file_name='processed_train.csv', import_dir=processed_path, schema=schema)
+        X_train, y_train = dataframe_man.extract_features_target(df=train_df, target_variable='Class')
+        model = VotingClassifierModel(random_state=random_state)
+        start = time.perf_counter()
+        model.fit(X_train.to_numpy(), y_train.to_numpy())
+        fit_seconds = time.perf_counter() - start
+
+        # Score
+        test_df = dataframe_man.csv_to_df(
+            csv_file_name='test.csv', import_dir=os.path.join(raw_path, 'train_test'), schema=schema
+        )
+        X_test, y_test = dataframe_man.extract_features_target(df=test_df, target_variable='Class')
+        start = time.perf_counter()
+        y_pred = model.predict(X_test.to_numpy())
+        predict_seconds = time.perf_counter() - start
+
+    recall, specificity = recall_specificity(y_test.to_numpy(), y_pred)
+    result = {
+        'schema': 'compact' if compact_schema else 'default',
+        'feature_dtype': str(X_test.dtypes.iloc[0]),
+        'target_dtype': str(y_test.dtype),
+        'test_rows': len(test_df),
+        'test_frame_mb': round(test_df.memory_usage().sum() / 1e6, 3),
+        'train_rows': len(train_df),
+        'recall': recall,
+        'specificity': specificity,
+        'prep_seconds': round(prep_seconds, 3),
+        'fit_seconds': round(fit_seconds, 3),
+        'predict_seconds': round(predict_seconds, 3)
+    }
+    return result, y_pred
+
+
+def validate_compact_schema(
+    raw_csv_path: str,
+    work_dir: str=None,
+    tomek_links_engine: str='fast',
+    random_state: int=42
+) -> dict:
+    """
+    Compare the default float64/int64 dtypes with the compact float32/int8 dataset schema end to end:
+    Prep, fit and score the test set with both, and report how much recall and specificity move.
+
+    :param raw_csv_path:
+        Path of the raw creditcard.csv file.
+    :param work_dir:
+        Folder for the data files of both runs. If not specified, a temporary folder.
+    :param tomek_links_engine:
+        'imblearn' or 'fast'. Default: 'fast'.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        Dictionary with the result of each schema, the changes of recall and specificity,
+        And the share of test predictions that agree.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = work_dir or tmp_dir
+        default, default_pred = run_schema(
+            raw_csv_path=raw_csv_path, work_dir=os.path.join(work_dir, 'default'), compact_schema=False,
+            tomek_links_engine=tomek_links_engine, random_state=random_state
+        )
+        compact, compact_pred = run_schema(
+            raw_csv_path=raw_csv_path, work_dir=os.path.join(work_dir, 'compact'), compact_schema=True,
+            tomek_links_engine=tomek_links_engine, random_state=random_state
+        )
+
+    return {
+        'default': default,
+        'compact': compact,
+        'recall_change': compact['recall'] - default['recall'],
+        'specificity_change': compact['specificity'] - default['specificity'],
+        'prediction_agreement': float(numpy.mean(default_pred == compact_pred)),
+        'test_frame_memory_ratio': compact['test_frame_mb'] / default['test_frame_mb']
+    }
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--raw_csv_path', type=str, required=True,
+        help='Path of the raw creditcard.csv file.'
+        )
+    parser.add_argument(
+        '--work_dir', type=str, required=False, default=None,
+        help='Folder for the data files of both runs. If not specified, a temporary folder.'
+        )
+    parser.add_argument(
+        '--tomek_links_engine', type=str, required=False, default='fast', choices=['imblearn', 'fast'],
+        help='The Tomek links engine of the prep. Default: fast.'
+        )
+    parser.add_argument(
+        '--random_state', type=int, required=False, default=42,
+        help='Specify for repeatablity. Default: 42.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to validate the compact dataset schema, printing the report as JSON.
+    Run from the repository root, e.g. python -m benchmarks.validate_compact_schema --raw_csv_path data/raw/creditcard.csv.
+    """
+    # Get args
+    args = get_args()
+
+    # Validate
+    report = validate_compact_schema(
+        raw_csv_path=args.raw_csv_path,
+        work_dir=args.work_dir,
+        tomek_links_engine=args.tomek_links_engine,
+        random_state=args.random_state
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import io
+import os
+import json
+import argparse
+import tempfile
+import contextlib
+import numpy
+from benchmarks.bench_tomek_links import make_transactions
+from model.training.modelling.model_classes.voting_classifier_model import VotingClassifierModel
+from model.training.modelling.model_classes.model_artifact import save_artifact, load_model
+
+
+# Members of the models checked: KNN backend and SVM backend
+CONFIGS = [
+    ('exact', 'exact'),
+    ('kd_tree', 'exact'),
+    ('ivf', 'exact'),
+    ('condensed', 'exact'),
+    ('exact', 'nystroem'),
+    ('exact', 'rff'),
+    ('exact', 'reduced')
+]
+
+
+def validate_model_artifact(
+    train_rows: int=800,
+    test_rows: int=2000,
+    configs: list=None,
+    random_state: int=42
+) -> list:
+    """
+    Check that a VotingClassifierModel saved as a model artifact and loaded again predicts the same as its predict,
+    For batches and for one transaction at a time, with every KNN and SVM backend.
+    Raises AssertionError on the first difference.
+
+    :param train_rows:
+        Number of training rows. Default: 800.
+    :param test_rows:
+        Number of rows to compare the predictions on. Default: 2000.
+    :param configs:
+        List of (knn_backend, svm_backend) tuples. Default: CONFIGS.
+    :param random_state:
+        Specify for repeatablity. Default: 42.
+
+    :returns:
+        List of result dictionaries, one per model.
+    """
+    X, y = make_transactions(rows=train_rows, fraud_rate=0.5, random_state=random_state)
+    X_test, _ = make_transactions(rows=test_rows, fraud_rate=0.5, random_state=random_state + 1)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for knn_backend, svm_backend in (configs or CONFIGS):
+            model = VotingClassifierModel(random_state=random_state, knn_backend=knn_backend, svm_backend=svm_backend)
+            with contextlib.redirect_stdout(io.StringIO()):
+                model.fit(X, y)
+                y_pred = model.predict(X_test)
+
+            # Round trip
+            artifact_path = os.path.join(tmp_dir, f'{knn_backend}_{svm_backend}.artifact')
+            save_artifact(fast_clf=model.compile(), file_path=artifact_path)
+            artifact = load_model(artifact_path)
+
+            name = f'knn_backend={knn_backend} svm_backend={svm_backend}'
+            assert numpy.array_equal(artifact.predict(X_test), y_pred), f'{name}: predict differs from the model'
+            assert all(artifact.predict_one(x) == expected for x, expected in zip(X_test, y_pred)), \
+                f'{name}: predict_one differs from the model'
+            result = {'knn_backend': knn_backend, 'svm_backend': svm_backend, 'test_rows': test_rows,
+                      'artifact_mb': round(os.path.getsize(artifact_path) / 1e6, 3), 'same_predictions': True}
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--train_rows', type=int, required=False, default=800,
+        help='Number of training rows. Default: 800.'
+        )
+    parser.add_argument(
+        '--test_rows', type=int, required=False, default=2000,
+        help='Number of rows to compare the predictions on. Default: 2000.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to check the model artifact round trip, printing one JSON line per model.
+    Run from the repository root, e.g. python -m benchmarks.validate_model_artifact.
+    """
+    # Get args
+    args = get_args()
+
+    # Validate
+    validate_model_artifact(train_rows=args.train_rows, test_rows=args.test_rows)
+
+
+if __name__ == '__main__':
+    main()
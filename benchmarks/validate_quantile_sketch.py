@@ -0,0 +1,156 @@
+import json
+import argparse
+import numpy
+from model.training.data_preparation.data_prep_utils.quantile_sketch import KLLSketch
+
+
+# Quantiles checked, including those of the robust scaler
+QUANTILES = numpy.array([0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999])
+
+# Rank error bounds of KLLSketch, times k: for about 99% of quantiles, and for every quantile
+TYPICAL_RANK_ERROR = 2.0
+MAX_RANK_ERROR = 3.0
+
+
+def rank_error(
+    sorted_values: numpy.ndarray,
+    qs: numpy.ndarray,
+    estimates: numpy.ndarray
+) -> numpy.ndarray:
+    """
+    Compute the rank error of estimated quantiles: how far the target rank of each quantile is outside
+    The ranks of its estimate in the data, as a share of the number of values. Ties share their ranks.
+
+    :param sorted_values:
+        The data, sorted.
+    :param qs:
+        Array of quantiles between 0 and 1.
+    :param estimates:
+        Array of the estimated values at the quantiles.
+
+    :returns:
+        Array of rank errors, one per quantile.
+    """
+    n = len(sorted_values)
+    target = qs * (n - 1) + 1
+    low = numpy.searchsorted(sorted_values, estimates, side='left') + 1
+    high = numpy.searchsorted(sorted_values, estimates, side='right')
+    return numpy.maximum(numpy.maximum(low - target, target - high), 0) / n
+
+
+def validate_quantile_sketch(
+    rows: int=200000,
+    ks: list=None,
+    n_chunks: int=20,
+    seeds: list=None
+) -> list:
+    """
+    Check that the quantiles of KLLSketch stay within its stated rank error, for a sketch updated chunk by chunk,
+    For sketches of shards merged into one, and after a round trip through to_dict, on normal, heavy tailed
+    And heavily tied data: every quantile within 3 / k, and at most 5% of them over 2 / k.
+    Raises AssertionError on the first quantile outside the bound, or if too many are over 2 / k.
+
+    :param rows:
+        Number of values of each data set. Default: 200000.
+    :param ks:
+        List of sketch sizes. Default: [200, 2000].
+    :param n_chunks:
+        Number of chunks, and of shards, the values are added in. Default: 20.
+    :param seeds:
+        List of random states of the data and the sketches. Default: [0, 1, 2].
+
+    :returns:
+        List of result dictionaries, one per data set, sketch size and seed.
+    """
+    results = []
+    over_typical = []
+    for seed in (seeds or [0, 1, 2]):
+        rng = numpy.random.default_rng(seed)
+        datasets = {
+            'normal': rng.standard_normal(rows),
+            'lognormal': rng.lognormal(3, 1.5, rows),
+            'tied': rng.integers(0, 50, rows).astype(float)
+        }
+        for name, values in datasets.items():
+            sorted_values = numpy.sort(values)
+            chunks = numpy.array_split(values, n_chunks)
+            for k in (ks or [200, 2000]):
+                bound = MAX_RANK_ERROR / k
+
+                # One sketch updated chunk by chunk, sketches of shards merged, and a round trip
+                streamed = KLLSketch(k=k, random_state=seed)
+                for chunk in chunks:
+                    streamed.update(chunk)
+                merged = KLLSketch(k=k, random_state=seed)
+                for i, chunk in enumerate(chunks):
+                    merged.merge(KLLSketch(k=k, random_state=seed + i).update(chunk))
+                restored = KLLSketch.from_dict(streamed.to_dict(), random_state=seed)
+
+                errors = {}
+                for mode, sketch in (('streamed', streamed), ('merged', merged), ('restored', restored)):
+                    assert sketch.n == rows, f'{name}, k={k}, {mode}: counted {sketch.n} values of {rows}'
+                    error = rank_error(sorted_values, QUANTILES, sketch.quantiles(QUANTILES))
+                    assert (error <= bound).all(), \
+                        f'{name}, k={k}, seed={seed}, {mode}: rank error {error.max():.5f} ' \
+                        f'at quantile {QUANTILES[error.argmax()]} is over {bound:.5f}'
+                    over_typical.extend(error > TYPICAL_RANK_ERROR / k)
+                    errors[f'{mode}_max_rank_error'] = round(float(error.max()), 6)
+
+                result = {'dataset': name, 'k': k, 'seed': seed, 'rank_error_bound': round(bound, 6), **errors}
+                results.append(result)
+                print(json.dumps(result))
+
+    share = float(numpy.mean(over_typical))
+    assert share <= 0.05, f'{share:.1%} of the quantiles have a rank error over {TYPICAL_RANK_ERROR} / k'
+    print(json.dumps({'share_over_typical_rank_error': round(share, 4)}))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--rows', type=int, required=False, default=200000,
+        help='Number of values of each data set. Default: 200000.'
+        )
+    parser.add_argument(
+        '--ks', nargs='+', type=int, required=False, default=[200, 2000],
+        help='Sketch sizes. Default: 200 2000.'
+        )
+    parser.add_argument(
+        '--n_chunks', type=int, required=False, default=20,
+        help='Number of chunks, and of shards, the values are added in. Default: 20.'
+        )
+    parser.add_argument(
+        '--seeds', nargs='+', type=int, required=False, default=[0, 1, 2],
+        help='Random states of the data and the sketches. Default: 0 1 2.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to check the rank error of the quantile sketch, printing one JSON line per data set and size.
+    Run from the repository root, e.g. python -m benchmarks.validate_quantile_sketch.
+    """
+    # Get args
+    args = get_args()
+
+    # Validate
+    validate_quantile_sketch(rows=args.rows, ks=args.ks, n_chunks=args.n_chunks, seeds=args.seeds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import json
+import argparse
+import numpy
+from benchmarks.bench_tomek_links import make_transactions
+from model.training.data_preparation.data_prep_utils.tomek_links import tomek_links_sample_indices
+
+
+def validate_tomek_links(
+    rows: int=3000,
+    n_features: int=4,
+    fraud_rates: list=None,
+    seeds: list=None
+) -> list:
+    """
+    Check that the fast Tomek links undersampling keeps exactly the rows imblearn's TomekLinks keeps,
+    With every neighbour search algorithm, on small imbalanced sets of two classes, a set with duplicated rows
+    And a set of three classes. Raises AssertionError on the first difference.
+
+    :param rows:
+        Number of rows of each set. Default: 3000.
+    :param n_features:
+        Number of features of each set, fewer make the classes closer and the links more. Default: 4.
+    :param fraud_rates:
+        List of shares of the minority class. Default: [0.01, 0.05, 0.2].
+    :param seeds:
+        List of random states of the sets. Default: [0, 1, 2].
+
+    :returns:
+        List of result dictionaries, one per set.
+    """
+    from imblearn.under_sampling import TomekLinks
+
+    # Sets of two classes, with duplicated rows, and of three classes
+    datasets = []
+    for fraud_rate in (fraud_rates or [0.01, 0.05, 0.2]):
+        for seed in (seeds or [0, 1, 2]):
+            X, y = make_transactions(rows=rows, fraud_rate=fraud_rate, random_state=seed)
+            X = X[:, :n_features]
+            datasets.append((f'fraud_rate={fraud_rate} seed={seed}', X, y))
+    X, y = make_transactions(rows=rows, fraud_rate=0.05, random_state=0)
+    X = X[:, :n_features]
+    datasets.append(('duplicated rows', numpy.concatenate([X, X[:rows // 10]]), numpy.concatenate([y, y[:rows // 10]])))
+    rng = numpy.random.default_rng(0)
+    datasets.append(('three classes', X, numpy.where((y == 0) & (rng.random(len(y)) < 0.3), 2, y)))
+
+    results = []
+    for name, X, y in datasets:
+        tl = TomekLinks()
+        tl.fit_resample(X, y)
+        reference = tl.sample_indices_
+        for algorithm in ('brute', 'kd_tree', 'ball_tree'):
+            kept = tomek_links_sample_indices(X, y, algorithm=algorithm, dtype='float64')
+            assert numpy.array_equal(kept, reference), \
+                f'{name}, {algorithm}: kept {len(kept)} rows, imblearn kept {len(reference)}, ' \
+                f'{len(numpy.setxor1d(kept, reference))} rows differ'
+        result = {'dataset': name, 'rows': len(y), 'removed': len(y) - len(reference), 'same_as_imblearn': True}
+        results.append(result)
+        print(json.dumps(result))
+    return results
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--rows', type=int, required=False, default=3000,
+        help='Number of rows of each set. Default: 3000.'
+        )
+    parser.add_argument(
+        '--n_features', type=int, required=False, default=4,
+        help='Number of features of each set. Default: 4.'
+        )
+    parser.add_argument(
+        '--fraud_rates', nargs='+', type=float, required=False, default=[0.01, 0.05, 0.2],
+        help='Shares of the minority class. Default: 0.01 0.05 0.2.'
+        )
+    parser.add_argument(
+        '--seeds', nargs='+', type=int, required=False, default=[0, 1, 2],
+        help='Random states of the sets. Default: 0 1 2.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to check the fast Tomek links against imblearn, printing one JSON line per set.
+    Run from the repository root, e.g. python -m benchmarks.validate_tomek_links.
+    """
+    # Get args
+    args = get_args()
+
+    # Validate
+    validate_tomek_links(rows=args.rows, n_features=args.n_features, fraud_rates=args.fraud_rates, seeds=args.seeds)
+
+
+if __name__ == '__main__':
+    main()
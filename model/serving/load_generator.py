@@ -0,0 +1,300 @@
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import numpy
+from model.training.data_preparation.data_prep_utils.synthetic_transactions import generate_chunk
+from model.serving.micro_batcher import LatencyStats
+from model.serving.scoring_server import FEATURE_COLUMNS
+
+
+async def http_request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    method: str,
+    path: str,
+    host: str,
+    body: bytes=b''
+) -> tuple:
+    """
+    Send one HTTP/1.1 request over a kept alive connection and read the answer.
+
+    :param reader:
+        Stream of the connection.
+    :param writer:
+        Stream writer of the connection.
+    :param method:
+        HTTP method.
+    :param path:
+        Request path.
+    :param host:
+        Host header.
+    :param body:
+        Request body. Default: empty.
+
+    :returns:
+        Tuple containing the status code and the parsed JSON answer.
+    """
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ')[1])
+    length = next(int(line.split(':', 1)[1]) for line in head[1:] if line.lower().startswith('content-length:'))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def get_json(
+    host: str,
+    port: int,
+    path: str
+) -> dict:
+    """
+    GET a JSON answer of the server over a new connection.
+
+    :param host:
+        Host of the server.
+    :param port:
+        Port of the server.
+    :param path:
+        Request path, e.g. '/metrics'.
+
+    :returns:
+        The parsed JSON answer.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await http_request(reader, writer, 'GET', path, host))[1]
+    finally:
+        writer.close()
+
+
+async def client(
+    host: str,
+    port: int,
+    bodies: list,
+    stats: LatencyStats,
+    counter: dict,
+    requests: int
+) -> None:
+    """
+    Send predict requests over one kept alive connection until the total number of requests is sent.
+
+    :param host:
+        Host of the server.
+    :param port:
+        Port of the server.
+    :param bodies:
+        List of request bodies to send in turn.
+    :param stats:
+        LatencyStats to record the client side latencies in.
+    :param counter:
+        Dictionary of the number of requests started by all clients, under 'sent'.
+    :param requests:
+        The total number of requests of all clients.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter['sent'] < requests:
+            body = bodies[counter['sent'] % len(bodies)]
+            counter['sent'] += 1
+            start = time.perf_counter()
+            status, answer = await http_request(reader, writer, 'POST', '/predict', host, body)
+            if status == 200:
+                stats.record_request(rows=len(answer['predictions']), seconds=time.perf_counter() - start)
+            else:
+                stats.record_error()
+    finally:
+        writer.close()
+
+
+async def generate_load(
+    host: str='127.0.0.1',
+    port: int=8080,
+    requests: int=2000,
+    concurrency: int=32,
+    rows_per_request: int=1,
+    random_state: int=42
+) -> dict:
+    """
+    Send predict requests of synthetic transactions from concurrent clients, and measure the latency
+    And throughput the clients see, next to the metrics of the server.
+
+    :param host:
+        Host of the server. Default: '127.0.0.1'.
+    :param port:
+        Port of the server. Default: 8080.
+    :param requests:
+        The total number of requests. Default: 2000.
+    :param concurrency:
+        The number of clients sending requests at the same time, each over its own connection. Default: 32.
+    :param rows_per_request:
+        The number of transactions in each request. Default: 1.
+    :param random_state:
+        Random state of the synthetic transactions. Default: 42.
+
+    :returns:
+        Dictionary of the load, the client side metrics under 'client' and the server metrics under 'server'.
+    """
+    # Request bodies of synthetic transactions
+    n_bodies = min(requests, 1000)
+    df = generate_chunk(
+        start=0, rows=n_bodies * rows_per_request, seed=numpy.random.SeedSequence(random_state), clock=0.0
+    )
+    X = df[FEATURE_COLUMNS].to_numpy()
+    bodies = [
+        json.dumps({'rows': X[i * rows_per_request:(i + 1) * rows_per_request].tolist()}).encode()
+        for i in range(n_bodies)
+    ]
+
+    # Concurrent clients
+    stats = LatencyStats()
+    counter = {'sent': 0}
+    await asyncio.gather(*[
+        client(host=host, port=port, bodies=bodies, stats=stats, counter=counter, requests=requests)
+        for _ in range(concurrency)
+    ])
+    client_metrics = stats.to_dict()
+    for key in ('batches', 'mean_batch_rows'):
+        client_metrics.pop(key)
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'rows_per_request': rows_per_request,
+        'client': client_metrics,
+        'server': await get_json(host=host, port=port, path='/metrics')
+    }
+
+
+def free_port() -> int:
+    """
+    Get a free local port.
+
+    :returns:
+        The port number.
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(
+    server_args: list,
+    port: int,
+    timeout: float=60.0
+) -> subprocess.Popen:
+    """
+    Start the scoring server in a subprocess and wait until it answers /health.
+
+    :param server_args:
+        Command line arguments of model.serving.scoring_server, without --port.
+    :param port:
+        Port for the server.
+    :param timeout:
+        The most seconds to wait for the server. Default: 60.0.
+
+    :returns:
+        The server process.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'model.serving.scoring_server', '--port', str(port)] + server_args,
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            asyncio.run(get_json(host='127.0.0.1', port=port, path='/health'))
+            return process
+        except OSError:
+            if process.poll() is not None or time.perf_counter() > deadline:
+                process.kill()
+                raise RuntimeError('The scoring server did not start')
+            time.sleep(0.1)
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--host', type=str, required=False, default='127.0.0.1',
+        help='Host of the server. Default: 127.0.0.1.'
+        )
+    parser.add_argument(
+        '--port', type=int, required=False, default=8080,
+        help='Port of the server. Default: 8080.'
+        )
+    parser.add_argument(
+        '--requests', type=int, required=False, default=2000,
+        help='The total number of requests. Default: 2000.'
+        )
+    parser.add_argument(
+        '--concurrency', type=int, required=False, default=32,
+        help='The number of concurrent clients. Default: 32.'
+        )
+    parser.add_argument(
+        '--rows_per_request', type=int, required=False, default=1,
+        help='The number of transactions in each request. Default: 1.'
+        )
+    parser.add_argument(
+        '--start_server', action='store_true',
+        help='Start the scoring server on a free local port first, with the server arguments after --.'
+        )
+    parser.add_argument(
+        'server_args', nargs=argparse.REMAINDER,
+        help='Arguments of model.serving.scoring_server when --start_server is set, after --.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to load test the scoring server, printing the client and server metrics as JSON.
+    Run from the repository root, e.g.
+    python -m model.serving.load_generator --start_server -- --scaler_json data/processed/scaler.json --max_batch_size 64.
+    """
+    # Get args
+    args = get_args()
+
+    # Start the server if needed
+    process = None
+    host, port = args.host, args.port
+    if args.start_server:
+        host, port = '127.0.0.1', free_port()
+        process = start_server(server_args=[arg for arg in args.server_args if arg != '--'], port=port)
+
+    # Load test
+    try:
+        result = asyncio.run(generate_load(
+            host=host,
+            port=port,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            rows_per_request=args.rows_per_request
+        ))
+        print(json.dumps(result))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
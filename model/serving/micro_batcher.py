@@ -0,0 +1,195 @@
+import time
+import asyncio
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+from src.tracing import trace_span
+
+
+class LatencyStats:
+    """
+    A class counting the requests, rows and batches of a scoring service, with the latencies of the latest requests
+    For percentiles and the throughput since the service started.
+    """
+    def __init__(self, window: int=10000):
+        self.latencies = collections.deque(maxlen=window)
+        self.batch_sizes = collections.deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.start_time = time.perf_counter()
+
+    def record_request(self, rows: int, seconds: float) -> None:
+        """
+        Count a scored request.
+
+        :param rows:
+            The number of rows of the request.
+        :param seconds:
+            The latency of the request, from it being received to its predictions being ready.
+        """
+        self.requests += 1
+        self.rows += rows
+        self.latencies.append(seconds)
+
+    def record_batch(self, rows: int) -> None:
+        """
+        Count a micro-batch.
+
+        :param rows:
+            The number of rows of the batch.
+        """
+        self.batches += 1
+        self.batch_sizes.append(rows)
+
+    def record_error(self) -> None:
+        """
+        Count a failed request.
+        """
+        self.errors += 1
+
+    def to_dict(self) -> dict:
+        """
+        Get the counters, throughput and latency percentiles.
+
+        :returns:
+            Dictionary of requests, rows, batches, errors, uptime, requests and rows per second,
+            Mean batch size and the p50, p90, p99 and maximum latency in milliseconds of the latest requests.
+        """
+        uptime = time.perf_counter() - self.start_time
+        latency = numpy.array(self.latencies) * 1000 if self.latencies else numpy.zeros(1)
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'uptime_seconds': round(uptime, 3),
+            'requests_per_second': round(self.requests / max(uptime, 1e-9), 1),
+            'rows_per_second': round(self.rows / max(uptime, 1e-9), 1),
+            'mean_batch_rows': round(float(numpy.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+            'latency_p50_ms': round(float(numpy.percentile(latency, 50)), 3),
+            'latency_p90_ms': round(float(numpy.percentile(latency, 90)), 3),
+            'latency_p99_ms': round(float(numpy.percentile(latency, 99)), 3),
+            'latency_max_ms': round(float(latency.max()), 3)
+        }
+
+
+class MicroBatcher:
+    """
+    A class coalescing the rows of concurrent requests into micro-batches for one predict call each.
+
+    A batch is sent as soon as it has max_batch_size rows, or max_wait_ms after its first request arrived,
+    Whichever is first. Predict runs in worker threads off the event loop, so requests keep arriving and
+    The next batch fills while the current one is scored. Every request gets the predictions of its own rows.
+    """
+    def __init__(
+        self,
+        predict,
+        max_batch_size: int=64,
+        max_wait_ms: float=2.0,
+        workers: int=1,
+        stats: LatencyStats=None
+    ):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self.stats = stats or LatencyStats()
+        self.pending = collections.deque()
+        self.arrived = None
+        self.executor = None
+        self.tasks = []
+
+    async def start(self) -> None:
+        """
+        Start the batching loops on the running event loop, one per worker thread.
+        """
+        self.arrived = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='predict')
+        self.tasks = [asyncio.create_task(self.batch_loop()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Stop the batching loops and worker threads.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, X: numpy.ndarray) -> numpy.ndarray:
+        """
+        Queue rows for the next micro-batch and wait for their predictions.
+
+        :param X:
+            2D array of the rows of one request.
+
+        :returns:
+            Array of the predictions of the rows.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((X, future))
+        self.arrived.set()
+        return await future
+
+    def predict_batch(self, X: numpy.ndarray) -> numpy.ndarray:
+        """
+        Predict one micro-batch. Runs in a worker thread.
+
+        :param X:
+            2D array of the rows of the batch.
+
+        :returns:
+            Array of predictions.
+        """
+        with trace_span('predict_batch', category='serving', rows=len(X)):
+            return numpy.asarray(self.predict(X))
+
+    async def batch_loop(self) -> None:
+        """
+        Collect queued requests into micro-batches, predict them in a worker thread and resolve the requests.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for the first request of the batch
+            while not self.pending:
+                self.arrived.clear()
+                await self.arrived.wait()
+            items = [self.pending.popleft()]
+            rows = len(items[0][0])
+
+            # Fill the batch until it is full or its time is up. Requests stay pending until taken,
+            # So none is lost when waiting times out
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_size:
+                if self.pending:
+                    items.append(self.pending.popleft())
+                    rows += len(items[-1][0])
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                self.arrived.clear()
+                try:
+                    await asyncio.wait_for(self.arrived.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            # Predict off the event loop
+            X = items[0][0] if len(items) == 1 else numpy.concatenate([item[0] for item in items])
+            self.stats.record_batch(len(X))
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predict_batch, X)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            # Hand every request its own predictions
+            start = 0
+            for request_X, future in items:
+                if not future.done():
+                    future.set_result(predictions[start:start + len(request_X)])
+                start += len(request_X)
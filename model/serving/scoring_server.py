@@ -0,0 +1,343 @@
+import csv
+import json
+import time
+import asyncio
+import argparse
+import numpy
+from model.serving.micro_batcher import LatencyStats, MicroBatcher
+from model.training.modelling.modelling_utils.batch_scoring import scoring_estimator
+from model.training.data_preparation.data_prep_utils.streaming_robust_scaler import StreamingRobustScaler
+from model.training.data_preparation.data_prep_utils.dataset_schema import CREDITCARD_COLUMNS
+
+
+# Default feature columns of the transactions, those of creditcard.csv, in the order the model was fitted with
+FEATURE_COLUMNS = [column for column in CREDITCARD_COLUMNS if column != 'Class']
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+                500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """
+    An error answered with an HTTP status code and a JSON error message.
+    """
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ScoringServer:
+    """
+    A class serving a fitted model over HTTP on asyncio, with the requests coalesced into micro-batches.
+
+    The model is imported once. POST /predict takes {"rows": [[...], ...]} or {"row": [...]},
+    Raw transactions with the feature columns in order, those of creditcard.csv unless feature_columns is given, which are scaled with the scaler of the training data
+    And scored in the next micro-batch, and answers {"predictions": [...]}.
+    GET /metrics answers the counters, throughput and latency percentiles, and GET /health answers {"status": "ok"}.
+    Connections are kept alive, so clients can send many requests over one connection.
+    """
+    def __init__(
+        self,
+        model_file_path: str,
+        scaler_json: str=None,
+        feature_columns: list=None,
+        max_batch_size: int=64,
+        max_wait_ms: float=2.0,
+        workers: int=1,
+        fast: bool=False
+    ):
+        # Model, imported once. A model artifact is already compiled
+        from model.training.modelling.model_classes.model_artifact import load_model
+        self.model = load_model(model_file_path)
+        if fast and hasattr(self.model, 'compile'):
+            self.model.compile()
+            predict = self.model.predict_fast
+        else:
+            predict = scoring_estimator(self.model).predict
+
+        # Feature columns of the requests, checked against the model when it knows its number of features
+        self.feature_columns = list(feature_columns or FEATURE_COLUMNS)
+        n_features = getattr(scoring_estimator(self.model), 'n_features_in_', None)
+        if n_features is not None and n_features != len(self.feature_columns):
+            raise ValueError(f'The model was fitted with {n_features} features, '
+                             f'got {len(self.feature_columns)} feature columns: {self.feature_columns}')
+
+        # Scaling of the scale columns, as arrays of their positions, centres and scales
+        self.scale_index, self.center, self.scale = None, None, None
+        if scaler_json:
+            scaler = StreamingRobustScaler.load(scaler_json)
+            missing = [column for column in scaler.scale_columns if column not in self.feature_columns]
+            if missing:
+                raise ValueError(f'Scale columns {missing} of {scaler_json} are not feature columns')
+            self.scale_index = numpy.array([self.feature_columns.index(column) for column in scaler.scale_columns])
+            self.center = numpy.array([scaler.center_[column] for column in scaler.scale_columns])
+            self.scale = numpy.array([scaler.scale_[column] for column in scaler.scale_columns])
+
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(
+            predict=self.predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, workers=workers, stats=self.stats
+        )
+        self.model_predict = predict
+        self.server = None
+
+    def predict(self, X: numpy.ndarray) -> numpy.ndarray:
+        """
+        Scale and predict a micro-batch of raw transactions. Runs in a worker thread.
+
+        :param X:
+            2D float64 array of the feature columns.
+
+        :returns:
+            Array of predictions.
+        """
+        if self.scale_index is not None:
+            X[:, self.scale_index] = (X[:, self.scale_index] - self.center) / self.scale
+        return self.model_predict(X)
+
+    def parse_rows(self, body: bytes) -> numpy.ndarray:
+        """
+        Parse the rows of a predict request.
+
+        :param body:
+            JSON request body.
+
+        :returns:
+            2D float64 array of the rows.
+        """
+        try:
+            payload = json.loads(body)
+            rows = payload['rows'] if 'rows' in payload else [payload['row']]
+            X = numpy.array(rows, dtype=numpy.float64)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPError(400, f'Expected {{"rows": [[...], ...]}} or {{"row": [...]}} of numbers: {e}')
+        if X.ndim != 2 or X.shape[1] != len(self.feature_columns) or not len(X):
+            raise HTTPError(400, f'Expected rows of {len(self.feature_columns)} features: {self.feature_columns}')
+        return X
+
+    async def route(self, method: str, path: str, body: bytes) -> dict:
+        """
+        Answer one request.
+
+        :param method:
+            HTTP method.
+        :param path:
+            Request path.
+        :param body:
+            Request body.
+
+        :returns:
+            The JSON serialisable answer.
+        """
+        if path == '/predict':
+            if method != 'POST':
+                raise HTTPError(405, 'Use POST /predict')
+            start = time.perf_counter()
+            X = self.parse_rows(body)
+            predictions = await self.batcher.submit(X)
+            self.stats.record_request(rows=len(X), seconds=time.perf_counter() - start)
+            return {'predictions': predictions.tolist()}
+        if path == '/metrics':
+            return self.stats.to_dict()
+        if path == '/health':
+            return {'status': 'ok'}
+        raise HTTPError(404, f'No route {path}')
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the HTTP/1.1 requests of one connection until the client closes it.
+
+        :param reader:
+            Stream of the connection.
+        :param writer:
+            Stream writer of the connection.
+        """
+        try:
+            while True:
+                # Request line and headers
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                method, path, version = (lines[0].split(' ') + ['', '', ''])[:3]
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+
+                # Body and answer
+                status = 200
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(413, f'Body larger than {MAX_BODY_BYTES} bytes')
+                    body = await reader.readexactly(length) if length else b''
+                    answer = await self.route(method=method, path=path.split('?', 1)[0], body=body)
+                except HTTPError as e:
+                    status, answer = e.status, {'error': e.message}
+                    self.stats.record_error()
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, answer = 500, {'error': f'{type(e).__name__}: {e}'}
+                    self.stats.record_error()
+
+                data = json.dumps(answer).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n'
+                    f'Content-Length: {len(data)}\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive or status == 413:
+                    break
+        finally:
+            writer.close()
+
+    async def start(self, host: str='127.0.0.1', port: int=8080) -> None:
+        """
+        Start the micro-batcher and listen for connections.
+
+        :param host:
+            Host to listen on. Default: '127.0.0.1'.
+        :param port:
+            Port to listen on. 0 picks a free port. Default: 8080.
+        """
+        await self.batcher.start()
+        self.server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+
+    @property
+    def port(self) -> int:
+        """
+        The port the server listens on.
+        """
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """
+        Stop listening and stop the micro-batcher.
+        """
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self, host: str='127.0.0.1', port: int=8080) -> None:
+        """
+        Start the server and serve until cancelled.
+
+        :param host:
+            Host to listen on. Default: '127.0.0.1'.
+        :param port:
+            Port to listen on. Default: 8080.
+        """
+        await self.start(host=host, port=port)
+        print(f"Serving on http://{host}:{self.port} with micro-batches of up to {self.batcher.max_batch_size} rows "
+              f"and {self.batcher.max_wait * 1000} ms wait\n", flush=True)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--model_file', type=str, required=False, default='model/classifiers/fitted_model.pkl',
+        help='The pickled fitted model, or its model artifact. Default: model/classifiers/fitted_model.pkl.'
+        )
+    parser.add_argument(
+        '--scaler_json', type=str, required=False, default=None,
+        help='The scaler JSON file of the processed training data. If not specified, features are not scaled.'
+        )
+    parser.add_argument(
+        '--feature_columns', nargs='+', type=str, required=False, default=None,
+        help='The feature columns of the requests, in the order the model was fitted with. '
+             'Default: the columns of --columns_csv, or those of creditcard.csv.'
+        )
+    parser.add_argument(
+        '--columns_csv', type=str, required=False, default=None,
+        help='A csv file with the columns the model was fitted with, such as processed_train.csv, '
+             'whose header gives the feature columns. Default: None.'
+        )
+    parser.add_argument(
+        '--target_variable', type=str, required=False, default='Class',
+        help='The target column of --columns_csv, which is not a feature column. Default: Class.'
+        )
+    parser.add_argument(
+        '--host', type=str, required=False, default='127.0.0.1',
+        help='Host to listen on. Default: 127.0.0.1.'
+        )
+    parser.add_argument(
+        '--port', type=int, required=False, default=8080,
+        help='Port to listen on. Default: 8080.'
+        )
+    parser.add_argument(
+        '--max_batch_size', type=int, required=False, default=64,
+        help='The most rows in a micro-batch. Default: 64.'
+        )
+    parser.add_argument(
+        '--max_wait_ms', type=float, required=False, default=2.0,
+        help='The longest a micro-batch waits for more requests after its first, in milliseconds. Default: 2.0.'
+        )
+    parser.add_argument(
+        '--workers', type=int, required=False, default=1,
+        help='The number of threads predicting micro-batches. Default: 1.'
+        )
+    parser.add_argument(
+        '--fast', action='store_true',
+        help='Predict with the compiled NumPy path of VotingClassifierModel instead of the SKLearn estimators.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+def main() -> None:
+    """
+    Main entry point to serve a fitted model over HTTP with micro-batching.
+    Run from the repository root, e.g. python -m model.serving.scoring_server --scaler_json data/processed/scaler.json.
+    """
+    # Get args
+    args = get_args()
+
+    # Feature columns, given or from the header of the csv file
+    feature_columns = args.feature_columns
+    if not feature_columns and args.columns_csv:
+        with open(args.columns_csv, 'r', newline='') as f:
+            feature_columns = [column for column in next(csv.reader(f)) if column != args.target_variable]
+
+    # Serve
+    server = ScoringServer(
+        model_file_path=args.model_file,
+        scaler_json=args.scaler_json,
+        feature_columns=feature_columns,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        workers=args.workers,
+        fast=args.fast
+    )
+    try:
+        asyncio.run(server.serve_forever(host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,237 @@
+import os
 from src.utils import timing_decorator
+from src.tracing import enable_tracing, disable_tracing, export_trace, trace_span, tracing_enabled
 from model.training.data_preparation.data_prep_process import create_train_test_sets, clean_training_data, process_training_data
+from model.training.data_preparation.data_prep_utils.stage_manifest import StageManifest, module_code_files
+from model.training.data_preparation.data_prep_utils.stage_dag import StageDAG
+from model.training.data_preparation.data_prep_utils.feature_store import build_feature_store
+from model.training.data_preparation.data_prep_utils.dataset_schema import DatasetSchema, get_schema
+from model.training.data_preparation.data_prep_utils.dataset_metrics import configure_metrics
+
+
+# Repository root and its data folder, so default paths do not depend on the current directory
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+DATA_DIR = os.path.join(REPO_DIR, 'data')
+
+# Source files of each stage, its module and the project modules it imports, part of the stage fingerprints
+# In incremental mode
+STAGE_CODE_FILES = {
+    stage: module_code_files(modules=[func.__module__], root_dir=REPO_DIR)
+    for stage, func in (
+        ('create', create_train_test_sets.create),
+        ('clean', clean_training_data.clean),
+        ('process', process_training_data.process),
+        ('test_store', build_feature_store)
+    )
+}
+
+
+def build_data_prep_dag(
+    raw_path = os.path.join(DATA_DIR, 'raw'),
+    train_test_path = os.path.join(DATA_DIR, 'raw', 'train_test'),
+    clean_path = os.path.join(DATA_DIR, 'clean'),
+    processed_path = os.path.join(DATA_DIR, 'processed'),
+    use_cache = False,
+    in_memory = False,
+    export_intermediate = False,
+    chunksize = None,
+    test_size = 0.2,
+    random_state = 42,
+    outlier_threshold = 1010.875,
+    scale_columns = ['Time', 'Amount'],
+    tomek_links_engine = 'imblearn',
+    compact_schema = False,
+    n_shards = None,
+    n_jobs = None,
+    variants = None,
+    test_feature_store = False
+) -> StageDAG:
+    """
+    Build the DAG of the data preparation stages.
+    Every stage declares the files it reads and writes, which gives the dependencies between them:
+    create -> clean -> process, with the optional variant and test feature store stages on their own branches.
+
+    :param variants:
+        Dictionary of variant name to a dictionary of process keyword arguments to override,
+        e.g. {'rus_7': {'random_state': 7}}. Each variant is processed from the same clean data
+        into its own folder in processed_path/variants, in parallel with the other variants.
+    :param test_feature_store:
+        If a memory mapped feature store of test.csv should be built for scoring, in parallel with cleaning.
+
+    The other parameters are those of data_prep. n_shards and n_jobs are not stage parameters,
+    As the sharded stages write the same files.
+
+    :returns:
+        StageDAG of the data preparation stages.
+    """
+    dag = StageDAG()
+    train_csv = os.path.join(raw_path, 'train_test', 'train.csv')
+    test_csv = os.path.join(raw_path, 'train_test', 'test.csv')
+
+    # Split
+    dag.add_stage(
+        name='create',
+        func=create_train_test_sets.create,
+        kwargs=dict(raw_path=raw_path, test_size=test_size, random_state=random_state, use_cache=use_cache,
+                    chunksize=chunksize, compact_schema=compact_schema, n_shards=n_shards, n_jobs=n_jobs),
+        params=dict(test_size=test_size, random_state=random_state, use_cache=use_cache, chunksize=chunksize,
+                    compact_schema=compact_schema),
+        inputs=[os.path.join(raw_path, 'creditcard.csv')],
+        outputs=[train_csv, test_csv],
+        code_files=STAGE_CODE_FILES['create']
+    )
+
+    # Test feature store
+    if test_feature_store:
+        test_store_dir = os.path.join(raw_path, 'train_test', 'feature_store', 'test')
+        schema = get_schema(compact_schema) or DatasetSchema()
+        dag.add_stage(
+            name='test_store',
+            func=build_feature_store,
+            kwargs=dict(csv_file_name='test.csv', import_dir=os.path.join(raw_path, 'train_test'), store_dir=test_store_dir,
+                        dtype=schema.feature_dtype.name, label_dtype=schema.target_dtype.name),
+            inputs=[test_csv],
+            outputs=[os.path.join(test_store_dir, 'meta.json')],
+            code_files=STAGE_CODE_FILES['test_store']
+        )
+
+    # Clean
+    dag.add_stage(
+        name='clean',
+        func=clean_training_data.clean,
+        kwargs=dict(train_test_path=train_test_path, clean_path=clean_path, outlier_threshold=outlier_threshold,
+                    use_cache=use_cache, chunksize=chunksize, compact_schema=compact_schema, n_shards=n_shards,
+                    n_jobs=n_jobs),
+        params=dict(outlier_threshold=outlier_threshold, use_cache=use_cache, chunksize=chunksize,
+                    compact_schema=compact_schema),
+        inputs=[os.path.join(train_test_path, 'train.csv')],
+        outputs=[os.path.join(clean_path, 'clean_train.csv')],
+        code_files=STAGE_CODE_FILES['clean']
+    )
+
+    # Process, and process variants
+    process_kwargs = dict(clean_path=clean_path, processed_path=processed_path, scale_columns=scale_columns,
+                          random_state=random_state, tomek_links_engine=tomek_links_engine, use_cache=use_cache,
+                          in_memory=in_memory, export_intermediate=export_intermediate, compact_schema=compact_schema,
+                          n_shards=n_shards, n_jobs=n_jobs)
+    process_stages = {'process': process_kwargs}
+    for variant, overrides in (variants or {}).items():
+        variant_kwargs = dict(process_kwargs, processed_path=os.path.join(processed_path, 'variants', variant))
+        variant_kwargs.update(overrides)
+        process_stages[f'process_{variant}'] = variant_kwargs
+    for name, kwargs in process_stages.items():
+        dag.add_stage(
+            name=name,
+            func=process_training_data.process,
+            kwargs=kwargs,
+            params={key: value for key, value in kwargs.items()
+                    if key not in ('clean_path', 'processed_path', 'n_shards', 'n_jobs')},
+            inputs=[os.path.join(kwargs['clean_path'], 'clean_train.csv')],
+            outputs=[os.path.join(kwargs['processed_path'], 'processed_train.csv'),
+                     os.path.join(kwargs['processed_path'], 'scaler.json')],
+            code_files=STAGE_CODE_FILES['process']
+        )
+
+    return dag
 
 
 @timing_decorator
 def data_prep(
-    raw_path = '../../../data/raw',
-    train_test_path = '../../../data/raw/train_test',
-    clean_path = '../../../data/clean',
-    processed_path = '../../../data/processed',
-) -> None:
+    raw_path = os.path.join(DATA_DIR, 'raw'),
+    train_test_path = os.path.join(DATA_DIR, 'raw', 'train_test'),
+    clean_path = os.path.join(DATA_DIR, 'clean'),
+    processed_path = os.path.join(DATA_DIR, 'processed'),
+    use_cache = False,
+    in_memory = False,
+    export_intermediate = False,
+    chunksize = None,
+    test_size = 0.2,
+    random_state = 42,
+    outlier_threshold = 1010.875,
+    scale_columns = ['Time', 'Amount'],
+    tomek_links_engine = 'imblearn',
+    compact_schema = False,
+    n_shards = None,
+    n_jobs = None,
+    incremental = False,
+    manifest_path = None,
+    max_workers = 1,
+    variants = None,
+    test_feature_store = False,
+    metrics = 'print',
+    metrics_sink = None,
+    trace_file = None,
+    trace_profile = False,
+    trace_memory = False
+) -> dict:
     """
     Python script file to create train and test sets from raw file,
     Clean the data by performing extreme outlier removal,
     Process the data by scaling features and undersampling,
     Exporting the final processed dataset as a CSV file.
+    Set use_cache to keep a columnar binary cache next to every CSV file so later imports skip CSV parsing.
+    Set in_memory to chain the processing steps in memory, exporting the intermediate CSV files only if export_intermediate.
+    Set chunksize to split out of core and stream the cleaning step in chunks of that many rows.
+    Set incremental to skip every stage whose input files, parameters and code are unchanged since it last ran,
+    As recorded in the manifest at manifest_path (default: '.prep_manifest.json' in processed_path).
+    Set tomek_links_engine to 'fast' to use the fast Tomek links finder instead of imblearn's TomekLinks.
+    Set compact_schema to import every CSV file with float32 features and an int8 target, half the memory of the defaults.
+    Set n_shards to split, clean and process the data as that many Time window shards in n_jobs worker processes
+    (default: one per shard), with the scaler statistics, stratified split, sorting and undersampling kept global,
+    So the files written are the same as without shards. The columnar binary cache is not used by sharded stages.
+    Set max_workers above 1 to run independent stages, such as variants and the test feature store
+    (see build_data_prep_dag), concurrently in a process pool.
+    Set metrics to 'off' to skip the row and class counts of every dataset, or to 'json' to write them
+    As JSON records to metrics_sink (default: stdout) instead of printing them.
+    Set trace_file to trace the run, stage workers included, as nested spans written as a Chrome trace JSON file
+    (see src.tracing). Set trace_profile to True to profile every stage with cProfile, or to a list of span names,
+    And trace_memory to record the traced memory of every span with tracemalloc.
+    Returns the per-stage timing and critical path report.
     """
+    # Dataset metrics, also for the stage worker processes
+    configure_metrics(mode=metrics, sink=metrics_sink)
+
+    # Manifest
+    manifest = None
+    if incremental:
+        if not manifest_path:
+            manifest_path = str(os.path.join(processed_path, '.prep_manifest.json'))
+        manifest = StageManifest(manifest_path=manifest_path)
+
     # Prep
-    create_train_test_sets.create(raw_path=raw_path)
-    clean_training_data.clean(train_test_path=train_test_path, clean_path=clean_path)
-    process_training_data.process(clean_path=clean_path, processed_path=processed_path)
+    dag = build_data_prep_dag(
+        raw_path=raw_path,
+        train_test_path=train_test_path,
+        clean_path=clean_path,
+        processed_path=processed_path,
+        use_cache=use_cache,
+        in_memory=in_memory,
+        export_intermediate=export_intermediate,
+        chunksize=chunksize,
+        test_size=test_size,
+        random_state=random_state,
+        outlier_threshold=outlier_threshold,
+        scale_columns=scale_columns,
+        tomek_links_engine=tomek_links_engine,
+        compact_schema=compact_schema,
+        n_shards=n_shards,
+        n_jobs=n_jobs,
+        variants=variants,
+        test_feature_store=test_feature_store
+    )
+
+    # Run, traced if requested
+    if not trace_file:
+        return dag.run(max_workers=max_workers, manifest=manifest)
+    was_tracing = tracing_enabled()
+    enable_tracing(trace_file=trace_file, profile=trace_profile, memory=trace_memory)
+    try:
+        with trace_span('data_prep', category='pipeline', max_workers=max_workers, n_shards=n_shards):
+            return dag.run(max_workers=max_workers, manifest=manifest)
+    finally:
+        export_trace()
+        if not was_tracing:
+            disable_tracing()
 
 
 if __name__ == '__main__':
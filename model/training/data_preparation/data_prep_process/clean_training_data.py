@@ -1,14 +1,56 @@
 import os
+import functools
+import pandas
 from src.utils import timing_decorator
 from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
-from model.training.data_preparation.data_prep_utils.data_prep_functions import print_dataframe_info
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from model.training.data_preparation.data_prep_utils.sharded_prep import ShardedCSV
+from model.training.data_preparation.data_prep_utils.dataset_metrics import dataset_metrics
+
+
+def remove_extreme_outliers(df: pandas.DataFrame, outlier_threshold: float=1010.875) -> pandas.DataFrame:
+    """
+    Function to remove extreme outliers from the non-fraud transactions of a DataFrame.
+
+    :param df:
+        DataFrame or DataFrame chunk to clean.
+    :param outlier_threshold:
+        Non-fraud transactions with an Amount above this are removed. Default: 1010.875.
+
+    :returns:
+        DataFrame without the extreme outliers.
+    """
+    return df.loc[((df['Class'] == 0) & (df['Amount'] <= outlier_threshold)) | df['Class'] == 1]
+
+
+@dataset_metrics('Clean Training Dataset', classification=True)
+def clean_chunks(chunks, outlier_threshold: float=1010.875):
+    """
+    Generator to clean the creditcard training dataset one DataFrame chunk at a time.
+
+    :param chunks:
+        Iterable of training DataFrame chunks.
+    :param outlier_threshold:
+        Non-fraud transactions with an Amount above this are removed. Default: 1010.875.
+
+    :returns:
+        Generator of clean DataFrame chunks.
+    """
+    for chunk in chunks:
+        yield remove_extreme_outliers(chunk, outlier_threshold=outlier_threshold)
 
 
 @timing_decorator
-@print_dataframe_info('Clean Training Dataset', classification=True)
+@dataset_metrics('Clean Training Dataset', classification=True)
 def clean(
     train_test_path = '../../../../data/raw/train_test',
-    clean_path = '../../../../data/clean'
+    clean_path = '../../../../data/clean',
+    outlier_threshold = 1010.875,
+    use_cache = False,
+    chunksize = None,
+    compact_schema = False,
+    n_shards = None,
+    n_jobs = None
 ) -> None:
     """
     Function to clean the creditcard training dataset.
@@ -17,22 +59,57 @@ def clean(
         Folder path for training dataset.
     :param clean_path:
         Folder path for clean training data.
+    :param outlier_threshold:
+        Non-fraud transactions with an Amount above this are removed as extreme outliers.
+    :param use_cache:
+        If the columnar binary cache should be used for the train and clean train CSV files.
+    :param chunksize:
+        If specified, the training dataset is streamed and cleaned in chunks of this many rows with bounded memory,
+        And nothing is returned. The columnar binary cache is not used in this mode.
+    :param compact_schema:
+        If the CSV files should be imported with the compact dataset schema: float32 features and an int8 target.
+    :param n_shards:
+        If specified, the training dataset is cleaned in this many Time window shards by worker processes,
+        Writing the same file, and nothing is returned. Takes precedence over chunksize,
+        And the columnar binary cache is not used in this mode.
+    :param n_jobs:
+        The number of worker processes when n_shards is specified. Default: one per shard.
     """
     # DataFrameMan
     dataframe_man = DataFrameManipulator()
+    schema = get_schema(compact_schema)
+    os.makedirs(clean_path, exist_ok=True)
+
+    # Clean and export shard by shard in worker processes
+    if n_shards:
+        print("Removing extreme outliers shard by shard.\n")
+        sharded = ShardedCSV(
+            csv_file_path=str(os.path.join(train_test_path, 'train.csv')), n_shards=n_shards, n_jobs=n_jobs, schema=schema
+        )
+        sharded.filter_to_csv(
+            csv_file_path=str(os.path.join(clean_path, 'clean_train.csv')),
+            row_filter=functools.partial(remove_extreme_outliers, outlier_threshold=outlier_threshold)
+        )
+        return None
+
+    # Stream, clean and export chunk by chunk
+    if chunksize:
+        print("Removing extreme outliers chunk by chunk.\n")
+        chunks = dataframe_man.csv_to_df_chunks(csv_file_name='train.csv', import_dir=train_test_path, chunksize=chunksize, schema=schema)
+        dataframe_man.chunks_to_csv(chunks=clean_chunks(chunks, outlier_threshold=outlier_threshold), csv_file_path=str(os.path.join(clean_path, 'clean_train.csv')))
+        return None
 
     # Importing training data CSV as DataFrame
-    df = dataframe_man.csv_to_df(csv_file_name='train.csv', import_dir=train_test_path)
+    df = dataframe_man.csv_to_df(csv_file_name='train.csv', import_dir=train_test_path, use_cache=use_cache, schema=schema)
 
     # Remove extreme outliers from non-fraud transactions
     print("Removing extreme outliers.")
-    df = df.loc[((df['Class'] == 0) & (df['Amount'] <= 1010.875)) | df['Class'] == 1]
+    df = remove_extreme_outliers(df, outlier_threshold=outlier_threshold)
     print("Done.")
     print("\n")
 
     # Export cleaned data as CSV
-    os.makedirs(clean_path, exist_ok=True)
-    df.to_csv(str(os.path.join(clean_path, 'clean_train.csv')), index=False)
+    dataframe_man.df_to_csv(df=df, csv_file_path=str(os.path.join(clean_path, 'clean_train.csv')), use_cache=use_cache)
 
     return df
 
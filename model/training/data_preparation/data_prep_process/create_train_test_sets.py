@@ -4,23 +4,50 @@ from model.training.data_preparation.data_prep_utils.train_test_csv_creator impo
 
 @timing_decorator
 def create(
-    raw_path = '../../../../data/raw'
+    raw_path = '../../../../data/raw',
+    test_size = 0.2,
+    random_state = 42,
+    use_cache = False,
+    chunksize = None,
+    compact_schema = False,
+    n_shards = None,
+    n_jobs = None
 ) -> None:
     """
     Function to create the train and test CSV files from the raw creditcard.csv file.
     
     :param raw_path:
         Raw data folder path.
+    :param test_size:
+        The portion of the raw data that will be the test data.
+    :param random_state:
+        Random state of the split, for repeatability.
+    :param use_cache:
+        If the columnar binary cache should be used for the raw, train and test CSV files.
+    :param chunksize:
+        If specified, the split is done out of core in a single pass over chunks of this many rows.
+    :param compact_schema:
+        If the CSV files should be imported with the compact dataset schema: float32 features and an int8 target.
+    :param n_shards:
+        If specified, the raw file is parsed and the sets are written in this many Time window shards by worker processes.
+        The split and files are the same. Takes precedence over chunksize, and the columnar binary cache is not used.
+    :param n_jobs:
+        The number of worker processes when n_shards is specified. Default: one per shard.
     """
     # Create train and test sets
     train_test_csv_creator(
         csv_file_name='creditcard.csv',
-        test_size=0.2,
+        test_size=test_size,
         import_dir=raw_path,
         stratify_by='Class',
         sort_by='Time',
         reset_index=True,
-        random_state=42
+        random_state=random_state,
+        use_cache=use_cache,
+        chunksize=chunksize,
+        compact_schema=compact_schema,
+        n_shards=n_shards,
+        n_jobs=n_jobs
     )
 
 
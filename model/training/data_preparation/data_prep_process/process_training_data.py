@@ -1,32 +1,336 @@
 import os
+import shutil
+import tempfile
+import functools
 import pandas
 from src.utils import timing_decorator
+from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from model.training.data_preparation.data_prep_utils.dataset_metrics import metrics_enabled, record_dataset, record_dataframe, class_counts
+from model.training.data_preparation.data_prep_utils.streaming_robust_scaler import StreamingRobustScaler
+from model.training.data_preparation.data_prep_utils.sharded_prep import ShardedCSV, robust_scale_transform, csv_round_trip
 from model.training.data_preparation.data_prep_utils.csv_robust_scaler import csv_robust_scaler
 from model.training.data_preparation.data_prep_utils.csv_random_undersampler import csv_random_undersampler
 from model.training.data_preparation.data_prep_utils.csv_tomek_links_undersampler import csv_tomek_links_undersampler
 
 
+def process_in_memory(
+    clean_path = '../../../../data/clean',
+    processed_path = '../../../../data/processed',
+    scale_columns = ['Time', 'Amount'],
+    random_state = 42,
+    tomek_links_engine = 'imblearn',
+    export_intermediate = False,
+    use_cache = False,
+    compact_schema = False
+) -> pandas.DataFrame:
+    """
+    Function to process the training data for modelling as one chain of DataFrames,
+    Without writing and re-reading a CSV file between the steps.
+    The sorting and undersampling steps select row positions of the scaled data,
+    So the processed rows are only copied once, at the end.
+
+    :param clean_path:
+        Folder path for clean training data.
+    :param processed_path:
+        Folder path for processed data: the scaler JSON file, and the intermediate CSV files if export_intermediate=True.
+    :param scale_columns:
+        List of column names to scale.
+    :param random_state:
+        Random state of the random undersampling, for repeatability.
+    :param tomek_links_engine:
+        'imblearn' for imblearn's TomekLinks, or 'fast' for the fast Tomek links finder.
+    :param export_intermediate:
+        If the scaled, random undersampled and TomekLinks undersampled data should also be exported as CSV files.
+    :param use_cache:
+        If the columnar binary cache should be used for the CSV files read and written.
+    :param compact_schema:
+        If the CSV files should be imported with the compact dataset schema: float32 features and an int8 target.
+
+    :returns:
+        The processed DataFrame.
+    """
+    # DataFrameMan
+    dataframe_man = DataFrameManipulator()
+
+    # Clean training data
+    df = dataframe_man.csv_to_df(
+        csv_file_name='clean_train.csv',
+        import_dir=clean_path,
+        use_cache=use_cache,
+        schema=get_schema(compact_schema)
+    )
+
+    # Scale the data using Robust Scaler, in place as the clean data is not used again.
+    os.makedirs(processed_path, exist_ok=True)
+    scaled_df = dataframe_man.robust_scale_df(
+        df=df,
+        scale_columns=scale_columns,
+        inplace=True,
+        scaler_json=str(os.path.join(processed_path, 'scaler.json'))
+    )
+
+    # Undersample the data using Random Undersampling, as row positions of the scaled data sorted by Time.
+    scaled_rows = dataframe_man.sort_indices(df=scaled_df, sort_by='Time')
+    rus_rows = dataframe_man.random_undersample_indices(
+        df=scaled_df,
+        target_variable='Class',
+        random_state=random_state,
+        rows=scaled_rows
+    )
+    rus_rows = dataframe_man.sort_indices(df=scaled_df, sort_by='Time', rows=rus_rows)
+
+    # Undersample the data using TomekLinks.
+    tl_rows = dataframe_man.tomek_links_indices(
+        df=scaled_df,
+        target_variable='Class',
+        rows=rus_rows,
+        engine=tomek_links_engine
+    )
+    tl_rows = dataframe_man.sort_indices(df=scaled_df, sort_by='Time', rows=tl_rows)
+
+    # Select the processed rows
+    tl_df = dataframe_man.select_rows(df=scaled_df, rows=tl_rows, target_variable='Class', reset_index=True)
+
+    # Metrics of the undersampled rows, from their labels
+    if metrics_enabled():
+        labels = scaled_df['Class'].to_numpy()
+        for name, rows in [('Random Undersampled DataFrame', rus_rows), ('TomekLinks Undesampled DataFrame', tl_rows)]:
+            record_dataset(name=name, rows=len(rows), columns=scaled_df.shape[1], class_column='Class',
+                           counts=class_counts(labels[rows]), function='process_in_memory')
+
+    # Export intermediate data if requested
+    if export_intermediate:
+        for rows, target_variable, folder, csv_file_name in [
+            (scaled_rows, None, 'robust_scaled', 'scaled.csv'),
+            (rus_rows, 'Class', 'rus', 'random_undersampled.csv'),
+            (tl_rows, 'Class', 'tl', 'tomeklinks_undersampled.csv')
+        ]:
+            os.makedirs(os.path.join(processed_path, folder), exist_ok=True)
+            dataframe_man.df_to_csv(
+                df=dataframe_man.select_rows(df=scaled_df, rows=rows, target_variable=target_variable),
+                csv_file_path=str(os.path.join(processed_path, folder, csv_file_name)),
+                use_cache=use_cache
+            )
+
+    return tl_df
+
+
+def process_sharded(
+    clean_path = '../../../../data/clean',
+    processed_path = '../../../../data/processed',
+    scale_columns = ['Time', 'Amount'],
+    random_state = 42,
+    tomek_links_engine = 'imblearn',
+    export_intermediate = False,
+    csv_round_trip_steps = False,
+    compact_schema = False,
+    n_shards = 4,
+    n_jobs = None
+) -> pandas.DataFrame:
+    """
+    Function to process the training data for modelling with the clean data parsed as Time window shards
+    By worker processes, giving the same processed data as process_in_memory.
+    The workers return the scale, sort and target columns of every row and spill the rows to disk.
+    The scaler is fitted on the scale columns of all shards, so its median and quartiles are global and exact,
+    And the sort and random undersampling, which need every row, select row positions from the key columns.
+    Only the random undersampled rows are gathered from the spilled shards for the TomekLinks neighbour search,
+    Which needs all of them at once and is small enough for one process.
+
+    :param clean_path:
+        Folder path for clean training data.
+    :param processed_path:
+        Folder path for processed data, and the spilled shards while processing.
+    :param scale_columns:
+        List of column names to scale.
+    :param random_state:
+        Random state of the random undersampling, for repeatability.
+    :param tomek_links_engine:
+        'imblearn' for imblearn's TomekLinks, or 'fast' for the fast Tomek links finder.
+    :param export_intermediate:
+        If the scaled, random undersampled and TomekLinks undersampled data should also be exported as CSV files.
+        The scaled CSV file is written in parallel parts by the workers.
+    :param csv_round_trip_steps:
+        If the undersampling steps should read the values written to the intermediate CSV files,
+        So the processed data is the same as process with in_memory=False instead of process_in_memory.
+    :param compact_schema:
+        If the CSV files should be imported with the compact dataset schema: float32 features and an int8 target.
+    :param n_shards:
+        The number of shards. Default: 4.
+    :param n_jobs:
+        The number of worker processes. Default: None, one per shard.
+
+    :returns:
+        The processed DataFrame.
+    """
+    # DataFrameMan
+    dataframe_man = DataFrameManipulator()
+    schema = get_schema(compact_schema)
+    dtype = schema.csv_dtype() if schema else None
+
+    sharded = ShardedCSV(
+        csv_file_path=str(os.path.join(clean_path, 'clean_train.csv')), n_shards=n_shards, n_jobs=n_jobs, schema=schema
+    )
+    os.makedirs(processed_path, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix='.shards_', dir=processed_path) as spill_dir:
+        # Parse the shards, keeping the scale, sort and target columns of every row
+        print(f"Importing CSV file in {len(sharded.ranges)} shards...")
+        key_df = sharded.spill(spill_dir=spill_dir, key_columns=scale_columns + ['Time', 'Class'])
+        print("Done.\n")
+
+        # Fit the Robust Scaler on the scale columns of all shards, and scale the key columns
+        from sklearn.preprocessing import RobustScaler
+        scaler = RobustScaler().fit(key_df[scale_columns])
+        StreamingRobustScaler.from_robust_scaler(scaler=scaler, scale_columns=scale_columns).save(
+            str(os.path.join(processed_path, 'scaler.json'))
+        )
+        key_df = robust_scale_transform(df=key_df, scaler=scaler, scale_columns=scale_columns)
+        scale = functools.partial(robust_scale_transform, scaler=scaler, scale_columns=scale_columns)
+
+        # Undersample the data using Random Undersampling, as row positions of the scaled data sorted by Time.
+        scaled_rows = dataframe_man.sort_indices(df=key_df, sort_by='Time')
+        rus_rows = dataframe_man.random_undersample_indices(
+            df=key_df,
+            target_variable='Class',
+            random_state=random_state,
+            rows=scaled_rows
+        )
+
+        # Gather and scale the random undersampled rows, sorted by Time
+        rus_df = scale(sharded.gather(rows=rus_rows))
+        if csv_round_trip_steps:
+            rus_df = csv_round_trip(df=rus_df, dtype=dtype)
+        rus_order = dataframe_man.sort_indices(df=rus_df, sort_by='Time')
+        rus_df = dataframe_man.select_rows(df=rus_df, rows=rus_order, target_variable='Class', reset_index=True)
+
+        # Undersample the data using TomekLinks.
+        tl_input_df = csv_round_trip(df=rus_df, dtype=dtype) if csv_round_trip_steps else rus_df
+        tl_rows = dataframe_man.tomek_links_indices(df=tl_input_df, target_variable='Class', engine=tomek_links_engine)
+        tl_rows = dataframe_man.sort_indices(df=tl_input_df, sort_by='Time', rows=tl_rows)
+        tl_df = dataframe_man.select_rows(df=tl_input_df, rows=tl_rows, target_variable='Class', reset_index=True)
+
+        # Metrics of every step, the scaled rows from the key columns
+        if metrics_enabled():
+            record_dataset(name='Scaled DataFrame', rows=len(key_df), columns=len(sharded.columns), class_column='Class',
+                           counts=class_counts(key_df['Class']), function='process_sharded', shards=len(sharded.ranges))
+            for name, df in [('Random Undersampled DataFrame', rus_df), ('TomekLinks Undesampled DataFrame', tl_df)]:
+                record_dataframe(df=df, name=name, classification=True, function='process_sharded')
+
+        # Export intermediate data if requested
+        if export_intermediate:
+            print("Exporting intermediate data as CSV files...")
+            for folder in ('robust_scaled', 'rus', 'tl'):
+                os.makedirs(os.path.join(processed_path, folder), exist_ok=True)
+            sharded.rows_to_csv(
+                rows=scaled_rows,
+                csv_file_path=str(os.path.join(processed_path, 'robust_scaled', 'scaled.csv')),
+                transform=scale
+            )
+            dataframe_man.df_to_csv(df=rus_df, csv_file_path=str(os.path.join(processed_path, 'rus', 'random_undersampled.csv')))
+            dataframe_man.df_to_csv(df=tl_df, csv_file_path=str(os.path.join(processed_path, 'tl', 'tomeklinks_undersampled.csv')))
+            print("Done.\n")
+
+    # Processed data, as read from the TomekLinks undersampled CSV file
+    if csv_round_trip_steps:
+        tl_df = csv_round_trip(df=tl_df, dtype=dtype)
+
+    return tl_df
+
+
 @timing_decorator
 def process(
     clean_path = '../../../../data/clean',
-    processed_path = '../../../../data/processed'
+    processed_path = '../../../../data/processed',
+    scale_columns = ['Time', 'Amount'],
+    random_state = 42,
+    tomek_links_engine = 'imblearn',
+    use_cache = False,
+    in_memory = False,
+    export_intermediate = False,
+    compact_schema = False,
+    n_shards = None,
+    n_jobs = None
 ) -> None:
     """
     Function the process the training data for modelling.
+    The centre and scale of the Robust Scaler are saved as 'scaler.json' in processed_path, for scoring.
 
     :param clean_path:
         Folder path for clean training data.
     :param processed_path:
         Folder path for processed data.
+    :param scale_columns:
+        List of column names to scale.
+    :param random_state:
+        Random state of the random undersampling, for repeatability.
+    :param tomek_links_engine:
+        'imblearn' for imblearn's TomekLinks, or 'fast' for the fast Tomek links finder.
+    :param use_cache:
+        If the columnar binary cache should be used for the CSV files read and written by each step.
+    :param in_memory:
+        If the scaling and undersampling steps should be chained in memory instead of through CSV files.
+    :param export_intermediate:
+        If the intermediate CSV files should be exported when in_memory=True. Default: False.
+        They are always exported when in_memory=False.
+    :param compact_schema:
+        If the CSV files should be imported with the compact dataset schema: float32 features and an int8 target.
+    :param n_shards:
+        If specified, the clean data is parsed and scaled in this many Time window shards by worker processes,
+        See process_sharded. The processed data is the same as without shards, for in_memory either way.
+        The columnar binary cache is not used in this mode.
+    :param n_jobs:
+        The number of worker processes when n_shards is specified. Default: one per shard.
     """
+    dataframe_man = DataFrameManipulator()
+    os.makedirs(processed_path, exist_ok=True)
+
+    # Process in shards
+    if n_shards:
+        df = process_sharded(
+            clean_path=clean_path,
+            processed_path=processed_path,
+            scale_columns=scale_columns,
+            random_state=random_state,
+            tomek_links_engine=tomek_links_engine,
+            export_intermediate=export_intermediate or not in_memory,
+            csv_round_trip_steps=not in_memory,
+            compact_schema=compact_schema,
+            n_shards=n_shards,
+            n_jobs=n_jobs
+        )
+        dataframe_man.df_to_csv(df=df, csv_file_path=str(os.path.join(processed_path, 'processed_train.csv')))
+        return
+
+    # Process in memory
+    if in_memory:
+        df = process_in_memory(
+            clean_path=clean_path,
+            processed_path=processed_path,
+            scale_columns=scale_columns,
+            random_state=random_state,
+            tomek_links_engine=tomek_links_engine,
+            export_intermediate=export_intermediate,
+            use_cache=use_cache,
+            compact_schema=compact_schema
+        )
+        dataframe_man.df_to_csv(df=df, csv_file_path=str(os.path.join(processed_path, 'processed_train.csv')), use_cache=use_cache)
+        return
+
     # Scale the data using Robust Scaler.
     csv_robust_scaler(
         csv_file_name='clean_train.csv',
-        scale_columns=['Time', 'Amount'],
+        scale_columns=scale_columns,
         import_dir=clean_path,
         export_dir=processed_path,
         sort_by='Time',
-        reset_index=True
+        reset_index=True,
+        use_cache=use_cache,
+        compact_schema=compact_schema
+    )
+
+    # The fitted scaler, for scoring
+    shutil.copyfile(
+        str(os.path.join(processed_path, 'robust_scaled', 'scaler.json')), str(os.path.join(processed_path, 'scaler.json'))
     )
 
     # Undersample the data using Random Undersampling.
@@ -37,7 +341,9 @@ def process(
         export_dir=processed_path,
         sort_by='Time',
         reset_index=True,
-        random_state=42
+        random_state=random_state,
+        use_cache=use_cache,
+        compact_schema=compact_schema
     )
 
     # Undersample the data using TomekLinks.
@@ -47,13 +353,21 @@ def process(
         import_dir=str(os.path.join(processed_path, 'rus')),
         export_dir=processed_path,
         sort_by='Time',
-        reset_index=True
+        reset_index=True,
+        use_cache=use_cache,
+        engine=tomek_links_engine,
+        compact_schema=compact_schema
     )
 
     # Processed data
-    df = pandas.read_csv(str(os.path.join(processed_path, 'tl/tomeklinks_undersampled.csv')))
+    df = dataframe_man.csv_to_df(
+        csv_file_name='tomeklinks_undersampled.csv',
+        import_dir=str(os.path.join(processed_path, 'tl')),
+        use_cache=use_cache,
+        schema=get_schema(compact_schema)
+    )
     # Insert code to read if needed.
-    df.to_csv(str(os.path.join(processed_path, 'processed_train.csv')), index=False)
+    dataframe_man.df_to_csv(df=df, csv_file_path=str(os.path.join(processed_path, 'processed_train.csv')), use_cache=use_cache)
 
 
 if __name__ == '__main__':
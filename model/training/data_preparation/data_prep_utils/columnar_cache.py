@@ -0,0 +1,122 @@
+import os
+import json
+import numpy
+import pandas
+
+
+CACHE_DIR_NAME = '.columnar_cache'
+SCHEMA_FILE_NAME = 'schema.json'
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_dir_for(csv_file_path: str) -> str:
+    """
+    Get the folder path of the columnar cache belonging to a csv file.
+    The cache lives next to the csv file in a hidden '.columnar_cache' folder.
+
+    :param csv_file_path:
+        Path of the source csv file.
+
+    :returns:
+        Folder path of the cache for that csv file.
+    """
+    csv_dir, csv_file_name = os.path.split(os.path.abspath(csv_file_path))
+    return str(os.path.join(csv_dir, CACHE_DIR_NAME, csv_file_name))
+
+
+def source_signature(csv_file_path: str) -> dict:
+    """
+    Get the size and modification time of a csv file.
+    The cache is only valid while these match the values recorded in its schema.
+
+    :param csv_file_path:
+        Path of the source csv file.
+
+    :returns:
+        Dictionary with the file size in bytes and modification time in nanoseconds.
+    """
+    stat = os.stat(csv_file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_columnar_cache(csv_file_path: str) -> pandas.DataFrame:
+    """
+    Load the cached columns of a csv file as a pandas DataFrame.
+    Each column is stored as a raw '.npy' file and described by a 'schema.json' sidecar.
+
+    :param csv_file_path:
+        Path of the source csv file.
+
+    :returns:
+        DataFrame with the same columns and dtypes as the csv file, or None if there is no valid cache.
+    """
+    cache_dir = cache_dir_for(csv_file_path)
+    schema_file = os.path.join(cache_dir, SCHEMA_FILE_NAME)
+    if not os.path.exists(schema_file) or not os.path.exists(csv_file_path):
+        return None
+
+    # Check the cache is for the current version of the csv file
+    with open(schema_file, 'r') as f:
+        schema = json.load(f)
+    if schema.get('version') != CACHE_FORMAT_VERSION or schema.get('source') != source_signature(csv_file_path):
+        return None
+
+    # Load columns
+    columns = {}
+    for column in schema['columns']:
+        column_file = os.path.join(cache_dir, column['file'])
+        if not os.path.exists(column_file):
+            return None
+        columns[column['name']] = numpy.load(column_file, allow_pickle=False)
+
+    return pandas.DataFrame(columns, copy=False)
+
+
+def write_columnar_cache(df: pandas.DataFrame, csv_file_path: str) -> bool:
+    """
+    Write the columns of a DataFrame as the columnar cache of a csv file.
+    Should be called straight after the DataFrame has been written to (or read from) the csv file,
+    so the recorded size and modification time are those of the matching csv file.
+
+    :param df:
+        DataFrame holding the contents of the csv file.
+    :param csv_file_path:
+        Path of the source csv file.
+
+    :returns:
+        True if the cache was written, False if the DataFrame has columns that cannot be cached.
+    """
+    # Only numeric and boolean columns are stored as raw arrays
+    for dtype in df.dtypes:
+        if not (pandas.api.types.is_numeric_dtype(dtype) or pandas.api.types.is_bool_dtype(dtype)):
+            return False
+        if isinstance(dtype, pandas.api.extensions.ExtensionDtype):
+            return False
+
+    cache_dir = cache_dir_for(csv_file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Remove the old schema first so a partly written cache is never seen as valid
+    schema_file = os.path.join(cache_dir, SCHEMA_FILE_NAME)
+    if os.path.exists(schema_file):
+        os.remove(schema_file)
+
+    # Write each column
+    columns = []
+    for i, column_name in enumerate(df.columns):
+        column_file = f'col_{i}.npy'
+        values = numpy.ascontiguousarray(df[column_name].to_numpy())
+        numpy.save(os.path.join(cache_dir, column_file), values, allow_pickle=False)
+        columns.append({'name': column_name, 'dtype': str(values.dtype), 'file': column_file})
+
+    # Write schema sidecar last
+    schema = {
+        'version': CACHE_FORMAT_VERSION,
+        'source': source_signature(csv_file_path),
+        'rows': len(df),
+        'columns': columns
+    }
+    with open(schema_file, 'w') as f:
+        json.dump(schema, f, indent=2)
+
+    return True
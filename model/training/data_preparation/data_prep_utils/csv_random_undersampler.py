@@ -1,5 +1,7 @@
 import argparse
 from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from src.tracing import traced
 
 
 def csv_random_undersampler(
@@ -11,7 +13,9 @@ def csv_random_undersampler(
     sort_ascend: bool=True,
     reset_index: bool=False,
     reset_index_drop: bool=True,
-    random_state: int=None
+    random_state: int=None,
+    use_cache: bool=False,
+    compact_schema: bool=False
 ) -> None:
     """
     Import a csv file as a Pandas DataFrame,
@@ -36,6 +40,12 @@ def csv_random_undersampler(
         If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
     :param random_state:
         Specify for repeatablity. Default: None.
+    :param use_cache:
+        If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+        Default: False.
+    :param compact_schema:
+        If the csv file should be imported with the compact dataset schema: float32 features and an int8 target.
+        Default: False.
     """
     # DataFrameMan
     dataframe_man = DataFrameManipulator()
@@ -50,7 +60,9 @@ def csv_random_undersampler(
         sort_ascend=sort_ascend,
         reset_index=reset_index,
         reset_index_drop=reset_index_drop,
-        random_state=random_state
+        random_state=random_state,
+        use_cache=use_cache,
+        schema=get_schema(compact_schema)
     )
 
 
@@ -101,6 +113,14 @@ def get_args() -> argparse.ArgumentParser:
         '--random_state', type=int, required=False, default=None,
         help='Specify for repeatablity. Default: None.'
         )
+    parser.add_argument(
+        '--use_cache', action='store_true',
+        help='Use the columnar binary cache to import the csv file and write it for the exported csv file(s).'
+        )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import the csv file with the compact dataset schema: float32 features and an int8 target.'
+        )
 
     # Parse args
     args = parser.parse_args()
@@ -108,6 +128,7 @@ def get_args() -> argparse.ArgumentParser:
     return args
 
 
+@traced(category='cli')
 def main() -> None:
     """
     Main entry point to create train and test files.
@@ -126,7 +147,9 @@ def main() -> None:
         sort_ascend=args.sort_ascend,
         reset_index=args.reset_index,
         reset_index_drop=args.reset_index_drop,
-        random_state=args.random_state
+        random_state=args.random_state,
+        use_cache=args.use_cache,
+        compact_schema=args.compact_schema
     )
 
 
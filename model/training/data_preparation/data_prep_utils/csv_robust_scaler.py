@@ -1,5 +1,7 @@
 import argparse
 from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from src.tracing import traced
 
 
 def csv_robust_scaler(
@@ -10,7 +12,10 @@ def csv_robust_scaler(
     sort_by: str=None,
     sort_ascend: bool=True,
     reset_index: bool=False,
-    reset_index_drop: bool=True
+    reset_index_drop: bool=True,
+    use_cache: bool=False,
+    chunksize: int=None,
+    compact_schema: bool=False
 ) -> None:
     """
     Import a csv file as a Pandas DataFrame,
@@ -33,6 +38,14 @@ def csv_robust_scaler(
         If the returned data should have their index reset. Default: False.
     :param reset_index_drop:
         If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+    :param use_cache:
+        If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+        Default: False.
+    :param chunksize:
+        If specified, the data is scaled out of core over chunks of this many rows with a streaming robust scaler.
+    :param compact_schema:
+        If the csv file should be imported with the compact dataset schema: float32 features and an int8 target.
+        Default: False.
     """
     # DataFrameMan
     dataframe_man = DataFrameManipulator()
@@ -46,7 +59,10 @@ def csv_robust_scaler(
         sort_by=sort_by,
         sort_ascend=sort_ascend,
         reset_index=reset_index,
-        reset_index_drop=reset_index_drop
+        reset_index_drop=reset_index_drop,
+        use_cache=use_cache,
+        chunksize=chunksize,
+        schema=get_schema(compact_schema)
     )
 
 
@@ -93,6 +109,18 @@ def get_args() -> argparse.ArgumentParser:
         '--reset_index_drop', type=bool, required=False, default=True,
         help='If the new index column from resetting index (if reset_index=True) should be dropped. Default: True'
         )
+    parser.add_argument(
+        '--use_cache', action='store_true',
+        help='Use the columnar binary cache to import the csv file and write it for the exported csv file(s).'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=None,
+        help='If specified, scale out of core over chunks of this many rows with a streaming robust scaler.'
+        )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import the csv file with the compact dataset schema: float32 features and an int8 target.'
+        )
 
     # Parse args
     args = parser.parse_args()
@@ -100,6 +128,7 @@ def get_args() -> argparse.ArgumentParser:
     return args
 
 
+@traced(category='cli')
 def main() -> None:
     """
     Main entry point to create train and test files.
@@ -117,7 +146,10 @@ def main() -> None:
         sort_by=args.sort_by,
         sort_ascend=args.sort_ascend,
         reset_index=args.reset_index,
-        reset_index_drop=args.reset_index_drop
+        reset_index_drop=args.reset_index_drop,
+        use_cache=args.use_cache,
+        chunksize=args.chunksize,
+        compact_schema=args.compact_schema
     )
 
 
@@ -1,5 +1,7 @@
 import argparse
 from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from src.tracing import traced
 
 
 def csv_tomek_links_undersampler(
@@ -10,7 +12,11 @@ def csv_tomek_links_undersampler(
     sort_by: str=None,
     sort_ascend: bool=True,
     reset_index: bool=False,
-    reset_index_drop: bool=True
+    reset_index_drop: bool=True,
+    use_cache: bool=False,
+    engine: str='imblearn',
+    n_jobs: int=None,
+    compact_schema: bool=False
 ) -> None:
     """
     Import a csv file as a Pandas DataFrame,
@@ -33,6 +39,16 @@ def csv_tomek_links_undersampler(
         If the returned data should have their index reset. Default: False.
     :param reset_index_drop:
         If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+    :param use_cache:
+        If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+        Default: False.
+    :param engine:
+        'imblearn' for imblearn's TomekLinks, or 'fast' for the fast Tomek links finder. Default: 'imblearn'.
+    :param n_jobs:
+        The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.
+    :param compact_schema:
+        If the csv file should be imported with the compact dataset schema: float32 features and an int8 target.
+        Default: False.
     """
     # DataFrameMan
     dataframe_man = DataFrameManipulator()
@@ -46,7 +62,11 @@ def csv_tomek_links_undersampler(
         sort_by=sort_by,
         sort_ascend=sort_ascend,
         reset_index=reset_index,
-        reset_index_drop=reset_index_drop
+        reset_index_drop=reset_index_drop,
+        use_cache=use_cache,
+        engine=engine,
+        n_jobs=n_jobs,
+        schema=get_schema(compact_schema)
     )
 
 
@@ -93,6 +113,22 @@ def get_args() -> argparse.ArgumentParser:
         '--reset_index_drop', type=bool, required=False, default=True,
         help='If the new index column from resetting index (if reset_index=True) should be dropped. Default: True'
         )
+    parser.add_argument(
+        '--use_cache', action='store_true',
+        help='Use the columnar binary cache to import the csv file and write it for the exported csv file(s).'
+        )
+    parser.add_argument(
+        '--engine', type=str, required=False, default='imblearn', choices=['imblearn', 'fast'],
+        help='imblearn for imblearn TomekLinks, or fast for the fast Tomek links finder. Default: imblearn.'
+        )
+    parser.add_argument(
+        '--n_jobs', type=int, required=False, default=None,
+        help='The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.'
+        )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import the csv file with the compact dataset schema: float32 features and an int8 target.'
+        )
 
     # Parse args
     args = parser.parse_args()
@@ -100,6 +136,7 @@ def get_args() -> argparse.ArgumentParser:
     return args
 
 
+@traced(category='cli')
 def main() -> None:
     """
     Main entry point to create train and test files.
@@ -117,7 +154,11 @@ def main() -> None:
         sort_by=args.sort_by,
         sort_ascend=args.sort_ascend,
         reset_index=args.reset_index,
-        reset_index_drop=args.reset_index_drop
+        reset_index_drop=args.reset_index_drop,
+        use_cache=args.use_cache,
+        engine=args.engine,
+        n_jobs=args.n_jobs,
+        compact_schema=args.compact_schema
     )
 
 
@@ -1,9 +1,16 @@
 import os
-from model.training.data_preparation.data_prep_utils.data_prep_functions import print_dataframe_info, print_dataframes_info
+import tempfile
+from src.tracing import traced, add_span_attributes
+from model.training.data_preparation.data_prep_utils.dataset_metrics import dataset_metrics, datasets_metrics, metrics_enabled, class_counts, note_class_counts
+from model.training.data_preparation.data_prep_utils.columnar_cache import load_columnar_cache, write_columnar_cache
+from model.training.data_preparation.data_prep_utils.feature_store import open_feature_store
+from model.training.data_preparation.data_prep_utils.streaming_split import StratifiedStreamSplitter, external_sort_csv
+from model.training.data_preparation.data_prep_utils.streaming_robust_scaler import StreamingRobustScaler
+from model.training.data_preparation.data_prep_utils.tomek_links import tomek_links_sample_indices
+from model.training.data_preparation.data_prep_utils.dataset_schema import DatasetSchema, infer_csv_dtype
+from model.training.data_preparation.data_prep_utils.sharded_prep import ShardedCSV
+import numpy
 import pandas
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import RobustScaler
-from imblearn.under_sampling import RandomUnderSampler, TomekLinks
 
 
 class DataFrameManipulator:
@@ -32,11 +39,13 @@ class DataFrameManipulator:
 
         return X, y
 
-    @print_dataframe_info(name='Imported CSV', classification=True)
+    @dataset_metrics(name='Imported CSV', classification=True)
     def csv_to_df(
         self,
         csv_file_name: str,
-        import_dir: str=None
+        import_dir: str=None,
+        use_cache: bool=False,
+        schema: DatasetSchema=None
     ) -> pandas.DataFrame:
         """
         Import a csv file as a pandas DataFrame.
@@ -45,6 +54,13 @@ class DataFrameManipulator:
             The name of the csv file to import.
         :param import_dir:
             The location path of the csv file to import. If not specified, uses current directory.
+        :param use_cache:
+            If the columnar binary cache of the csv file should be used. The cache is loaded if it matches
+            the size and modification time of the csv file, otherwise the csv file is parsed and the cache rebuilt.
+            Default: False.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
 
         :returns:
             Pandas DataFrame from the imported CSV file.
@@ -53,14 +69,218 @@ class DataFrameManipulator:
             csv_file_path = str(os.path.join(import_dir, csv_file_name))
         else:
             csv_file_path = csv_file_name
+
+        # Import from cache
+        if use_cache:
+            df = load_columnar_cache(csv_file_path)
+            if df is not None:
+                print("Imported CSV file as DataFrame from columnar cache.\n")
+                return schema.apply(df, inplace=True) if schema else df
+
         # Import csv
         print("Importing CSV file as DataFrame...")
-        df = pandas.read_csv(csv_file_path)
+        dtype = schema.csv_dtype() if schema else None
+        if use_cache:
+            # Round trip parsing so parsed values match the values cached on export exactly
+            df = pandas.read_csv(csv_file_path, dtype=dtype, float_precision='round_trip')
+        else:
+            df = pandas.read_csv(csv_file_path, dtype=dtype)
         print("Done.\n")
 
+        # Rebuild cache
+        if use_cache:
+            write_columnar_cache(df=df, csv_file_path=csv_file_path)
+
+        add_span_attributes(file=csv_file_path, file_bytes=os.path.getsize(csv_file_path))
+        return df
+
+    @dataset_metrics(name='Imported CSV', classification=True)
+    def csv_to_df_chunks(
+        self,
+        csv_file_name: str,
+        import_dir: str=None,
+        chunksize: int=100000,
+        dtype: dict=None,
+        schema: DatasetSchema=None,
+        target_variable: str='Class'
+    ):
+        """
+        Import a csv file as a generator of pandas DataFrame chunks, so only one chunk is held in memory at a time.
+        Every chunk has the same dtypes. If neither dtype nor schema is given, they are inferred from the first chunk,
+        With integer columns other than target_variable as float64, see infer_csv_dtype.
+
+        :param csv_file_name:
+            The name of the csv file to import.
+        :param import_dir:
+            The location path of the csv file to import. If not specified, uses current directory.
+        :param chunksize:
+            The number of rows in each chunk. Default: 100000.
+        :param dtype:
+            Dictionary of column names to dtypes. If not specified, inferred from the first chunk.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
+        :param target_variable:
+            The target column, which keeps an inferred integer dtype. Default: 'Class'.
+
+        :returns:
+            Generator of pandas DataFrames from the imported CSV file.
+        """
+        if import_dir:
+            csv_file_path = str(os.path.join(import_dir, csv_file_name))
+        else:
+            csv_file_path = csv_file_name
+
+        # Stable dtypes for every chunk
+        if dtype is None and schema:
+            dtype = schema.csv_dtype()
+        elif dtype is None:
+            dtype = infer_csv_dtype(csv_file_path=csv_file_path, nrows=chunksize, target_variable=target_variable)
+
+        # Import csv chunk by chunk
+        print("Importing CSV file as DataFrame chunks...\n")
+        with pandas.read_csv(csv_file_path, chunksize=chunksize, dtype=dtype) as reader:
+            for chunk in reader:
+                yield chunk
+
+    @traced()
+    def chunks_to_csv(
+        self,
+        chunks,
+        csv_file_path: str
+    ) -> None:
+        """
+        Export DataFrame chunks as one csv file without the index, appending one chunk at a time.
+
+        :param chunks:
+            Iterable of pandas DataFrames with the same columns.
+        :param csv_file_path:
+            The path of the csv file to export to.
+        """
+        header = True
+        with open(csv_file_path, 'w', newline='') as f:
+            for chunk in chunks:
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+        add_span_attributes(file=csv_file_path, file_bytes=os.path.getsize(csv_file_path))
+
+    @dataset_metrics(name='Feature Store DataFrame', classification=True)
+    def feature_store_to_df(
+        self,
+        store_dir: str,
+        include_target: bool=True
+    ) -> pandas.DataFrame:
+        """
+        Open a feature store as a pandas DataFrame.
+        The feature columns are a view of the memory mapped feature matrix, so nothing is copied or parsed.
+
+        :param store_dir:
+            The folder path of the feature store.
+        :param include_target:
+            If the label vector should be added as the last column. Default: True.
+
+        :returns:
+            Pandas DataFrame backed by the feature store.
+        """
+        # Open store
+        features, labels, meta = open_feature_store(store_dir=store_dir)
+
+        # Create DataFrame
+        df = pandas.DataFrame(features, columns=meta['feature_columns'], copy=False)
+        if include_target and labels is not None:
+            df.insert(len(df.columns), meta['target_variable'], labels)
+
         return df
 
-    @print_dataframes_info(names=['Training Set', 'Test Set'], classification=True)
+    @traced()
+    def df_to_csv(
+        self,
+        df: pandas.DataFrame,
+        csv_file_path: str,
+        use_cache: bool=False
+    ) -> None:
+        """
+        Export a pandas DataFrame as a csv file without its index.
+
+        :param df:
+            DataFrame to export.
+        :param csv_file_path:
+            The path of the csv file to export to.
+        :param use_cache:
+            If the columnar binary cache of the csv file should also be written,
+            so the next import of the csv file does not need to parse it. Default: False.
+        """
+        df.to_csv(csv_file_path, index=False)
+        if use_cache:
+            write_columnar_cache(df=df, csv_file_path=csv_file_path)
+        add_span_attributes(rows=len(df), file=csv_file_path, file_bytes=os.path.getsize(csv_file_path))
+
+    def is_sorted(
+        self,
+        df: pandas.DataFrame,
+        sort_by: str,
+        sort_ascend: bool=True
+    ) -> bool:
+        """
+        Check if a DataFrame is already ordered by a column, in one pass over the column.
+
+        :param df:
+            DataFrame to check.
+        :param sort_by:
+            The column name to check the order of.
+        :param sort_ascend:
+            If the order to check is ascending. Default: True.
+
+        :returns:
+            True if sorting by the column would not change the order of the rows.
+        """
+        if sort_ascend:
+            return df[sort_by].is_monotonic_increasing
+        return df[sort_by].is_monotonic_decreasing
+
+    def sort_reset_df(
+        self,
+        df: pandas.DataFrame,
+        sort_by: str=None,
+        sort_ascend: bool=True,
+        reset_index: bool=False,
+        reset_index_drop: bool=True,
+        inplace: bool=False
+    ) -> pandas.DataFrame:
+        """
+        Sort and reset the index of a DataFrame if needed.
+        Data already ordered by the sort column is not sorted again, so rows with equal values keep their order.
+
+        :param df:
+            DataFrame to sort.
+        :param sort_by:
+            If the data should be sorted, specify the column name to sort by. Default: None.
+        :param sort_ascend:
+            If the data should be sorted by ascending of the sort column when sort_by=True. Default: True.
+        :param reset_index:
+            If the returned data should have their index reset. Default: False.
+        :param reset_index_drop:
+            If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+        :param inplace:
+            If df should be sorted and re-indexed itself instead of a new DataFrame. Default: False.
+
+        :returns:
+            Sorted DataFrame, df itself if inplace=True.
+        """
+        if not inplace:
+            df = df.copy(deep=False)
+
+        # Sort if not already sorted
+        if sort_by and not self.is_sorted(df=df, sort_by=sort_by, sort_ascend=sort_ascend):
+            df.sort_values(by=sort_by, ascending=sort_ascend, inplace=True)
+
+        # Reset index
+        if reset_index:
+            df.reset_index(drop=reset_index_drop, inplace=True)
+
+        return df
+
+    @datasets_metrics(names=['Training Set', 'Test Set'], classification=True)
     def csv_to_train_test_df(
         self,
         csv_file_name: str,
@@ -71,7 +291,9 @@ class DataFrameManipulator:
         sort_ascend: bool=True,
         reset_index: bool=False,
         reset_index_drop: bool=True,
-        random_state: int=None
+        random_state: int=None,
+        use_cache: bool=False,
+        schema: DatasetSchema=None
     ) -> pandas.DataFrame:
         """
         Given the location of a csv file,
@@ -96,27 +318,36 @@ class DataFrameManipulator:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
         :param random_state:
             Specify for repeatablity. Default: None.
+        :param use_cache:
+            If the columnar binary cache should be used to import the csv file. Default: False.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
 
         :returns:
             A tuple containing train and test DataFrames.
         """
         # CSV to df
-        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir)
+        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir, use_cache=use_cache, schema=schema)
 
-        # Create train and test DataFrames
+        # Create train and test DataFrames. SKLearn is imported when needed, so the CLIs start fast
+        from sklearn.model_selection import train_test_split
         print("Creating train and test set...")
         if stratify_by:
             stratify_by = df[stratify_by]
         train_df, test_df = train_test_split(df, test_size=test_size, random_state=random_state, stratify=stratify_by)
         print("Done.\n")
         
-        # Sort and reset index if needed
-        if sort_by:
-            train_df = train_df.sort_values(by=sort_by, ascending=sort_ascend)
-            test_df = test_df.sort_values(by=sort_by, ascending=sort_ascend)
-        if reset_index:
-            train_df = train_df.reset_index(drop=reset_index_drop)
-            test_df = test_df.reset_index(drop=reset_index_drop)
+        # Sort and reset index if needed, in place as the split DataFrames are new
+        for split_df in (train_df, test_df):
+            self.sort_reset_df(
+                df=split_df,
+                sort_by=sort_by,
+                sort_ascend=sort_ascend,
+                reset_index=reset_index,
+                reset_index_drop=reset_index_drop,
+                inplace=True
+            )
 
         return train_df, test_df
 
@@ -131,7 +362,12 @@ class DataFrameManipulator:
         sort_ascend: bool=True,
         reset_index: bool=False,
         reset_index_drop: bool=True,
-        random_state: int=None
+        random_state: int=None,
+        use_cache: bool=False,
+        chunksize: int=None,
+        schema: DatasetSchema=None,
+        n_shards: int=None,
+        n_jobs: int=None
     ) -> None:
         """
         Import a csv file as a Pandas DataFrame, split it into train and test sets,
@@ -159,7 +395,55 @@ class DataFrameManipulator:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
         :param random_state:
             Specify for repeatablity. Default: None.
+        :param use_cache:
+            If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+            Default: False.
+        :param chunksize:
+            If specified, the split is done out of core in a single pass over chunks of this many rows,
+            Using stream_train_test_csv. The columnar binary cache is not used in this mode. Default: None.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
+        :param n_shards:
+            If specified, the csv file is parsed and the sets are written in this many shards by worker processes,
+            Using sharded_train_test_csv, with the same split and files. Takes precedence over chunksize.
+            The columnar binary cache is not used in this mode. Default: None.
+        :param n_jobs:
+            The number of worker processes when n_shards is specified. Default: None, one per shard.
         """
+        # Sharded split
+        if n_shards:
+            self.sharded_train_test_csv(
+                csv_file_name=csv_file_name,
+                test_size=test_size,
+                import_dir=import_dir,
+                export_dir=export_dir,
+                stratify_by=stratify_by,
+                sort_by=sort_by,
+                sort_ascend=sort_ascend,
+                random_state=random_state,
+                n_shards=n_shards,
+                n_jobs=n_jobs,
+                schema=schema
+            )
+            return
+
+        # Out of core split
+        if chunksize:
+            self.stream_train_test_csv(
+                csv_file_name=csv_file_name,
+                test_size=test_size,
+                import_dir=import_dir,
+                export_dir=export_dir,
+                stratify_by=stratify_by,
+                sort_by=sort_by,
+                sort_ascend=sort_ascend,
+                random_state=random_state,
+                chunksize=chunksize,
+                schema=schema
+            )
+            return
+
         # Import CSV file as DataFrame and split to train and test DataFrames
         train_df, test_df = self.csv_to_train_test_df(
             csv_file_name=csv_file_name,
@@ -170,7 +454,9 @@ class DataFrameManipulator:
             sort_ascend=sort_ascend,
             reset_index = reset_index,
             reset_index_drop=reset_index_drop,
-            random_state=random_state
+            random_state=random_state,
+            use_cache=use_cache,
+            schema=schema
         )
         
         # Paths to export
@@ -182,11 +468,169 @@ class DataFrameManipulator:
         
         # Export as CSVs
         print("Exporting train and test set as CSV files...")
-        train_df.to_csv(train_csv, index=False)
-        test_df.to_csv(test_csv, index=False)
+        self.df_to_csv(df=train_df, csv_file_path=train_csv, use_cache=use_cache)
+        self.df_to_csv(df=test_df, csv_file_path=test_csv, use_cache=use_cache)
+        print("Done.\n")
+
+    @traced()
+    def stream_train_test_csv(
+        self,
+        csv_file_name: str,
+        test_size: float,
+        import_dir: str=None,
+        export_dir: str=None,
+        stratify_by: str=None,
+        sort_by: str=None,
+        sort_ascend: bool=True,
+        random_state: int=None,
+        chunksize: int=100000,
+        schema: DatasetSchema=None
+    ) -> None:
+        """
+        Split a csv file into train and test sets in a single pass over DataFrame chunks,
+        Writing 'train.csv' and 'test.csv' incrementally to a new 'train_test' directory.
+        Rows are assigned with StratifiedStreamSplitter, which keeps the test_size ratio within every stratum
+        and gives the same split for the same random_state. The split differs from SKLearn's train_test_split.
+        If sort_by is specified, both files are then sorted with an external merge sort.
+        The index is never written, so there is no reset_index option.
+
+        :param csv_file_name:
+            The name of the csv file to import.
+        :param test_size:
+            The portion of the original data that will be the test data.
+        :param import_dir:
+            The location path of the csv file to import. If not specified, uses current directory.
+        :param export_dir:
+            The location path of where to export the train and test files to. If not specified, same as import_dir.
+        :param stratify_by:
+            If the data split should be done stratified, specify the column name to stratify by. Default: None.
+        :param sort_by:
+            If the data should be sorted after the split, specify the numeric column name to sort by. Default: None.
+        :param sort_ascend:
+            If the data should be sorted by ascending of the sort column when sort_by=True. Default: True.
+        :param random_state:
+            Specify for repeatablity. Default: None.
+        :param chunksize:
+            The number of rows read, and sorted, at a time. Default: 100000.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
+        """
+        # Paths to export
+        if not export_dir:
+            export_dir = import_dir
+        os.makedirs(os.path.join(export_dir, 'train_test'), exist_ok=True)
+        train_csv = os.path.join(export_dir, 'train_test', 'train.csv')
+        test_csv = os.path.join(export_dir, 'train_test', 'test.csv')
+
+        # Split chunk by chunk
+        print("Creating and exporting train and test set chunk by chunk...")
+        splitter = StratifiedStreamSplitter(test_size=test_size, random_state=random_state)
+        chunks = self.csv_to_df_chunks(csv_file_name=csv_file_name, import_dir=import_dir, chunksize=chunksize, schema=schema)
+        header = True
+        with open(train_csv, 'w', newline='') as train_f, open(test_csv, 'w', newline='') as test_f:
+            for chunk in chunks:
+                if stratify_by:
+                    test_mask = splitter.test_mask(chunk[stratify_by].to_numpy())
+                else:
+                    test_mask = splitter.test_mask(numpy.zeros(len(chunk), dtype=int))
+                chunk[~test_mask].to_csv(train_f, index=False, header=header)
+                chunk[test_mask].to_csv(test_f, index=False, header=header)
+                header = False
         print("Done.\n")
 
-    @print_dataframe_info(name='Scaled DataFrame', classification=True)
+        # Sort if needed
+        if sort_by:
+            print("Sorting train and test set CSV files...")
+            external_sort_csv(csv_file_path=train_csv, sort_by=sort_by, sort_ascend=sort_ascend, chunksize=chunksize)
+            external_sort_csv(csv_file_path=test_csv, sort_by=sort_by, sort_ascend=sort_ascend, chunksize=chunksize)
+            print("Done.\n")
+
+    @traced()
+    def sharded_train_test_csv(
+        self,
+        csv_file_name: str,
+        test_size: float,
+        import_dir: str=None,
+        export_dir: str=None,
+        stratify_by: str=None,
+        sort_by: str=None,
+        sort_ascend: bool=True,
+        random_state: int=None,
+        n_shards: int=4,
+        n_jobs: int=None,
+        schema: DatasetSchema=None
+    ) -> None:
+        """
+        Split a csv file into train and test sets with worker processes, writing 'train.csv' and 'test.csv'
+        To a new 'train_test' directory, the same files as export_train_test_csv.
+        The csv file is parsed as Time window shards by the workers, which spill the rows to disk.
+        The stratified split and the sort need every row, so they run on the stratify and sort columns only,
+        Then the workers gather the rows of each set from the spilled shards and write them in parallel parts.
+
+        :param csv_file_name:
+            The name of the csv file to import.
+        :param test_size:
+            The portion of the original data that will be the test data.
+        :param import_dir:
+            The location path of the csv file to import. If not specified, uses current directory.
+        :param export_dir:
+            The location path of where to export the train and test files to. If not specified, same as import_dir.
+        :param stratify_by:
+            If the data split should be done stratified, specify the column name to stratify by. Default: None.
+        :param sort_by:
+            If the data should be sorted after the split, specify the column name to sort by. Default: None.
+        :param sort_ascend:
+            If the data should be sorted by ascending of the sort column when sort_by=True. Default: True.
+        :param random_state:
+            Specify for repeatablity. Default: None.
+        :param n_shards:
+            The number of shards. Default: 4.
+        :param n_jobs:
+            The number of worker processes. Default: None, one per shard.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
+        """
+        if import_dir:
+            csv_file_path = str(os.path.join(import_dir, csv_file_name))
+        else:
+            csv_file_path = csv_file_name
+
+        # Paths to export
+        if not export_dir:
+            export_dir = import_dir
+        os.makedirs(os.path.join(export_dir, 'train_test'), exist_ok=True)
+        train_csv = os.path.join(export_dir, 'train_test', 'train.csv')
+        test_csv = os.path.join(export_dir, 'train_test', 'test.csv')
+
+        sharded = ShardedCSV(csv_file_path=csv_file_path, n_shards=n_shards, n_jobs=n_jobs, schema=schema)
+        with tempfile.TemporaryDirectory(prefix='.shards_', dir=os.path.join(export_dir, 'train_test')) as spill_dir:
+            # Parse shards
+            print(f"Importing CSV file in {len(sharded.ranges)} shards...")
+            key_df = sharded.spill(spill_dir=spill_dir, key_columns=[column for column in (stratify_by, sort_by) if column])
+            print("Done.\n")
+
+            # Split the row positions, as train_test_split splits the rows
+            print("Creating train and test set...")
+            from sklearn.model_selection import train_test_split
+            train_rows, test_rows = train_test_split(
+                numpy.arange(sharded.offsets[-1]),
+                test_size=test_size,
+                random_state=random_state,
+                stratify=key_df[stratify_by] if stratify_by else None
+            )
+            print("Done.\n")
+
+            # Export as CSVs
+            print("Exporting train and test set as CSV files...")
+            for rows, split_csv in ((train_rows, train_csv), (test_rows, test_csv)):
+                if sort_by:
+                    rows = self.sort_indices(df=key_df, sort_by=sort_by, sort_ascend=sort_ascend, rows=rows)
+                sharded.rows_to_csv(rows=rows, csv_file_path=split_csv)
+            print("Done.\n")
+
+    @dataset_metrics(name='Scaled DataFrame', classification=True)
     def robust_scale_df(
         self,
         df: pandas.DataFrame,
@@ -194,7 +638,9 @@ class DataFrameManipulator:
         sort_by: str=None,
         sort_ascend: bool=True,
         reset_index: bool=False,
-        reset_index_drop: bool=True
+        reset_index_drop: bool=True,
+        inplace: bool=False,
+        scaler_json: str=None
     ) -> pandas.DataFrame:
         """
         Scale the features of a DataFrame using SKLearn's RobustScaler.
@@ -211,24 +657,39 @@ class DataFrameManipulator:
             If the returned data should have their index reset. Default: False.
         :param reset_index_drop:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+        :param inplace:
+            If df should be scaled, sorted and re-indexed itself instead of a copy, so only the scaled columns
+            are allocated. Default: False.
+        :param scaler_json:
+            If specified, the path the centre and scale of the fitted scaler are saved to as a StreamingRobustScaler
+            JSON file, so scoring can reuse them. Default: None.
 
         :returns:
-            Scaled DataFrame.
+            Scaled DataFrame, df itself if inplace=True.
         """
         # RobustScaler
+        from sklearn.preprocessing import RobustScaler
         scaler = RobustScaler()
 
-        # Create copy
-        scaled_df = df.copy()
+        # Create copy if needed
+        scaled_df = df if inplace else df.copy()
 
         # Scale columns of the df
-        scaled_df[scale_columns] = scaler.fit_transform(df[scale_columns])
+        scaled_df[scale_columns] = scaler.fit_transform(scaled_df[scale_columns])
+
+        # Save the scaler if needed
+        if scaler_json:
+            StreamingRobustScaler.from_robust_scaler(scaler=scaler, scale_columns=scale_columns).save(scaler_json)
         
         # Sort and reset index if needed
-        if sort_by:
-            scaled_df = scaled_df.sort_values(by=sort_by, ascending=sort_ascend)
-        if reset_index:
-            scaled_df = scaled_df.reset_index(drop=reset_index_drop)
+        scaled_df = self.sort_reset_df(
+            df=scaled_df,
+            sort_by=sort_by,
+            sort_ascend=sort_ascend,
+            reset_index=reset_index,
+            reset_index_drop=reset_index_drop,
+            inplace=True
+        )
 
         return scaled_df
 
@@ -241,12 +702,16 @@ class DataFrameManipulator:
         sort_by: str=None,
         sort_ascend: bool=True,
         reset_index: bool=False,
-        reset_index_drop: bool=True
+        reset_index_drop: bool=True,
+        use_cache: bool=False,
+        chunksize: int=None,
+        schema: DatasetSchema=None
     ) -> None:
         """
         Import a csv file as a Pandas DataFrame,
         Scale features using SKLearn's RobustScaler,
-        Export the new DataFrame as a csv file in the export directory in 'scaled'.
+        Export the new DataFrame as a csv file in the export directory in 'robust_scaled',
+        With the fitted centre and scale saved next to it as 'scaler.json'.
 
         :param csv_file_name:
             The name of the csv file to import.
@@ -264,32 +729,313 @@ class DataFrameManipulator:
             If the returned data should have their index reset. Default: False.
         :param reset_index_drop:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+        :param use_cache:
+            If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+            Default: False.
+        :param chunksize:
+            If specified, the data is scaled out of core over chunks of this many rows with streaming_robust_scale_csv.
+            The data is not sorted or re-indexed in this mode. Default: None.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
         """
+        # Out of core scaling
+        if chunksize:
+            self.streaming_robust_scale_csv(
+                csv_file_name=csv_file_name,
+                scale_columns=scale_columns,
+                import_dir=import_dir,
+                export_dir=export_dir,
+                chunksize=chunksize
+            )
+            return
+
         # CSV to df
-        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir)
+        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir, use_cache=use_cache, schema=schema)
+
+        # Paths to export
+        if not export_dir:
+            export_dir = import_dir
+        os.makedirs(os.path.join(export_dir, 'robust_scaled'), exist_ok=True)
+        scaled_csv = os.path.join(export_dir, 'robust_scaled', 'scaled.csv')
+        scaler_json = os.path.join(export_dir, 'robust_scaled', 'scaler.json')
 
-        # Scale df
+        # Scale df in place, as it is not used elsewhere
         scaled_df = self.robust_scale_df(
             df=df,
             scale_columns=scale_columns,
             sort_by=sort_by,
             sort_ascend=sort_ascend,
             reset_index=reset_index,
-            reset_index_drop=reset_index_drop
+            reset_index_drop=reset_index_drop,
+            inplace=True,
+            scaler_json=scaler_json
         )
         
+        # Export as CSVs
+        print("Exporting scaled data as CSV files...")
+        self.df_to_csv(df=scaled_df, csv_file_path=scaled_csv, use_cache=use_cache)
+        print("Done.\n")
+
+    @traced()
+    def streaming_robust_scale_csv(
+        self,
+        csv_file_name: str,
+        scale_columns: list,
+        import_dir: str=None,
+        export_dir: str=None,
+        chunksize: int=100000,
+        k: int=2000,
+        random_state: int=None,
+        schema: DatasetSchema=None
+    ) -> StreamingRobustScaler:
+        """
+        Import a csv file as DataFrame chunks,
+        Fit a StreamingRobustScaler over the chunks with quantile sketches,
+        Then scale the chunks in a second pass and export them as a csv file in the export directory in 'robust_scaled'.
+        The fitted centre and scale are saved next to it as 'scaler.json' so they can be reused for scoring.
+
+        :param csv_file_name:
+            The name of the csv file to import.
+        :param scale_columns:
+            List of column names to scale.
+        :param import_dir:
+            The location path of the csv file to import. If not specified, uses current directory.
+        :param export_dir:
+            The location path of where to export the scaled file. If not specified, same as import_dir.
+        :param chunksize:
+            The number of rows in each chunk. Default: 100000.
+        :param k:
+            The size parameter of the quantile sketches. Larger is more accurate. Default: 2000.
+        :param random_state:
+            Specify for repeatablity. Default: None.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
+
+        :returns:
+            The fitted StreamingRobustScaler.
+        """
+        # Fit over chunks
+        print("Fitting streaming robust scaler over CSV chunks...")
+        scaler = StreamingRobustScaler(scale_columns=scale_columns, k=k, random_state=random_state)
+        scaler.fit(self.csv_to_df_chunks(csv_file_name=csv_file_name, import_dir=import_dir, chunksize=chunksize, schema=schema))
+        print("Done.\n")
+
         # Paths to export
         if not export_dir:
             export_dir = import_dir
         os.makedirs(os.path.join(export_dir, 'robust_scaled'), exist_ok=True)
         scaled_csv = os.path.join(export_dir, 'robust_scaled', 'scaled.csv')
-        
-        # Export as CSVs
-        print("Exporting scaled data as CSV files...")
-        scaled_df.to_csv(scaled_csv, index=False)
+        scaler_json = os.path.join(export_dir, 'robust_scaled', 'scaler.json')
+
+        # Scale and export chunk by chunk
+        print("Exporting scaled data as CSV file chunk by chunk...")
+        chunks = self.csv_to_df_chunks(csv_file_name=csv_file_name, import_dir=import_dir, chunksize=chunksize, schema=schema)
+        self.chunks_to_csv(chunks=(scaler.transform(chunk) for chunk in chunks), csv_file_path=scaled_csv)
+        scaler.save(scaler_json)
         print("Done.\n")
 
-    @print_dataframe_info(name='Random Undersampled DataFrame', classification=True)
+        return scaler
+
+    @traced()
+    def sort_indices(
+        self,
+        df: pandas.DataFrame,
+        sort_by: str,
+        sort_ascend: bool=True,
+        rows: numpy.ndarray=None
+    ) -> numpy.ndarray:
+        """
+        Get the row positions that sort a DataFrame, or a selection of its rows, by a column.
+        Only the sort column is read, and the order is the same as sort_reset_df.
+
+        :param df:
+            Base DataFrame.
+        :param sort_by:
+            The column name to sort by.
+        :param sort_ascend:
+            If the rows should be sorted by ascending of the sort column. Default: True.
+        :param rows:
+            Row positions in df of the selection to sort. If not specified, all rows.
+
+        :returns:
+            Array of the row positions in df, in sorted order.
+        """
+        values = df[sort_by].to_numpy()
+        if rows is not None:
+            values = values[rows]
+        values = pandas.Series(values, copy=False)
+
+        # Already sorted
+        if values.is_monotonic_increasing if sort_ascend else values.is_monotonic_decreasing:
+            return numpy.arange(len(values)) if rows is None else rows
+
+        order = values.sort_values(ascending=sort_ascend).index.to_numpy()
+        return order if rows is None else rows[order]
+
+    @traced()
+    def random_undersample_indices(
+        self,
+        df: pandas.DataFrame,
+        target_variable: str,
+        random_state: int=None,
+        rows: numpy.ndarray=None
+    ) -> numpy.ndarray:
+        """
+        Get the row positions kept by imblearn's RandomUnderSampler, without copying the features.
+        RandomUnderSampler only looks at the target, so it is fitted on a placeholder feature column.
+
+        :param df:
+            Base DataFrame.
+        :param target_variable:
+            The target feature for undersampling.
+        :param random_state:
+            Specify for repeatablity. Default: None.
+        :param rows:
+            Row positions in df of the selection to undersample. If not specified, all rows.
+
+        :returns:
+            Array of the kept row positions in df.
+        """
+        y = df[target_variable].to_numpy()
+        if rows is not None:
+            y = y[rows]
+        from imblearn.under_sampling import RandomUnderSampler
+        rus = RandomUnderSampler(random_state=random_state)
+        rus.fit_resample(numpy.zeros((len(y), 1), dtype=numpy.int8), y)
+        if metrics_enabled():
+            note_class_counts(class_counts(y[rus.sample_indices_]))
+        return rus.sample_indices_ if rows is None else rows[rus.sample_indices_]
+
+    @traced()
+    def feature_matrix(
+        self,
+        df: pandas.DataFrame,
+        target_variable: str,
+        rows: numpy.ndarray=None,
+        dtype: str='float64'
+    ) -> numpy.ndarray:
+        """
+        Get the features of a DataFrame, or a selection of its rows, as one array.
+        The array is filled column by column, so the only allocation is the array itself.
+
+        :param df:
+            Base DataFrame.
+        :param target_variable:
+            The target column, left out of the features.
+        :param rows:
+            Row positions in df of the selection. If not specified, all rows.
+        :param dtype:
+            The dtype of the array. Default: 'float64'.
+
+        :returns:
+            Array of shape (number of rows, number of features).
+        """
+        feature_positions = [i for i, column in enumerate(df.columns) if column != target_variable]
+        X = numpy.empty((len(df) if rows is None else len(rows), len(feature_positions)), dtype=dtype)
+        for j, position in enumerate(feature_positions):
+            values = df.iloc[:, position].to_numpy()
+            X[:, j] = values if rows is None else values[rows]
+        return X
+
+    @traced()
+    def tomek_links_indices(
+        self,
+        df: pandas.DataFrame,
+        target_variable: str,
+        rows: numpy.ndarray=None,
+        engine: str='imblearn',
+        n_jobs: int=None
+    ) -> numpy.ndarray:
+        """
+        Get the row positions kept by Tomek links undersampling.
+
+        :param df:
+            Base DataFrame.
+        :param target_variable:
+            The target feature for undersampling.
+        :param rows:
+            Row positions in df of the selection to undersample. If not specified, all rows.
+        :param engine:
+            'imblearn' for imblearn's TomekLinks, or 'fast' for tomek_links_sample_indices. Default: 'imblearn'.
+        :param n_jobs:
+            The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.
+
+        :returns:
+            Array of the kept row positions in df.
+        """
+        if engine not in ('imblearn', 'fast'):
+            raise ValueError(f"engine must be 'imblearn' or 'fast', got {engine}")
+
+        # Feature matrix of the selection, in the dtype of the neighbour search
+        feature_dtypes = [dtype for column, dtype in df.dtypes.items() if column != target_variable]
+        X = self.feature_matrix(
+            df=df,
+            target_variable=target_variable,
+            rows=rows,
+            dtype='float32' if engine == 'fast' else numpy.result_type(numpy.float32, *feature_dtypes)
+        )
+        y = df[target_variable].to_numpy()
+        if rows is not None:
+            y = y[rows]
+
+        # TomekLinks
+        if engine == 'fast':
+            sample_indices = tomek_links_sample_indices(X=X, y=y, n_jobs=n_jobs)
+        else:
+            from imblearn.under_sampling import TomekLinks
+            tl = TomekLinks(n_jobs=n_jobs)
+            tl.fit_resample(X, y)
+            sample_indices = tl.sample_indices_
+        if metrics_enabled():
+            note_class_counts(class_counts(y[sample_indices]))
+
+        return sample_indices if rows is None else rows[sample_indices]
+
+    @traced()
+    def select_rows(
+        self,
+        df: pandas.DataFrame,
+        rows: numpy.ndarray,
+        target_variable: str=None,
+        reset_index: bool=False,
+        reset_index_drop: bool=True
+    ) -> pandas.DataFrame:
+        """
+        Materialise a selection of rows of a DataFrame with a single copy.
+
+        :param df:
+            Base DataFrame.
+        :param rows:
+            Row positions in df to select, in order.
+        :param target_variable:
+            If specified, the target column is moved last, as after splitting and joining features and target.
+            Default: None.
+        :param reset_index:
+            If the returned data should have their index reset. Default: False.
+        :param reset_index_drop:
+            If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+
+        :returns:
+            DataFrame of the selected rows.
+        """
+        columns = list(df.columns)
+        if target_variable:
+            columns.remove(target_variable)
+            columns.append(target_variable)
+        selected_df = df.iloc[rows, [df.columns.get_loc(column) for column in columns]]
+
+        # Reset index without another copy of the data
+        if reset_index:
+            if reset_index_drop:
+                selected_df.index = pandas.RangeIndex(len(selected_df))
+            else:
+                selected_df = selected_df.reset_index(drop=False)
+
+        return selected_df
+
+    @dataset_metrics(name='Random Undersampled DataFrame', classification=True)
     def random_undersample_df(
         self,
         df: pandas.DataFrame,
@@ -321,21 +1067,21 @@ class DataFrameManipulator:
         :returns:
             Random Undersampled DataFrame.
         """
-        # X and y
-        X, y = self.extract_features_target(df=df, target_variable=target_variable)
-
         # Random Undersampling
-        rus = RandomUnderSampler(random_state=random_state)
-        rus_X, rus_y = rus.fit_resample(X, y)
-        
-        # Create DataFrame
-        rus_df = pandas.concat([rus_X, rus_y], axis=1)
-        
-        # Sort and Index if needed
+        rows = self.random_undersample_indices(df=df, target_variable=target_variable, random_state=random_state)
+
+        # Sort if needed
         if sort_by:
-            rus_df = rus_df.sort_values(by=sort_by, ascending=sort_ascend)
-        if reset_index:
-            rus_df = rus_df.reset_index(drop=reset_index_drop)
+            rows = self.sort_indices(df=df, sort_by=sort_by, sort_ascend=sort_ascend, rows=rows)
+
+        # Create DataFrame
+        rus_df = self.select_rows(
+            df=df,
+            rows=rows,
+            target_variable=target_variable,
+            reset_index=reset_index,
+            reset_index_drop=reset_index_drop
+        )
 
         return rus_df
 
@@ -349,7 +1095,9 @@ class DataFrameManipulator:
         sort_ascend: bool=True,
         reset_index: bool=False,
         reset_index_drop: bool=True,
-        random_state: int=None
+        random_state: int=None,
+        use_cache: bool=False,
+        schema: DatasetSchema=None
     ) -> None:
         """
         Import a csv file as a Pandas DataFrame,
@@ -374,9 +1122,15 @@ class DataFrameManipulator:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
         :param random_state:
             Specify for repeatablity. Default: None.
+        :param use_cache:
+            If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+            Default: False.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
         """
         # CSV to df
-        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir)
+        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir, use_cache=use_cache, schema=schema)
 
         # Random undersample df
         rus_df = self.random_undersample_df(
@@ -397,10 +1151,10 @@ class DataFrameManipulator:
         
         # Export as CSV
         print("Exporting random undersampled data as CSV file...")
-        rus_df.to_csv(rus_csv, index=False)
+        self.df_to_csv(df=rus_df, csv_file_path=rus_csv, use_cache=use_cache)
         print("Done.\n")
 
-    @print_dataframe_info(name='TomekLinks Undesampled DataFrame', classification=True)
+    @dataset_metrics(name='TomekLinks Undesampled DataFrame', classification=True)
     def tomek_links_undersample_df(
         self,
         df: pandas.DataFrame,
@@ -408,10 +1162,12 @@ class DataFrameManipulator:
         sort_by: str=None,
         sort_ascend: bool=True,
         reset_index: bool=False,
-        reset_index_drop: bool=True
+        reset_index_drop: bool=True,
+        engine: str='imblearn',
+        n_jobs: int=None
     ) -> pandas.DataFrame:
         """
-        Undersample the data using imblearn's TomekLinks.
+        Undersample the data using imblearn's TomekLinks, or the equivalent fast Tomek links finder.
 
         :param df:
             DataFrame to scale.
@@ -425,25 +1181,30 @@ class DataFrameManipulator:
             If the returned data should have their index reset. Default: False.
         :param reset_index_drop:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+        :param engine:
+            'imblearn' for imblearn's TomekLinks, or 'fast' for tomek_links_sample_indices, which only searches
+            the neighbours of minority-adjacent samples with float32 distances. Default: 'imblearn'.
+        :param n_jobs:
+            The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.
 
         :returns:
             Random Undersampled DataFrame.
         """
-        # X and y
-        X, y = self.extract_features_target(df=df, target_variable=target_variable)
-
         # TomekLinks
-        tl = TomekLinks()
-        tl_X, tl_y = tl.fit_resample(X, y)
-        
-        # Create DataFrame
-        tl_df = pandas.concat([tl_X, tl_y], axis=1)
-        
-        # Sort and Index if needed
+        rows = self.tomek_links_indices(df=df, target_variable=target_variable, engine=engine, n_jobs=n_jobs)
+
+        # Sort if needed
         if sort_by:
-            tl_df = tl_df.sort_values(by=sort_by, ascending=sort_ascend)
-        if reset_index:
-            tl_df = tl_df.reset_index(drop=reset_index_drop)
+            rows = self.sort_indices(df=df, sort_by=sort_by, sort_ascend=sort_ascend, rows=rows)
+
+        # Create DataFrame
+        tl_df = self.select_rows(
+            df=df,
+            rows=rows,
+            target_variable=target_variable,
+            reset_index=reset_index,
+            reset_index_drop=reset_index_drop
+        )
 
         return tl_df
 
@@ -456,7 +1217,11 @@ class DataFrameManipulator:
         sort_by: str=None,
         sort_ascend: bool=True,
         reset_index: bool=False,
-        reset_index_drop: bool=True
+        reset_index_drop: bool=True,
+        use_cache: bool=False,
+        engine: str='imblearn',
+        n_jobs: int=None,
+        schema: DatasetSchema=None
     ) -> None:
         """
         Import a csv file as a Pandas DataFrame,
@@ -479,9 +1244,19 @@ class DataFrameManipulator:
             If the returned data should have their index reset. Default: False.
         :param reset_index_drop:
             If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
+        :param use_cache:
+            If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+            Default: False.
+        :param engine:
+            'imblearn' for imblearn's TomekLinks, or 'fast' for the fast Tomek links finder. Default: 'imblearn'.
+        :param n_jobs:
+            The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
         """
         # CSV to df
-        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir)
+        df = self.csv_to_df(csv_file_name=csv_file_name, import_dir=import_dir, use_cache=use_cache, schema=schema)
 
         # Random undersample df
         tl_df = self.tomek_links_undersample_df(
@@ -490,7 +1265,9 @@ class DataFrameManipulator:
             sort_by=sort_by,
             sort_ascend=sort_ascend,
             reset_index=reset_index,
-            reset_index_drop=reset_index_drop
+            reset_index_drop=reset_index_drop,
+            engine=engine,
+            n_jobs=n_jobs
         )
         
         # Paths to export
@@ -501,6 +1278,6 @@ class DataFrameManipulator:
         
         # Export as CSV
         print("Exporting tomek links undersampled data as CSV file...")
-        tl_df.to_csv(tl_csv, index=False)
+        self.df_to_csv(df=tl_df, csv_file_path=tl_csv, use_cache=use_cache)
         print("Done.\n")
 
@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import time
+import types
+import functools
+import numpy
+import pandas
+from src.tracing import trace_span
+
+
+# Environment variables of the metrics mode and sink, so worker processes record like their parent
+METRICS_MODE_ENV = 'DATASET_METRICS_MODE'
+METRICS_SINK_ENV = 'DATASET_METRICS_SINK'
+METRICS_MODES = ('off', 'print', 'json')
+
+# Current mode and sink. 'print' prints the dataset info as before, 'json' writes one JSON record per line
+# To the sink, a file path or stdout if not specified, and 'off' records nothing
+METRICS_CONFIG = {
+    'mode': os.environ.get(METRICS_MODE_ENV, 'print'),
+    'sink': os.environ.get(METRICS_SINK_ENV) or None
+}
+
+# Class counts noted by the running decorated functions, innermost last
+METRICS_FRAMES = []
+
+
+def configure_metrics(
+    mode: str='print',
+    sink: str=None
+) -> None:
+    """
+    Set how dataset metrics are recorded, in this process and the worker processes it starts.
+
+    :param mode:
+        'print' to print the rows, columns and class counts of every dataset, 'json' to write them as
+        JSON records to the sink, or 'off' to record nothing. Default: 'print'.
+    :param sink:
+        Path of the file JSON records are appended to, one per line. If not specified, stdout. Default: None.
+    """
+    if mode not in METRICS_MODES:
+        raise ValueError(f'mode must be one of {METRICS_MODES}, got {mode}')
+    METRICS_CONFIG['mode'] = mode
+    METRICS_CONFIG['sink'] = sink
+    os.environ[METRICS_MODE_ENV] = mode
+    if sink:
+        os.environ[METRICS_SINK_ENV] = sink
+    else:
+        os.environ.pop(METRICS_SINK_ENV, None)
+
+
+def metrics_enabled() -> bool:
+    """
+    Check if dataset metrics are recorded, so callers can skip computing them.
+
+    :returns:
+        False if the mode is 'off', otherwise True.
+    """
+    return METRICS_CONFIG['mode'] != 'off'
+
+
+def class_counts(values) -> dict:
+    """
+    Count the rows of each value of a target column in one pass.
+    Non-negative integer labels are counted with numpy.bincount, other values with value_counts.
+
+    :param values:
+        Array or Series of target values.
+
+    :returns:
+        Dictionary of value to number of rows, from the most to the least frequent.
+    """
+    values = values.to_numpy() if isinstance(values, pandas.Series) else numpy.asarray(values)
+    if len(values) and (values.dtype.kind in 'iu' or values.dtype.kind == 'b'):
+        low, high = values.min(), values.max()
+        if low >= 0 and high < 1 << 16:
+            counts = numpy.bincount(values.astype(numpy.int64, copy=False) if values.dtype.kind == 'b' else values)
+            present = numpy.flatnonzero(counts)
+            counts = {int(value): int(counts[value]) for value in present}
+            return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+    return {
+        (value.item() if hasattr(value, 'item') else value): int(count)
+        for value, count in pandas.Series(values, copy=False).value_counts().items()
+    }
+
+
+def note_class_counts(counts: dict) -> None:
+    """
+    Hand the class counts of the dataset being made to the innermost decorated function,
+    So it records them instead of counting the target column again. Used by the resamplers,
+    Which know the labels of the rows they keep.
+
+    :param counts:
+        Dictionary of value to number of rows, see class_counts.
+    """
+    if METRICS_FRAMES:
+        METRICS_FRAMES[-1]['class_counts'] = counts
+
+
+def record_dataset(
+    name: str,
+    rows: int,
+    columns: int,
+    class_column: str=None,
+    counts: dict=None,
+    **attributes
+) -> None:
+    """
+    Record the metrics of a dataset in the current mode.
+
+    :param name:
+        Name of the dataset.
+    :param rows:
+        Number of rows.
+    :param columns:
+        Number of columns.
+    :param class_column:
+        Name of the target column, if the dataset is for classification. Default: None.
+    :param counts:
+        Dictionary of target value to number of rows. Default: None.
+    :param attributes:
+        Other values to add to the JSON record, such as the function that made the dataset.
+    """
+    mode = METRICS_CONFIG['mode']
+    if mode == 'off':
+        return
+
+    # Print as before
+    if mode == 'print':
+        print(f'{name} has {rows} rows and {columns} columns')
+        if class_column is not None:
+            print(f'{class_column} has {len(counts or {})} unique values')
+            for value, count in (counts or {}).items():
+                print(f'{value}: {count} rows')
+        print("\n")
+        return
+
+    # JSON record
+    record = {'name': name, 'rows': int(rows), 'columns': int(columns)}
+    if class_column is not None:
+        record['class_column'] = class_column
+        record['class_counts'] = {str(value): int(count) for value, count in (counts or {}).items()}
+    record.update(attributes)
+    record.update({'pid': os.getpid(), 'time': time.time()})
+    line = json.dumps(record, default=str) + '\n'
+    if METRICS_CONFIG['sink']:
+        with open(METRICS_CONFIG['sink'], 'a') as f:
+            f.write(line)
+    else:
+        sys.stdout.write(line)
+
+
+def record_dataframe(
+    df: pandas.DataFrame,
+    name: str,
+    classification: bool=False,
+    counts: dict=None,
+    **attributes
+) -> None:
+    """
+    Record the metrics of a DataFrame, with the last column as the target column.
+
+    :param df:
+        DataFrame to record.
+    :param name:
+        Name of the dataset.
+    :param classification:
+        If the class counts of the target column should be recorded. Default: False.
+    :param counts:
+        Class counts already known, so the target column is not counted again. Default: None.
+    :param attributes:
+        Other values to add to the JSON record.
+    """
+    rows, cols = df.shape
+    class_column = None
+    if classification and cols:
+        class_column = df.columns[-1]
+        if counts is None:
+            counts = class_counts(df[class_column])
+    record_dataset(name=name, rows=rows, columns=cols, class_column=class_column, counts=counts, **attributes)
+
+
+def chunks_metrics(
+    chunks, name: str, classification: bool=False, **attributes
+):
+    """
+    Passes through the DataFrame chunks of a generator,
+    Accumulating the number of rows and the number of rows for each unique value in the target column,
+    And records them once the generator is exhausted.
+
+    :param chunks:
+        Generator of pandas DataFrame chunks.
+    :param str name:
+        Name of the chunked dataframe to record.
+    :param bool classification:
+        If the dataframe is for classification, to count unique values in.
+    :param attributes:
+        Other values to add to the JSON record.
+
+    :returns:
+        Generator yielding the same chunks.
+    """
+    rows, cols = 0, 0
+    class_column = None
+    counts = {}
+    for chunk in chunks:
+        rows += len(chunk)
+        cols = chunk.shape[1]
+        if classification and cols:
+            class_column = chunk.columns[-1]
+            for value, count in class_counts(chunk[class_column]).items():
+                counts[value] = counts.get(value, 0) + count
+        yield chunk
+
+    counts = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+    record_dataset(name=name, rows=rows, columns=cols, class_column=class_column, counts=counts, **attributes)
+
+
+def dataset_metrics(
+    name: str, classification: bool=False
+):
+    """
+    Records the number of rows and columns
+    and the number of rows for each unique value in the target column of the pandas dataframe a function returns.
+    If the decorated function returns a generator of DataFrame chunks, the metrics are accumulated chunk by chunk
+    and recorded once the generator is exhausted. Class counts noted by the function with note_class_counts
+    are used instead of counting the target column. When metrics are off, the function is only called.
+    When tracing, the call is a span with the rows and columns of the dataframe as attributes.
+
+    :param str name:
+        Name of the dataframe to record.
+    :param bool classification:
+        If the dataframe is for classification, to count unique values in.
+
+    :returns:
+        The decorated function.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(func.__qualname__, category='dataset', dataset=name) as span:
+                if METRICS_CONFIG['mode'] == 'off':
+                    df = func(*args, **kwargs)
+                    if hasattr(df, 'shape'):
+                        span.set(rows=df.shape[0], columns=df.shape[1])
+                    return df
+
+                METRICS_FRAMES.append({})
+                try:
+                    df = func(*args, **kwargs)
+                finally:
+                    frame = METRICS_FRAMES.pop()
+                if hasattr(df, 'shape'):
+                    span.set(rows=df.shape[0], columns=df.shape[1])
+            if df is None:
+                return df
+            if isinstance(df, types.GeneratorType):
+                return chunks_metrics(chunks=df, name=name, classification=classification, function=func.__qualname__)
+            record_dataframe(
+                df=df, name=name, classification=classification, counts=frame.get('class_counts'),
+                function=func.__qualname__
+            )
+            return df
+
+        return wrapper
+
+    return decorator
+
+
+def datasets_metrics(
+    names: list, classification: bool=False
+):
+    """
+    Records the number of rows and columns
+    and the number of rows for each unique value in the target column of the two pandas dataframes a function returns.
+
+    :param list names:
+        Names of the dataframes to record.
+    :param bool classification:
+        If the dataframes are for classification, to count unique values in.
+
+    :returns:
+        The decorated function.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(func.__qualname__, category='dataset', datasets=names) as span:
+                dfs = func(*args, **kwargs)
+                span.set(rows=[len(df) for df in dfs])
+            if METRICS_CONFIG['mode'] == 'off':
+                return dfs
+            for name, df in zip(names, dfs):
+                record_dataframe(df=df, name=name, classification=classification, function=func.__qualname__)
+            return dfs
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,128 @@
+from collections import defaultdict
+import numpy
+import pandas
+
+
+class DatasetSchema:
+    """
+    A class declaring the dtypes of a dataset: one dtype for every feature column and one for the target column.
+
+    The CSV reader, the scalers, the resamplers and the model fitting keep these dtypes, so a compact schema,
+    such as COMPACT_SCHEMA, holds every copy of the data in the pipeline in its compact form.
+    """
+    def __init__(
+        self,
+        feature_dtype: str='float64',
+        target_variable: str='Class',
+        target_dtype: str='int64'
+    ):
+        self.feature_dtype = numpy.dtype(feature_dtype)
+        self.target_variable = target_variable
+        self.target_dtype = numpy.dtype(target_dtype)
+
+    def csv_dtype(self) -> defaultdict:
+        """
+        Get the dtype argument of pandas.read_csv for the schema, which does not need the column names.
+
+        :returns:
+            defaultdict of column name to dtype, with the feature dtype as default.
+        """
+        return defaultdict(lambda: self.feature_dtype, {self.target_variable: self.target_dtype})
+
+    def column_dtype(self, column: str) -> numpy.dtype:
+        """
+        Get the dtype of a column.
+
+        :param column:
+            The column name.
+
+        :returns:
+            The target dtype for the target column, otherwise the feature dtype.
+        """
+        return self.target_dtype if column == self.target_variable else self.feature_dtype
+
+    def apply(
+        self,
+        df: pandas.DataFrame,
+        inplace: bool=False
+    ) -> pandas.DataFrame:
+        """
+        Cast the columns of a DataFrame that do not have their schema dtype.
+
+        :param df:
+            DataFrame to cast.
+        :param inplace:
+            If the columns of df should be replaced instead of a new DataFrame. Default: False.
+
+        :returns:
+            DataFrame with the schema dtypes, df itself if inplace=True or no column needs casting.
+        """
+        dtypes = {column: self.column_dtype(column) for column in df.columns if df[column].dtype != self.column_dtype(column)}
+        if not dtypes:
+            return df
+        if not inplace:
+            return df.astype(dtypes)
+        for column, dtype in dtypes.items():
+            df[column] = df[column].astype(dtype)
+        return df
+
+    def to_dict(self) -> dict:
+        """
+        Get the schema as a JSON serialisable dictionary.
+
+        :returns:
+            Dictionary of the schema.
+        """
+        return {
+            'feature_dtype': self.feature_dtype.name,
+            'target_variable': self.target_variable,
+            'target_dtype': self.target_dtype.name
+        }
+
+
+# Columns of the Kaggle creditcard.csv transactions, in order: the time, the PCA components, the amount and the target
+CREDITCARD_COLUMNS = ['Time'] + [f'V{i}' for i in range(1, 29)] + ['Amount', 'Class']
+
+# Schema of the creditcard transactions with single precision features and an 8 bit label,
+# Half the memory of the float64 and int64 dtypes pandas infers
+COMPACT_SCHEMA = DatasetSchema(feature_dtype='float32', target_variable='Class', target_dtype='int8')
+
+
+def infer_csv_dtype(
+    csv_file_path: str,
+    nrows: int=100000,
+    target_variable: str='Class'
+) -> dict:
+    """
+    Infer the dtypes to parse every chunk or shard of a csv file with, from its first rows.
+    Integer columns other than the target are widened to float64: a decimal or missing value after the first rows
+    Would not fit an integer dtype, and parsing the whole file would give float64 for them. Integers are exact in float64.
+
+    :param csv_file_path:
+        Path of the csv file.
+    :param nrows:
+        The number of rows to infer the dtypes from. Default: 100000.
+    :param target_variable:
+        The target column, which keeps an integer dtype. Default: 'Class'.
+
+    :returns:
+        Dictionary of column name to dtype.
+    """
+    dtypes = pandas.read_csv(csv_file_path, nrows=nrows).dtypes.to_dict()
+    return {
+        column: numpy.dtype('float64') if column != target_variable and dtype.kind in 'iu' else dtype
+        for column, dtype in dtypes.items()
+    }
+
+
+def get_schema(compact_schema: bool=False) -> DatasetSchema:
+    """
+    Get the schema for the compact_schema option of the pipeline functions.
+
+    :param compact_schema:
+        If the compact schema should be used. Default: False.
+
+    :returns:
+        COMPACT_SCHEMA if compact_schema, otherwise None, so pandas infers the dtypes.
+    """
+    return COMPACT_SCHEMA if compact_schema else None
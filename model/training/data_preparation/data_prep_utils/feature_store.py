@@ -0,0 +1,194 @@
+import os
+import json
+import numpy
+import pandas
+from model.training.data_preparation.data_prep_utils.columnar_cache import source_signature
+
+
+FEATURES_FILE_NAME = 'features.npy'
+LABELS_FILE_NAME = 'labels.npy'
+META_FILE_NAME = 'meta.json'
+FEATURE_STORE_FORMAT_VERSION = 1
+
+
+def count_csv_rows(csv_file_path: str) -> int:
+    """
+    Count the data rows of a csv file without parsing it, by its lines. Blank lines and newlines in quoted values
+    Are counted too, so this is an upper bound of the rows pandas parses.
+
+    :param csv_file_path:
+        Path of the csv file.
+
+    :returns:
+        Number of rows, not counting the header.
+    """
+    lines = 0
+    last_byte = b'\n'
+    with open(csv_file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            lines += block.count(b'\n')
+            last_byte = block[-1:]
+    # Last line without a trailing newline
+    if last_byte != b'\n':
+        lines += 1
+
+    return lines - 1
+
+
+def truncate_npy(
+    file_path: str,
+    rows: int,
+    chunksize: int=100000
+) -> None:
+    """
+    Keep the first rows of a '.npy' file, copying them chunk by chunk into a new file that replaces it.
+
+    :param file_path:
+        Path of the '.npy' file.
+    :param rows:
+        The number of rows to keep.
+    :param chunksize:
+        The number of rows copied at a time. Default: 100000.
+    """
+    array = numpy.load(file_path, mmap_mode='r')
+    tmp_path = file_path + '.tmp'
+    truncated = numpy.lib.format.open_memmap(tmp_path, mode='w+', dtype=array.dtype, shape=(rows, *array.shape[1:]))
+    for start in range(0, rows, chunksize):
+        end = min(start + chunksize, rows)
+        truncated[start:end] = array[start:end]
+    truncated.flush()
+    del truncated, array
+    os.replace(tmp_path, file_path)
+
+
+def build_feature_store(
+    csv_file_name: str,
+    import_dir: str=None,
+    store_dir: str=None,
+    target_variable: str='Class',
+    dtype: str='float64',
+    chunksize: int=100000,
+    label_dtype: str='int64'
+) -> str:
+    """
+    Build a feature store from a csv file with the creditcard.csv schema.
+    The store is a folder with a contiguous (rows x features) 'features.npy' matrix,
+    A 'labels.npy' target vector and a 'meta.json' file with the column metadata.
+    The csv file is read in chunks, so the whole table is never held in memory.
+
+    :param csv_file_name:
+        The name of the csv file to import.
+    :param import_dir:
+        The location path of the csv file to import. If not specified, uses current directory.
+    :param store_dir:
+        The folder path of the feature store. If not specified, 'feature_store/<csv file name>' in import_dir.
+    :param target_variable:
+        Target column stored as the label vector. If None, no label vector is stored. Default: 'Class'.
+    :param dtype:
+        The dtype of the feature matrix, 'float32' or 'float64'. Default: 'float64'.
+    :param chunksize:
+        The number of csv rows read at a time. Default: 100000.
+    :param label_dtype:
+        The dtype of the label vector, e.g. 'int8' for the compact dataset schema. Default: 'int64'.
+
+    :returns:
+        The folder path of the feature store.
+    """
+    if import_dir:
+        csv_file_path = str(os.path.join(import_dir, csv_file_name))
+    else:
+        csv_file_path = csv_file_name
+    if not store_dir:
+        store_dir = str(os.path.join(import_dir or '', 'feature_store', os.path.splitext(csv_file_name)[0]))
+    os.makedirs(store_dir, exist_ok=True)
+
+    # Columns and rows
+    columns = list(pandas.read_csv(csv_file_path, nrows=0).columns)
+    feature_columns = [column for column in columns if column != target_variable]
+    rows = count_csv_rows(csv_file_path)
+
+    # Remove the old metadata first so a partly written store is never seen as valid
+    meta_file = os.path.join(store_dir, META_FILE_NAME)
+    if os.path.exists(meta_file):
+        os.remove(meta_file)
+
+    # Memory mapped outputs
+    print("Building feature store from CSV file...")
+    features = numpy.lib.format.open_memmap(
+        os.path.join(store_dir, FEATURES_FILE_NAME), mode='w+', dtype=dtype, shape=(rows, len(feature_columns))
+    )
+    labels = None
+    if target_variable:
+        labels = numpy.lib.format.open_memmap(
+            os.path.join(store_dir, LABELS_FILE_NAME), mode='w+', dtype=label_dtype, shape=(rows,)
+        )
+
+    # Fill chunk by chunk
+    start = 0
+    for chunk in pandas.read_csv(csv_file_path, chunksize=chunksize):
+        end = start + len(chunk)
+        if end > rows:
+            raise ValueError(f'{csv_file_path} has more rows than its {rows} lines')
+        features[start:end] = chunk[feature_columns].to_numpy(dtype=dtype)
+        if labels is not None:
+            labels[start:end] = chunk[target_variable].to_numpy(dtype=label_dtype)
+        start = end
+    features.flush()
+    if labels is not None:
+        labels.flush()
+    del features, labels
+
+    # Blank lines and quoted newlines are counted as rows but not parsed, so the arrays are cut to the parsed rows
+    if start < rows:
+        truncate_npy(os.path.join(store_dir, FEATURES_FILE_NAME), rows=start, chunksize=chunksize)
+        if target_variable:
+            truncate_npy(os.path.join(store_dir, LABELS_FILE_NAME), rows=start, chunksize=chunksize)
+        rows = start
+    print("Done.\n")
+
+    # Metadata last
+    meta = {
+        'version': FEATURE_STORE_FORMAT_VERSION,
+        'source': {'csv_file': os.path.abspath(csv_file_path), **source_signature(csv_file_path)},
+        'rows': rows,
+        'feature_columns': feature_columns,
+        'target_variable': target_variable,
+        'dtype': dtype,
+        'label_dtype': label_dtype
+    }
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    return store_dir
+
+
+def open_feature_store(
+    store_dir: str,
+    mode: str='r'
+) -> tuple:
+    """
+    Open a feature store as memory mapped arrays without copying or parsing anything.
+    Processes opening the same store share one page cached copy of it.
+
+    :param store_dir:
+        The folder path of the feature store.
+    :param mode:
+        The memory map mode of the arrays, 'r' for read only or 'c' for copy on write. Default: 'r'.
+
+    :returns:
+        Tuple containing the feature matrix, the label vector (None if the store has no labels) and the metadata.
+    """
+    meta_file = os.path.join(store_dir, META_FILE_NAME)
+    if not os.path.exists(meta_file):
+        raise FileNotFoundError(f'No feature store found in {store_dir}')
+    with open(meta_file, 'r') as f:
+        meta = json.load(f)
+    if meta.get('version') != FEATURE_STORE_FORMAT_VERSION:
+        raise ValueError(f'Unsupported feature store version {meta.get("version")} in {store_dir}')
+
+    features = numpy.load(os.path.join(store_dir, FEATURES_FILE_NAME), mmap_mode=mode)
+    labels = None
+    if meta['target_variable']:
+        labels = numpy.load(os.path.join(store_dir, LABELS_FILE_NAME), mmap_mode=mode)
+
+    return features, labels, meta
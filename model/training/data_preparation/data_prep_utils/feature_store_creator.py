@@ -0,0 +1,115 @@
+import argparse
+from model.training.data_preparation.data_prep_utils.feature_store import build_feature_store
+from src.tracing import traced
+
+
+def feature_store_creator(
+    csv_file_name: str,
+    import_dir: str=None,
+    store_dir: str=None,
+    target_variable: str='Class',
+    dtype: str='float64',
+    chunksize: int=100000,
+    label_dtype: str='int64'
+) -> None:
+    """
+    Build a memory mapped feature store from a csv file,
+    So training and scoring processes can open the data without parsing the csv file.
+
+    :param csv_file_name:
+        The name of the csv file to import.
+    :param import_dir:
+        The location path of the csv file to import. If not specified, uses current directory.
+    :param store_dir:
+        The folder path of the feature store. If not specified, 'feature_store/<csv file name>' in import_dir.
+    :param target_variable:
+        Target column stored as the label vector. Default: 'Class'.
+    :param dtype:
+        The dtype of the feature matrix, 'float32' or 'float64'. Default: 'float64'.
+    :param chunksize:
+        The number of csv rows read at a time. Default: 100000.
+    :param label_dtype:
+        The dtype of the label vector, e.g. 'int8' for the compact dataset schema. Default: 'int64'.
+    """
+    # Build feature store
+    store_dir = build_feature_store(
+        csv_file_name=csv_file_name,
+        import_dir=import_dir,
+        store_dir=store_dir,
+        target_variable=target_variable,
+        dtype=dtype,
+        chunksize=chunksize,
+        label_dtype=label_dtype
+    )
+    print(f'Feature store written to {store_dir}')
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--csv_file_name', type=str, required=True,
+        help='The name of the csv_file.'
+        )
+    parser.add_argument(
+        '--import_dir', type=str, required=False, default=None,
+        help='The path to the folder containing the csv file to import. If not specified, uses current directory.'
+        )
+    parser.add_argument(
+        '--store_dir', type=str, required=False, default=None,
+        help='The path to the feature store folder. If not specified, feature_store/<csv file name> in import_dir.'
+        )
+    parser.add_argument(
+        '--target_variable', type=str, required=False, default='Class',
+        help='Target column stored as the label vector. Default: Class.'
+        )
+    parser.add_argument(
+        '--dtype', type=str, required=False, default='float64', choices=['float32', 'float64'],
+        help='The dtype of the feature matrix. Default: float64.'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=100000,
+        help='The number of csv rows read at a time. Default: 100000.'
+        )
+    parser.add_argument(
+        '--label_dtype', type=str, required=False, default='int64', choices=['int8', 'int64'],
+        help='The dtype of the label vector. Default: int64.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+@traced(category='cli')
+def main() -> None:
+    """
+    Main entry point to build a feature store.
+    This function converts a csv file into a memory mapped feature matrix, label vector and column metadata.
+    """
+    # Get args
+    args = get_args()
+
+    # Build feature store
+    feature_store_creator(
+        csv_file_name=args.csv_file_name,
+        import_dir=args.import_dir,
+        store_dir=args.store_dir,
+        target_variable=args.target_variable,
+        dtype=args.dtype,
+        chunksize=args.chunksize,
+        label_dtype=args.label_dtype
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import math
+import numpy
+
+
+class KLLSketch:
+    """
+    A mergeable quantile sketch (Karnin, Lang and Liberty, 2016) for streaming numeric data.
+
+    Items are kept in levels of compactors, where an item at level h stands for 2**h items of the input.
+    When a level is over its capacity it is sorted and every other item is promoted to the next level.
+    The rank error of a quantile is under 2 / k of the number of items with a probability of about 0.99,
+    And under 3 / k in practice, independently of how many items have been added. Sketches built over separate chunks, shards or processes
+    can be merged into one sketch of the whole data.
+    """
+    def __init__(
+        self,
+        k: int=2000,
+        random_state: int=None
+    ):
+        self.k = k
+        self.c = 2 / 3
+        self.n = 0
+        self.levels = [numpy.empty(0)]
+        self.rng = numpy.random.default_rng(random_state)
+
+    def capacity(self, level: int) -> int:
+        """
+        Get the capacity of a level. Lower levels hold fewer items as their items have less weight.
+
+        :param level:
+            The level number.
+
+        :returns:
+            The maximum number of items of the level.
+        """
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * self.c ** depth)), 2)
+
+    def update(self, values) -> object:
+        """
+        Add values to the sketch. NaN values are ignored.
+
+        :param values:
+            Array-like of numeric values.
+
+        :returns:
+            An instance of self.
+        """
+        values = numpy.asarray(values, dtype=float).ravel()
+        values = values[~numpy.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = numpy.concatenate([self.levels[0], values])
+        self.compress()
+        return self
+
+    def compress(self) -> None:
+        """
+        Compact every level that is over its capacity, from the lowest level up.
+        """
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(numpy.empty(0))
+                items = numpy.sort(self.levels[level])
+                # Keep the last item back when odd, so the compacted items are paired
+                keep = items[len(items) - len(items) % 2:]
+                items = items[:len(items) - len(items) % 2]
+                offset = int(self.rng.integers(2))
+                self.levels[level + 1] = numpy.concatenate([self.levels[level + 1], items[offset::2]])
+                self.levels[level] = keep
+            level += 1
+
+    def merge(self, other: object) -> object:
+        """
+        Merge another sketch into this sketch.
+
+        :param other:
+            KLLSketch built over other data.
+
+        :returns:
+            An instance of self.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(numpy.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = numpy.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.compress()
+        return self
+
+    def quantiles(self, qs) -> numpy.ndarray:
+        """
+        Estimate quantiles of the data added to the sketch.
+
+        :param qs:
+            Array-like of quantiles between 0 and 1.
+
+        :returns:
+            Array of estimated values at the quantiles.
+        """
+        qs = numpy.asarray(qs, dtype=float)
+        if self.n == 0:
+            return numpy.full(qs.shape, numpy.nan)
+        items = numpy.concatenate(self.levels)
+        weights = numpy.concatenate([numpy.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = numpy.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = numpy.cumsum(weights[order])
+        # Rank of each quantile, matched to the first item whose cumulative weight reaches it
+        ranks = qs * (cumulative[-1] - 1) + 1
+        positions = numpy.minimum(numpy.searchsorted(cumulative, ranks, side='left'), len(items) - 1)
+        return items[positions]
+
+    def to_dict(self) -> dict:
+        """
+        Get the state of the sketch as a JSON serialisable dictionary.
+
+        :returns:
+            Dictionary of the sketch state.
+        """
+        return {'k': self.k, 'n': self.n, 'levels': [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state: dict, random_state: int=None) -> object:
+        """
+        Create a sketch from a dictionary made by to_dict.
+
+        :param state:
+            Dictionary of the sketch state.
+        :param random_state:
+            Specify for repeatablity of later compactions. Default: None.
+
+        :returns:
+            KLLSketch instance.
+        """
+        sketch = cls(k=state['k'], random_state=random_state)
+        sketch.n = state['n']
+        sketch.levels = [numpy.asarray(level, dtype=float) for level in state['levels']]
+        return sketch
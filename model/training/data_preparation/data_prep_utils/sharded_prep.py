@@ -0,0 +1,450 @@
+import io
+import os
+import shutil
+import numpy
+import pandas
+from concurrent.futures import ProcessPoolExecutor
+from src.tracing import traced, add_span_attributes
+from model.training.data_preparation.data_prep_utils.dataset_schema import infer_csv_dtype
+
+
+def csv_shard_ranges(
+    csv_file_path: str,
+    n_shards: int
+) -> tuple:
+    """
+    Split a csv file into byte ranges of whole lines of about equal size.
+    The csv files of the pipeline are sorted by Time, so every shard is a Time window.
+
+    :param csv_file_path:
+        Path of the csv file.
+    :param n_shards:
+        The number of shards.
+
+    :returns:
+        Tuple containing the header line as bytes and the list of (start, end) byte offsets of the shards.
+    """
+    size = os.path.getsize(csv_file_path)
+    with open(csv_file_path, 'rb') as f:
+        header = f.readline()
+        offsets = [f.tell()]
+        for i in range(1, n_shards):
+            # Move to the start of the line after the byte before the target, at or after the last offset
+            f.seek(max(offsets[0] + (size - offsets[0]) * i // n_shards, offsets[-1]) - 1)
+            f.readline()
+            offsets.append(min(f.tell(), size))
+        offsets.append(size)
+
+    ranges = [(start, end) for start, end in zip(offsets[:-1], offsets[1:]) if end > start]
+    return header, ranges or [(offsets[0], offsets[0])]
+
+
+def csv_dtype(
+    csv_file_path: str,
+    schema=None,
+    nrows: int=100000,
+    target_variable: str='Class'
+) -> dict:
+    """
+    Get the dtypes every shard of a csv file is parsed with, so all shards have the same dtypes.
+
+    :param csv_file_path:
+        Path of the csv file.
+    :param schema:
+        DatasetSchema of the dtypes. If not specified, inferred from the first rows like csv_to_df_chunks,
+        With integer feature columns as float64, see infer_csv_dtype.
+    :param nrows:
+        The number of rows to infer the dtypes from. Default: 100000.
+    :param target_variable:
+        The target column, which keeps an inferred integer dtype. Default: 'Class'.
+
+    :returns:
+        Dictionary of column name to dtype.
+    """
+    if schema:
+        columns = pandas.read_csv(csv_file_path, nrows=0).columns
+        return {column: schema.column_dtype(column) for column in columns}
+    return infer_csv_dtype(csv_file_path=csv_file_path, nrows=nrows, target_variable=target_variable)
+
+
+def read_csv_shard(
+    csv_file_path: str,
+    header: bytes,
+    start: int,
+    end: int,
+    dtype: dict
+) -> pandas.DataFrame:
+    """
+    Parse one shard of a csv file. Every value is parsed as it is when the whole file is parsed,
+    With integer feature columns as float64 unless a schema gives their dtype, see csv_dtype.
+
+    :param csv_file_path:
+        Path of the csv file.
+    :param header:
+        The header line of the csv file.
+    :param start:
+        The byte offset of the shard.
+    :param end:
+        The byte offset after the shard.
+    :param dtype:
+        Dictionary of column name to dtype, see csv_dtype.
+
+    :returns:
+        DataFrame of the rows of the shard.
+    """
+    with open(csv_file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pandas.read_csv(io.BytesIO(header + data), dtype=dtype)
+
+
+@traced(category='shard')
+def filter_csv_shard(
+    csv_file_path: str,
+    header: bytes,
+    start: int,
+    end: int,
+    dtype: dict,
+    part_path: str,
+    write_header: bool,
+    row_filter=None
+) -> tuple:
+    """
+    Parse one shard of a csv file, filter its rows and write them as a part csv file. Runs in a worker process.
+
+    :param part_path:
+        Path of the part csv file to write.
+    :param write_header:
+        If the column names should be written, for the first part.
+    :param row_filter:
+        Function of a DataFrame returning the DataFrame of the rows to keep. Must be importable by name,
+        e.g. a module function or a functools.partial of one. Default: None, all rows are kept.
+
+    The other parameters are those of read_csv_shard.
+
+    :returns:
+        Tuple containing the number of rows parsed and written.
+    """
+    df = read_csv_shard(csv_file_path=csv_file_path, header=header, start=start, end=end, dtype=dtype)
+    add_span_attributes(shard_bytes=end - start, rows=len(df))
+    rows = len(df)
+    if row_filter is not None:
+        df = row_filter(df)
+    df.to_csv(part_path, index=False, header=write_header)
+    return rows, len(df)
+
+
+@traced(category='shard')
+def spill_csv_shard(
+    csv_file_path: str,
+    header: bytes,
+    start: int,
+    end: int,
+    dtype: dict,
+    spill_dir: str,
+    key_columns: list
+) -> tuple:
+    """
+    Parse one shard of a csv file and spill its columns as '.npy' files, so the rows can be gathered later
+    Without parsing the csv file again. Runs in a worker process.
+
+    :param spill_dir:
+        Folder to write one '.npy' file per column to.
+    :param key_columns:
+        The columns to return, for the steps that need them for every row, such as stratification and sorting.
+
+    The other parameters are those of read_csv_shard.
+
+    :returns:
+        Tuple containing the number of rows parsed and a dictionary of the key column names to arrays.
+    """
+    df = read_csv_shard(csv_file_path=csv_file_path, header=header, start=start, end=end, dtype=dtype)
+    add_span_attributes(shard_bytes=end - start, rows=len(df))
+    os.makedirs(spill_dir, exist_ok=True)
+    for i, column in enumerate(df.columns):
+        numpy.save(os.path.join(spill_dir, f'col_{i}.npy'), df[column].to_numpy(), allow_pickle=False)
+    return len(df), {column: df[column].to_numpy() for column in key_columns}
+
+
+def gather_rows(
+    spill_dirs: list,
+    offsets: numpy.ndarray,
+    columns: list,
+    rows: numpy.ndarray
+) -> pandas.DataFrame:
+    """
+    Gather rows of spilled shards, by their positions in the whole csv file, into one DataFrame.
+    The spilled columns are memory mapped, so only the gathered rows are read.
+
+    :param spill_dirs:
+        List of the spill folders of the shards, in order.
+    :param offsets:
+        Array of the position of the first row of every shard, and the total number of rows last.
+    :param columns:
+        The column names of the csv file, in order.
+    :param rows:
+        Row positions in the whole csv file, in order.
+
+    :returns:
+        DataFrame of the rows, with a RangeIndex.
+    """
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    shards = numpy.searchsorted(offsets, rows, side='right') - 1
+    present = numpy.unique(shards)
+
+    # Fill every column shard by shard
+    gathered = {}
+    for i, column in enumerate(columns):
+        values = None
+        for shard in present:
+            spilled = numpy.load(os.path.join(spill_dirs[shard], f'col_{i}.npy'), mmap_mode='r')
+            if values is None:
+                values = numpy.empty(len(rows), dtype=spilled.dtype)
+            mask = shards == shard
+            values[mask] = spilled[rows[mask] - offsets[shard]]
+        if values is None:
+            values = numpy.load(os.path.join(spill_dirs[0], f'col_{i}.npy'), mmap_mode='r')[:0].copy()
+        gathered[column] = values
+
+    # One block per dtype, like a DataFrame read from a csv file
+    return pandas.DataFrame(gathered)
+
+
+@traced(category='shard')
+def write_rows_csv(
+    spill_dirs: list,
+    offsets: numpy.ndarray,
+    columns: list,
+    rows: numpy.ndarray,
+    part_path: str,
+    write_header: bool,
+    transform=None,
+    export_columns: list=None
+) -> int:
+    """
+    Gather rows of spilled shards, transform them and write them as a part csv file. Runs in a worker process.
+
+    :param part_path:
+        Path of the part csv file to write.
+    :param write_header:
+        If the column names should be written, for the first part.
+    :param transform:
+        Function of a DataFrame returning the DataFrame to write, e.g. for scaling. Must be importable by name.
+        Default: None.
+    :param export_columns:
+        The columns to write, in order. Default: None, all columns.
+
+    The other parameters are those of gather_rows.
+
+    :returns:
+        The number of rows written.
+    """
+    df = gather_rows(spill_dirs=spill_dirs, offsets=offsets, columns=columns, rows=rows)
+    if transform is not None:
+        df = transform(df)
+    if export_columns is not None:
+        df = df[export_columns]
+    df.to_csv(part_path, index=False, header=write_header)
+    add_span_attributes(rows=len(df), file_bytes=os.path.getsize(part_path))
+    return len(df)
+
+
+def robust_scale_transform(
+    df: pandas.DataFrame,
+    scaler,
+    scale_columns: list
+) -> pandas.DataFrame:
+    """
+    Scale columns of a DataFrame in place with a fitted scaler, as robust_scale_df does with its own scaler.
+
+    :param df:
+        DataFrame to scale.
+    :param scaler:
+        Fitted SKLearn RobustScaler of the scale columns.
+    :param scale_columns:
+        List of column names to scale.
+
+    :returns:
+        df, scaled.
+    """
+    df[scale_columns] = scaler.transform(df[scale_columns])
+    return df
+
+
+def csv_round_trip(
+    df: pandas.DataFrame,
+    dtype: dict=None
+) -> pandas.DataFrame:
+    """
+    Write a DataFrame as csv text and parse it again, giving the values a later step reads from the csv file.
+
+    :param df:
+        DataFrame to round trip.
+    :param dtype:
+        Dictionary of column name to dtype to parse with. If not specified, pandas infers them.
+
+    :returns:
+        Parsed DataFrame.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pandas.read_csv(buffer, dtype=dtype)
+
+
+def concat_files(
+    part_paths: list,
+    file_path: str
+) -> str:
+    """
+    Join part files into one file in order, removing the parts.
+
+    :param part_paths:
+        List of the paths of the part files, in order.
+    :param file_path:
+        Path of the file to write.
+
+    :returns:
+        The path of the file.
+    """
+    with open(file_path, 'wb') as f:
+        for part_path in part_paths:
+            with open(part_path, 'rb') as part:
+                shutil.copyfileobj(part, f, 1 << 24)
+            os.remove(part_path)
+    return file_path
+
+
+class ShardedCSV:
+    """
+    A class for processing a csv file as Time window shards in worker processes.
+
+    Row-wise steps, such as cleaning, run on each shard independently. Steps that need every row,
+    Such as stratified splitting, scaler fitting, sorting and undersampling, run on key columns
+    That the workers return for every row, and the full rows they select are gathered from shards
+    The workers spilled as '.npy' files, then written as csv files in parallel again.
+    Each shard is parsed exactly as the whole file is, so the results match single process processing.
+    """
+    def __init__(
+        self,
+        csv_file_path: str,
+        n_shards: int,
+        n_jobs: int=None,
+        schema=None
+    ):
+        self.csv_file_path = csv_file_path
+        self.n_shards = n_shards
+        self.n_jobs = n_jobs or n_shards
+        self.header, self.ranges = csv_shard_ranges(csv_file_path=csv_file_path, n_shards=n_shards)
+        self.dtype = csv_dtype(csv_file_path=csv_file_path, schema=schema)
+        self.columns = list(self.dtype)
+        self.spill_dirs = None
+        self.offsets = None
+
+    @traced()
+    def filter_to_csv(
+        self,
+        csv_file_path: str,
+        row_filter=None
+    ) -> tuple:
+        """
+        Filter the rows of every shard in a worker process and write them as one csv file,
+        The same as filtering the whole DataFrame and writing it with df_to_csv.
+
+        :param csv_file_path:
+            Path of the csv file to write.
+        :param row_filter:
+            Function of a DataFrame returning the DataFrame of the rows to keep, see filter_csv_shard.
+
+        :returns:
+            Tuple containing the number of rows read and written.
+        """
+        part_paths = [f'{csv_file_path}.part{i}' for i in range(len(self.ranges))]
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            futures = [
+                executor.submit(filter_csv_shard, self.csv_file_path, self.header, start, end, self.dtype,
+                                part_path, i == 0, row_filter)
+                for i, (part_path, (start, end)) in enumerate(zip(part_paths, self.ranges))
+            ]
+            counts = [future.result() for future in futures]
+        concat_files(part_paths=part_paths, file_path=csv_file_path)
+        return sum(count[0] for count in counts), sum(count[1] for count in counts)
+
+    @traced()
+    def spill(
+        self,
+        spill_dir: str,
+        key_columns: list
+    ) -> pandas.DataFrame:
+        """
+        Parse every shard in a worker process and spill its columns to spill_dir.
+
+        :param spill_dir:
+            Folder for the spilled shards.
+        :param key_columns:
+            The columns needed for every row by the global steps.
+
+        :returns:
+            DataFrame of the key columns of every row, in file order, with a RangeIndex of the rows,
+            So it has a row for every row even without key columns.
+        """
+        key_columns = [column for column in self.columns if column in key_columns]
+        self.spill_dirs = [os.path.join(spill_dir, f'shard_{i}') for i in range(len(self.ranges))]
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            futures = [
+                executor.submit(spill_csv_shard, self.csv_file_path, self.header, start, end, self.dtype,
+                                shard_dir, key_columns)
+                for shard_dir, (start, end) in zip(self.spill_dirs, self.ranges)
+            ]
+            results = [future.result() for future in futures]
+
+        self.offsets = numpy.cumsum([0] + [rows for rows, _ in results])
+        return pandas.DataFrame(
+            {column: numpy.concatenate([keys[column] for _, keys in results]) for column in key_columns},
+            index=pandas.RangeIndex(self.offsets[-1])
+        )
+
+    def gather(self, rows: numpy.ndarray) -> pandas.DataFrame:
+        """
+        Gather spilled rows into one DataFrame, see gather_rows.
+
+        :param rows:
+            Row positions in the csv file, in order.
+
+        :returns:
+            DataFrame of the rows, with a RangeIndex.
+        """
+        return gather_rows(spill_dirs=self.spill_dirs, offsets=self.offsets, columns=self.columns, rows=rows)
+
+    @traced()
+    def rows_to_csv(
+        self,
+        rows: numpy.ndarray,
+        csv_file_path: str,
+        transform=None,
+        export_columns: list=None
+    ) -> None:
+        """
+        Write spilled rows as one csv file, with every worker process gathering and writing a contiguous part,
+        The same as gathering them and writing them with df_to_csv.
+
+        :param rows:
+            Row positions in the csv file, in order.
+        :param csv_file_path:
+            Path of the csv file to write.
+        :param transform:
+            Function of a DataFrame returning the DataFrame to write, see write_rows_csv. Default: None.
+        :param export_columns:
+            The columns to write, in order. Default: None, all columns.
+        """
+        pieces = numpy.array_split(numpy.asarray(rows, dtype=numpy.int64), len(self.ranges))
+        part_paths = [f'{csv_file_path}.part{i}' for i in range(len(pieces))]
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+            futures = [
+                executor.submit(write_rows_csv, self.spill_dirs, self.offsets, self.columns, piece,
+                                part_path, i == 0, transform, export_columns)
+                for i, (part_path, piece) in enumerate(zip(part_paths, pieces))
+            ]
+            for future in futures:
+                future.result()
+        concat_files(part_paths=part_paths, file_path=csv_file_path)
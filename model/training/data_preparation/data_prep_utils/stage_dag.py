@@ -0,0 +1,296 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+def run_timed(func, kwargs: dict) -> tuple:
+    """
+    Run a stage function and time it. Runs in a worker process when stages run in parallel.
+
+    :param func:
+        Stage function. Must be importable by name to run in a worker process.
+    :param kwargs:
+        Keyword arguments of the stage function.
+
+    :returns:
+        Tuple containing the wall clock start and end times of the stage.
+    """
+    start = time.time()
+    func(**kwargs)
+    end = time.time()
+    return start, end
+
+
+class Stage:
+    """
+    A stage of a StageDAG: a function with the files it reads and writes.
+    """
+    def __init__(
+        self,
+        name: str,
+        func,
+        kwargs: dict=None,
+        inputs: list=None,
+        outputs: list=None,
+        code_files: list=None,
+        params: dict=None
+    ):
+        self.name = name
+        self.func = func
+        self.kwargs = kwargs or {}
+        self.inputs = [os.path.abspath(path) for path in inputs or []]
+        self.outputs = [os.path.abspath(path) for path in outputs or []]
+        self.code_files = code_files or []
+        self.params = self.kwargs if params is None else params
+
+
+class StageDAG:
+    """
+    A small DAG engine for pipeline stages.
+
+    Each stage declares the files it reads and writes. A stage depends on every stage that writes one of
+    its input files, and stages whose dependencies have finished run concurrently in a process pool.
+    After a run, report() gives the time of each stage and the critical path: the chain of dependent
+    stages with the largest total time, which bounds the run time however many workers are used.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.timings = {}
+
+    def add_stage(
+        self,
+        name: str,
+        func,
+        kwargs: dict=None,
+        inputs: list=None,
+        outputs: list=None,
+        code_files: list=None,
+        params: dict=None
+    ) -> Stage:
+        """
+        Add a stage to the DAG.
+
+        :param name:
+            Unique name of the stage.
+        :param func:
+            Stage function, called with kwargs.
+        :param kwargs:
+            Keyword arguments of the stage function.
+        :param inputs:
+            List of paths of the files the stage reads.
+        :param outputs:
+            List of paths of the files the stage writes.
+        :param code_files:
+            List of paths of the source files of the stage, for incremental runs.
+        :param params:
+            Parameters of the stage that change its outputs, for incremental runs. If not specified, kwargs.
+
+        :returns:
+            The added Stage.
+        """
+        if name in self.stages:
+            raise ValueError(f'Stage {name} already exists')
+        stage = Stage(name=name, func=func, kwargs=kwargs, inputs=inputs, outputs=outputs,
+                      code_files=code_files, params=params)
+        for other in self.stages.values():
+            shared = set(stage.outputs) & set(other.outputs)
+            if shared:
+                raise ValueError(f'Stages {other.name} and {name} both write {sorted(shared)}')
+        self.stages[name] = stage
+        return stage
+
+    def dependencies(self) -> dict:
+        """
+        Get the dependencies of every stage.
+
+        :returns:
+            Dictionary of stage name to the set of names of the stages that write its inputs.
+        """
+        producers = {output: stage.name for stage in self.stages.values() for output in stage.outputs}
+        dependencies = {
+            stage.name: {producers[path] for path in stage.inputs if path in producers and producers[path] != stage.name}
+            for stage in self.stages.values()
+        }
+        self.topological_order(dependencies)
+        return dependencies
+
+    def topological_order(self, dependencies: dict) -> list:
+        """
+        Order the stages so every stage comes after its dependencies.
+
+        :param dependencies:
+            Dictionary of stage name to the set of names of its dependencies.
+
+        :returns:
+            List of stage names.
+        """
+        order = []
+        done = set()
+        remaining = dict(dependencies)
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if deps <= done)
+            if not ready:
+                raise ValueError(f'Stages {sorted(remaining)} have cyclic dependencies')
+            for name in ready:
+                order.append(name)
+                done.add(name)
+                del remaining[name]
+        return order
+
+    def run(
+        self,
+        max_workers: int=1,
+        manifest=None
+    ) -> dict:
+        """
+        Run the stages in dependency order.
+
+        :param max_workers:
+            The number of worker processes. With 1, stages run one after another in this process. Default: 1.
+        :param manifest:
+            StageManifest to skip stages that are up to date with. If None, every stage runs. Default: None.
+
+        :returns:
+            The report of the run, see report().
+        """
+        dependencies = self.dependencies()
+        self.timings = {}
+        run_start = time.time()
+        done = set()
+        pending = set(self.stages)
+        fingerprints = {}
+
+        def ready_stages():
+            return sorted(name for name in pending if dependencies[name] <= done)
+
+        def skip(name):
+            # Check the manifest once the inputs of the stage have been written
+            if manifest is None:
+                return False
+            stage = self.stages[name]
+            fingerprints[name] = manifest.fingerprint(
+                input_files=stage.inputs, params=stage.params, code_files=stage.code_files
+            )
+            if manifest.is_up_to_date(stage=name, fingerprint=fingerprints[name], output_files=stage.outputs):
+                print(f'Stage {name} is up to date, skipping.\n')
+                now = time.time()
+                self.timings[name] = {'start': now, 'end': now, 'skipped': True}
+                return True
+            return False
+
+        def finish(name, start, end):
+            self.timings[name] = {'start': start, 'end': end, 'skipped': False}
+            if manifest is not None:
+                manifest.record(stage=name, fingerprint=fingerprints[name], output_files=self.stages[name].outputs)
+
+        # Sequential
+        if max_workers == 1:
+            for name in self.topological_order(dependencies):
+                pending.discard(name)
+                if not skip(name):
+                    start, end = run_timed(self.stages[name].func, self.stages[name].kwargs)
+                    finish(name, start, end)
+                done.add(name)
+            return self.report(run_start=run_start, run_end=time.time())
+
+        # Parallel
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name in ready_stages():
+                    pending.discard(name)
+                    if skip(name):
+                        done.add(name)
+                        continue
+                    running[executor.submit(run_timed, self.stages[name].func, self.stages[name].kwargs)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        start, end = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    finish(name, start, end)
+                    done.add(name)
+
+        return self.report(run_start=run_start, run_end=time.time())
+
+    def critical_path(self) -> tuple:
+        """
+        Find the chain of dependent stages with the largest total time in the last run.
+
+        :returns:
+            Tuple containing the list of stage names on the critical path and its total time in seconds.
+        """
+        dependencies = self.dependencies()
+        durations = {name: timing['end'] - timing['start'] for name, timing in self.timings.items()}
+        longest = {}
+        previous = {}
+        for name in self.topological_order(dependencies):
+            best = max(dependencies[name], key=lambda dep: longest[dep], default=None)
+            longest[name] = durations.get(name, 0.0) + (longest[best] if best else 0.0)
+            previous[name] = best
+        if not longest:
+            return [], 0.0
+
+        # Walk back from the end of the longest chain
+        name = max(longest, key=longest.get)
+        total = longest[name]
+        path = []
+        while name:
+            path.append(name)
+            name = previous[name]
+
+        return path[::-1], total
+
+    def report(
+        self,
+        run_start: float=None,
+        run_end: float=None
+    ) -> dict:
+        """
+        Get and print the per-stage timing and critical path report of the last run.
+
+        :param run_start:
+            Wall clock start time of the run.
+        :param run_end:
+            Wall clock end time of the run.
+
+        :returns:
+            Dictionary with the total time, the start, end and duration of each stage relative to the run start,
+            and the critical path.
+        """
+        if run_start is None:
+            run_start = min((timing['start'] for timing in self.timings.values()), default=0.0)
+        if run_end is None:
+            run_end = max((timing['end'] for timing in self.timings.values()), default=0.0)
+        path, path_time = self.critical_path()
+        report = {
+            'total_seconds': run_end - run_start,
+            'stages': {
+                name: {
+                    'start_seconds': timing['start'] - run_start,
+                    'end_seconds': timing['end'] - run_start,
+                    'duration_seconds': timing['end'] - timing['start'],
+                    'skipped': timing['skipped']
+                }
+                for name, timing in self.timings.items()
+            },
+            'critical_path': path,
+            'critical_path_seconds': path_time
+        }
+
+        # Print report
+        print('Stage timings:')
+        for name, timing in sorted(report['stages'].items(), key=lambda item: item[1]['start_seconds']):
+            status = ' (skipped)' if timing['skipped'] else ''
+            print(f"{name}: {timing['duration_seconds']:.4f} seconds, "
+                  f"from {timing['start_seconds']:.4f} to {timing['end_seconds']:.4f}{status}")
+        print(f"Critical path: {' -> '.join(path)} ({path_time:.4f} seconds)")
+        print(f"Total: {report['total_seconds']:.4f} seconds\n")
+
+        return report
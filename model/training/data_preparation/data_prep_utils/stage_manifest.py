@@ -0,0 +1,201 @@
+import os
+import ast
+import json
+import hashlib
+
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+class StageManifest:
+    """
+    A class for recording the fingerprints of pipeline stages in a JSON manifest,
+    So a stage can be skipped when its inputs, parameters and code have not changed since it last ran.
+
+    A fingerprint is a SHA-256 hash of the content hashes of the input files, the parameters
+    and the content hashes of the code files of the stage. Content hashes of files are reused while
+    the size and modification time of a file are unchanged, so unchanged files are not read again.
+    """
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.manifest = {'version': MANIFEST_FORMAT_VERSION, 'stages': {}, 'file_hashes': {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_FORMAT_VERSION:
+                self.manifest = manifest
+
+    def file_hash(self, file_path: str) -> str:
+        """
+        Get the SHA-256 content hash of a file.
+
+        :param file_path:
+            Path of the file.
+
+        :returns:
+            Hex digest of the file content, or None if the file does not exist.
+        """
+        if not os.path.exists(file_path):
+            return None
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        cached = self.manifest['file_hashes'].get(file_path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 24), b''):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+        self.manifest['file_hashes'][file_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+
+        return digest
+
+    def fingerprint(
+        self,
+        input_files: list,
+        params: dict,
+        code_files: list
+    ) -> str:
+        """
+        Compute the fingerprint of a stage.
+
+        :param input_files:
+            List of paths of the files the stage reads.
+        :param params:
+            JSON serialisable dictionary of the parameters of the stage.
+        :param code_files:
+            List of paths of the source files of the stage.
+
+        :returns:
+            Hex digest of the fingerprint.
+        """
+        content = {
+            'inputs': [self.file_hash(file_path) for file_path in input_files],
+            'params': params,
+            'code': [self.file_hash(file_path) for file_path in code_files]
+        }
+        return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_up_to_date(
+        self,
+        stage: str,
+        fingerprint: str,
+        output_files: list
+    ) -> bool:
+        """
+        Check if a stage last ran with the same fingerprint and its outputs are unchanged since.
+
+        :param stage:
+            Name of the stage.
+        :param fingerprint:
+            Current fingerprint of the stage.
+        :param output_files:
+            List of paths of the files the stage writes.
+
+        :returns:
+            True if the stage can be skipped.
+        """
+        entry = self.manifest['stages'].get(stage)
+        if not entry or entry['fingerprint'] != fingerprint:
+            return False
+        for file_path in output_files:
+            recorded = entry['outputs'].get(os.path.abspath(file_path))
+            if recorded is None or recorded != self.file_hash(file_path):
+                return False
+        return True
+
+    def record(
+        self,
+        stage: str,
+        fingerprint: str,
+        output_files: list
+    ) -> None:
+        """
+        Record that a stage ran with a fingerprint and wrote its outputs, and save the manifest.
+
+        :param stage:
+            Name of the stage.
+        :param fingerprint:
+            Fingerprint the stage ran with.
+        :param output_files:
+            List of paths of the files the stage wrote.
+        """
+        self.manifest['stages'][stage] = {
+            'fingerprint': fingerprint,
+            'outputs': {os.path.abspath(file_path): self.file_hash(file_path) for file_path in output_files}
+        }
+        self.save()
+
+    def save(self) -> None:
+        """
+        Write the manifest to its JSON file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def module_code_files(
+    modules: list,
+    root_dir: str,
+    packages: tuple=('model', 'src')
+) -> list:
+    """
+    Find the source files of modules and of every project module they import, directly or through other
+    Project modules, including the imports inside functions, so the code files of a stage follow its imports.
+
+    :param modules:
+        List of dotted module names, such as the modules of the stage functions.
+    :param root_dir:
+        Folder the dotted module names are relative to, the repository root.
+    :param packages:
+        Top-level packages of the project. Imports of other packages are not followed. Default: ('model', 'src').
+
+    :returns:
+        Sorted list of paths of the source files, with the '__init__.py' files of their packages.
+    """
+    def module_file(name):
+        path = os.path.join(root_dir, *name.split('.'))
+        for file_path in (path + '.py', os.path.join(path, '__init__.py')):
+            if os.path.isfile(file_path):
+                return file_path
+        return None
+
+    files = set()
+    pending = list(modules)
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name.split('.')[0] not in packages:
+            continue
+        seen.add(name)
+        # Parent packages run their '__init__.py' on import
+        parent = name.rpartition('.')[0]
+        if parent:
+            pending.append(parent)
+        file_path = module_file(name)
+        if file_path is None:
+            continue
+        files.add(file_path)
+
+        with open(file_path, 'r') as f:
+            tree = ast.parse(f.read(), filename=file_path)
+        package = name if file_path.endswith('__init__.py') else parent
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = node.module or ''
+                if node.level:
+                    # Relative imports, from the package of the module or its parents
+                    anchor = package.split('.')[:len(package.split('.')) - node.level + 1]
+                    base = '.'.join(anchor + ([base] if base else []))
+                pending.append(base)
+                # Names imported from a package may be its modules
+                pending.extend(f'{base}.{alias.name}' for alias in node.names if module_file(f'{base}.{alias.name}'))
+
+    return sorted(files)
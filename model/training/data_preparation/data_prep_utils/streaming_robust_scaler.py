@@ -0,0 +1,255 @@
+import json
+import numpy
+import pandas
+from model.training.data_preparation.data_prep_utils.quantile_sketch import KLLSketch
+
+
+class StreamingRobustScaler:
+    """
+    A robust scaler that is fitted over DataFrame chunks with one KLL quantile sketch per column,
+    So the median and interquartile range are estimated without holding all rows in memory.
+    Scalers fitted on separate shards or processes can be merged before transforming.
+    Like SKLearn's RobustScaler, columns are transformed as (x - median) / (q75 - q25), with a zero range left as 1.
+    """
+    def __init__(
+        self,
+        scale_columns: list,
+        quantile_range: tuple=(25.0, 75.0),
+        k: int=2000,
+        random_state: int=None
+    ):
+        self.scale_columns = list(scale_columns)
+        self.quantile_range = tuple(quantile_range)
+        self.k = k
+        self.random_state = random_state
+        self.sketches = {column: KLLSketch(k=k, random_state=random_state) for column in self.scale_columns}
+        self.center_ = None
+        self.scale_ = None
+
+    def partial_fit(self, df: pandas.DataFrame) -> object:
+        """
+        Add a DataFrame chunk to the sketches.
+
+        :param df:
+            DataFrame chunk containing the scale columns.
+
+        :returns:
+            An instance of self.
+        """
+        for column in self.scale_columns:
+            self.sketches[column].update(df[column].to_numpy())
+        self.center_, self.scale_ = None, None
+        return self
+
+    def fit(self, chunks) -> object:
+        """
+        Fit the scaler over DataFrame chunks.
+
+        :param chunks:
+            Iterable of DataFrame chunks, or a single DataFrame.
+
+        :returns:
+            An instance of self.
+        """
+        if isinstance(chunks, pandas.DataFrame):
+            chunks = [chunks]
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        self.finalize()
+        return self
+
+    def merge(self, other: object) -> object:
+        """
+        Merge the sketches of a scaler fitted on other data into this scaler.
+
+        :param other:
+            StreamingRobustScaler with the same scale columns.
+
+        :returns:
+            An instance of self.
+        """
+        if other.scale_columns != self.scale_columns:
+            raise ValueError(f'Cannot merge scalers of columns {other.scale_columns} into {self.scale_columns}')
+        for column in self.scale_columns:
+            self.sketches[column].merge(other.sketches[column])
+        self.center_, self.scale_ = None, None
+        return self
+
+    def finalize(self) -> object:
+        """
+        Compute the centre and scale of every column from the sketches.
+
+        :returns:
+            An instance of self.
+        """
+        low, high = self.quantile_range
+        self.center_ = {}
+        self.scale_ = {}
+        for column in self.scale_columns:
+            q_low, median, q_high = self.sketches[column].quantiles([low / 100, 0.5, high / 100])
+            scale = q_high - q_low
+            self.center_[column] = float(median)
+            self.scale_[column] = float(scale) if scale != 0 else 1.0
+        return self
+
+    def transform(self, df: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Scale the scale columns of a DataFrame or DataFrame chunk.
+
+        :param df:
+            DataFrame to scale.
+
+        :returns:
+            Scaled copy of the DataFrame.
+        """
+        if self.center_ is None:
+            self.finalize()
+        scaled_df = df.copy()
+        for column in self.scale_columns:
+            # Float columns keep their precision, other columns are scaled as float64
+            values = df[column].to_numpy()
+            values = values.astype(numpy.result_type(values.dtype, numpy.float32), copy=False)
+            scaled = (values - self.center_[column]) / self.scale_[column]
+            scaled_df[column] = scaled.astype(values.dtype, copy=False)
+        return scaled_df
+
+    def to_dict(self, include_sketches: bool=True) -> dict:
+        """
+        Get the fitted scaler as a JSON serialisable dictionary.
+
+        :param include_sketches:
+            If the sketches should be included, so the scaler can still be merged after loading. Default: True.
+
+        :returns:
+            Dictionary of the scaler.
+        """
+        if self.center_ is None:
+            self.finalize()
+        state = {
+            'scale_columns': self.scale_columns,
+            'quantile_range': list(self.quantile_range),
+            'k': self.k,
+            'center': self.center_,
+            'scale': self.scale_
+        }
+        if include_sketches:
+            state['sketches'] = {column: sketch.to_dict() for column, sketch in self.sketches.items()}
+        return state
+
+    def save(self, json_file_path: str, include_sketches: bool=True) -> None:
+        """
+        Save the fitted scaler as a JSON file, so scoring can reuse the same centre and scale.
+
+        :param json_file_path:
+            Path of the JSON file.
+        :param include_sketches:
+            If the sketches should be saved too. Default: True.
+        """
+        with open(json_file_path, 'w') as f:
+            json.dump(self.to_dict(include_sketches=include_sketches), f)
+
+    @classmethod
+    def from_dict(cls, state: dict) -> object:
+        """
+        Create a fitted scaler from a dictionary made by to_dict.
+
+        :param state:
+            Dictionary of the scaler.
+
+        :returns:
+            StreamingRobustScaler instance.
+        """
+        scaler = cls(scale_columns=state['scale_columns'], quantile_range=tuple(state['quantile_range']), k=state['k'])
+        if 'sketches' in state:
+            scaler.sketches = {column: KLLSketch.from_dict(sketch) for column, sketch in state['sketches'].items()}
+        scaler.center_ = dict(state['center'])
+        scaler.scale_ = dict(state['scale'])
+        return scaler
+
+    @classmethod
+    def from_robust_scaler(cls, scaler, scale_columns: list) -> object:
+        """
+        Create a fitted scaler with the exact centre and scale of a fitted SKLearn RobustScaler,
+        So the scaling of the training data can be saved as JSON and reused for scoring.
+
+        :param scaler:
+            Fitted SKLearn RobustScaler.
+        :param scale_columns:
+            List of the column names the scaler was fitted on, in order.
+
+        :returns:
+            StreamingRobustScaler instance, without sketches.
+        """
+        scale_columns = list(scale_columns)
+        stream_scaler = cls(scale_columns=scale_columns, quantile_range=scaler.quantile_range)
+        stream_scaler.sketches = {}
+        center = scaler.center_ if scaler.center_ is not None else numpy.zeros(len(scale_columns))
+        scale = scaler.scale_ if scaler.scale_ is not None else numpy.ones(len(scale_columns))
+        stream_scaler.center_ = {column: float(value) for column, value in zip(scale_columns, center)}
+        stream_scaler.scale_ = {column: float(value) for column, value in zip(scale_columns, scale)}
+        return stream_scaler
+
+    @classmethod
+    def load(cls, json_file_path: str) -> object:
+        """
+        Load a fitted scaler saved with save.
+
+        :param json_file_path:
+            Path of the JSON file.
+
+        :returns:
+            StreamingRobustScaler instance.
+        """
+        with open(json_file_path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def sketch_error_report(
+    df: pandas.DataFrame,
+    scale_columns: list,
+    chunksize: int=100000,
+    k: int=2000,
+    random_state: int=None
+) -> dict:
+    """
+    Compare the centre and scale of a StreamingRobustScaler fitted over chunks of a DataFrame
+    with the exact values of SKLearn's RobustScaler fitted on the whole DataFrame.
+
+    :param df:
+        DataFrame to fit both scalers on.
+    :param scale_columns:
+        List of column names to scale.
+    :param chunksize:
+        The number of rows in each chunk given to the streaming scaler. Default: 100000.
+    :param k:
+        The size parameter of the sketches. Default: 2000.
+    :param random_state:
+        Specify for repeatablity. Default: None.
+
+    :returns:
+        Dictionary of exact and approximate centre and scale for each column, with the centre error
+        as a fraction of the exact scale, the relative scale error and the largest absolute difference of scaled values.
+    """
+    from sklearn.preprocessing import RobustScaler
+
+    # Exact
+    exact = RobustScaler().fit(df[scale_columns])
+
+    # Approximate
+    scaler = StreamingRobustScaler(scale_columns=scale_columns, k=k, random_state=random_state)
+    scaler.fit(df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+
+    report = {}
+    exact_scaled = exact.transform(df[scale_columns])
+    approx_scaled = scaler.transform(df[scale_columns])
+    for i, column in enumerate(scale_columns):
+        report[column] = {
+            'exact_center': float(exact.center_[i]),
+            'approx_center': scaler.center_[column],
+            'center_error': abs(scaler.center_[column] - exact.center_[i]) / exact.scale_[i],
+            'exact_scale': float(exact.scale_[i]),
+            'approx_scale': scaler.scale_[column],
+            'scale_relative_error': abs(scaler.scale_[column] - exact.scale_[i]) / exact.scale_[i],
+            'max_scaled_abs_diff': float(numpy.max(numpy.abs(approx_scaled[column].to_numpy() - exact_scaled[:, i])))
+        }
+    return report
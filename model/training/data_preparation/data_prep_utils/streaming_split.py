@@ -0,0 +1,224 @@
+import os
+import csv
+import heapq
+import shutil
+import zlib
+import tempfile
+import numpy
+import pandas
+
+
+class StratifiedStreamSplitter:
+    """
+    A class for splitting a stream of rows into train and test rows in a single pass,
+    Stratified by a column and reproducible through random_state.
+
+    The rows of each stratum are numbered in the order they arrive and grouped into blocks of block_size rows.
+    In every block, a random but fixed round(block_size * test_size) rows go to the test set.
+    The test rows of a block only depend on (random_state, stratum, block number),
+    So the same input gives the same split whatever the chunk size, and each stratum is split in the test_size ratio.
+    """
+    def __init__(
+        self,
+        test_size: float,
+        random_state: int=None,
+        block_size: int=100
+    ):
+        if not 0 < test_size < 1:
+            raise ValueError(f'test_size must be between 0 and 1, got {test_size}')
+        self.test_size = test_size
+        self.block_size = block_size
+        self.n_test = int(round(block_size * test_size))
+        if random_state is None:
+            random_state = int(numpy.random.SeedSequence().generate_state(1)[0])
+        self.random_state = random_state
+        self.counters = {}
+        self.masks = {}
+
+    def block_mask(self, stratum, block: int) -> numpy.ndarray:
+        """
+        Get which rows of a block of a stratum go to the test set.
+
+        :param stratum:
+            The stratum value.
+        :param block:
+            The block number within the stratum.
+
+        :returns:
+            Boolean array of length block_size, True for test rows.
+        """
+        key = (stratum, block)
+        if key not in self.masks:
+            stratum_hash = zlib.crc32(str(stratum).encode())
+            rng = numpy.random.default_rng([self.random_state, stratum_hash, block])
+            mask = numpy.zeros(self.block_size, dtype=bool)
+            mask[rng.permutation(self.block_size)[:self.n_test]] = True
+            # Only the current block of each stratum is needed again
+            self.masks = {k: v for k, v in self.masks.items() if k[0] != stratum}
+            self.masks[key] = mask
+
+        return self.masks[key]
+
+    def test_mask(self, strata) -> numpy.ndarray:
+        """
+        Assign the next rows of the stream to the train or test set.
+
+        :param strata:
+            Array-like of the stratum value of each row, in stream order. Use a constant for an unstratified split.
+
+        :returns:
+            Boolean array, True for rows that go to the test set.
+        """
+        strata = numpy.asarray(strata)
+        mask = numpy.zeros(len(strata), dtype=bool)
+        for stratum in pandas.unique(strata):
+            positions = numpy.flatnonzero(strata == stratum)
+            start = self.counters.get(stratum, 0)
+            ordinals = start + numpy.arange(len(positions))
+            self.counters[stratum] = start + len(positions)
+
+            # Look up the block masks of the rows
+            blocks = ordinals // self.block_size
+            offsets = ordinals % self.block_size
+            for block in numpy.unique(blocks):
+                in_block = blocks == block
+                mask[positions[in_block]] = self.block_mask(stratum=stratum, block=int(block))[offsets[in_block]]
+
+        return mask
+
+
+# Run files merged at once, well under the usual limit of 1024 open files
+MAX_MERGE_RUNS = 256
+
+
+def sort_key(
+    value: str,
+    sort_ascend: bool=True
+) -> tuple:
+    """
+    Get the merge key of a value of the sort column of external_sort_csv. Empty values sort last, as NaN does
+    With pandas, and the others by their number.
+
+    :param value:
+        The value as text.
+    :param sort_ascend:
+        If the rows are sorted by ascending values. Default: True.
+
+    :returns:
+        Tuple of whether the value is empty or NaN, and the number, negated for descending order.
+    """
+    number = float(value) if value else numpy.nan
+    if number != number:
+        return True, 0.0
+    return False, number if sort_ascend else -number
+
+
+def merge_csv_runs(
+    run_files: list,
+    merged_file: str,
+    header: list,
+    sort_by: str,
+    sort_ascend: bool=True
+) -> None:
+    """
+    Merge sorted csv run files with the same header into one sorted csv file, keeping the order of the runs
+    For rows with equal sort values.
+
+    :param run_files:
+        List of paths of the run files, in input order.
+    :param merged_file:
+        The path of the merged csv file.
+    :param header:
+        The column names of the csv files.
+    :param sort_by:
+        The name of the sort column.
+    :param sort_ascend:
+        If the runs are sorted by ascending values. Default: True.
+    """
+    sort_index = header.index(sort_by)
+    run_handles = [open(run_file, 'r', newline='') for run_file in run_files]
+    try:
+        readers = []
+        for handle in run_handles:
+            reader = csv.reader(handle)
+            next(reader)
+            readers.append(reader)
+        with open(merged_file, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(header)
+            writer.writerows(heapq.merge(*readers, key=lambda row: sort_key(row[sort_index], sort_ascend)))
+    finally:
+        for handle in run_handles:
+            handle.close()
+
+
+def external_sort_csv(
+    csv_file_path: str,
+    sort_by: str,
+    export_file_path: str=None,
+    sort_ascend: bool=True,
+    chunksize: int=100000,
+    tmp_dir: str=None,
+    max_merge_runs: int=MAX_MERGE_RUNS
+) -> None:
+    """
+    Sort a csv file by a numeric column with an external merge sort, holding at most one chunk in memory.
+    Chunks are sorted and written as temporary run files, which are then merged row by row, at most max_merge_runs
+    Runs at a time, in passes, so the number of open files stays bounded however large the file is.
+    Rows are copied as text, so values are written exactly as in the input file. Rows with an empty or NaN
+    Sort value are written last, in input order, as pandas sorts NaN.
+
+    :param csv_file_path:
+        The path of the csv file to sort.
+    :param sort_by:
+        The name of the numeric column to sort by.
+    :param export_file_path:
+        The path of the sorted csv file. If not specified, the input file is replaced.
+    :param sort_ascend:
+        If the data should be sorted by ascending of the sort column. Default: True.
+    :param chunksize:
+        The number of rows in each run. Default: 100000.
+    :param tmp_dir:
+        The folder for the temporary run files. If not specified, the folder of the csv file.
+    :param max_merge_runs:
+        The maximum number of run files open in a merge. Default: MAX_MERGE_RUNS.
+    """
+    if not export_file_path:
+        export_file_path = csv_file_path
+    if not tmp_dir:
+        tmp_dir = os.path.dirname(os.path.abspath(csv_file_path))
+
+    run_dir = tempfile.mkdtemp(prefix='sort_runs_', dir=tmp_dir)
+    try:
+        # Sorted runs, read as text so values are not reformatted. The stable sort keeps NaN last in both orders
+        run_files = []
+        with pandas.read_csv(csv_file_path, chunksize=chunksize, dtype=str, keep_default_na=False) as reader:
+            for chunk in reader:
+                keys = chunk[sort_by].replace('', 'nan').astype(float).to_numpy()
+                order = numpy.argsort(keys if sort_ascend else -keys, kind='stable')
+                run_file = os.path.join(run_dir, f'run_{len(run_files)}.csv')
+                chunk.iloc[order].to_csv(run_file, index=False)
+                run_files.append(run_file)
+
+        # Merge consecutive groups of runs in passes, until one merge is left
+        with open(csv_file_path, 'r', newline='') as f:
+            header = next(csv.reader(f))
+        merge_pass = 0
+        while len(run_files) > max_merge_runs:
+            merged_files = []
+            for start in range(0, len(run_files), max_merge_runs):
+                merged_file = os.path.join(run_dir, f'pass_{merge_pass}_run_{len(merged_files)}.csv')
+                merge_csv_runs(run_files=run_files[start:start + max_merge_runs], merged_file=merged_file,
+                               header=header, sort_by=sort_by, sort_ascend=sort_ascend)
+                for run_file in run_files[start:start + max_merge_runs]:
+                    os.remove(run_file)
+                merged_files.append(merged_file)
+            run_files = merged_files
+            merge_pass += 1
+        merged_file = os.path.join(run_dir, 'merged.csv')
+        merge_csv_runs(run_files=run_files, merged_file=merged_file, header=header, sort_by=sort_by,
+                       sort_ascend=sort_ascend)
+
+        shutil.move(merged_file, export_file_path)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
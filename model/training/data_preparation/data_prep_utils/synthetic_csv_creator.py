@@ -0,0 +1,114 @@
+import argparse
+from model.training.data_preparation.data_prep_utils.synthetic_transactions import FRAUD_RATE, write_synthetic_csv
+from src.tracing import traced
+
+
+def synthetic_csv_creator(
+    csv_file_path: str,
+    rows: int,
+    chunksize: int=1000000,
+    fraud_rate: float=FRAUD_RATE,
+    random_state: int=None,
+    float_format: str=None,
+    n_jobs: int=1
+) -> None:
+    """
+    Write a csv file of synthetic transactions with the schema and class imbalance of creditcard.csv,
+    For testing and benchmarking the pipeline at any size without the production data.
+
+    :param csv_file_path:
+        The path of the csv file to write.
+    :param rows:
+        Number of rows to generate.
+    :param chunksize:
+        The number of rows generated and written at a time. Default: 1000000.
+    :param fraud_rate:
+        The probability of a row being fraud. Default: 0.00172.
+    :param random_state:
+        Specify for repeatablity. Default: None.
+    :param float_format:
+        Format string for the floats, e.g. '%.6f'. Default: None, full precision.
+    :param n_jobs:
+        The number of worker processes writing chunks. Default: 1.
+    """
+    # Write synthetic csv
+    write_synthetic_csv(
+        csv_file_path=csv_file_path,
+        rows=rows,
+        chunksize=chunksize,
+        fraud_rate=fraud_rate,
+        random_state=random_state,
+        float_format=float_format,
+        n_jobs=n_jobs
+    )
+    print(f'{rows} synthetic transactions written to {csv_file_path}')
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--csv_file_path', type=str, required=True,
+        help='The path of the csv file to write.'
+        )
+    parser.add_argument(
+        '--rows', type=int, required=True,
+        help='Number of rows to generate.'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=1000000,
+        help='The number of rows generated and written at a time. Default: 1000000.'
+        )
+    parser.add_argument(
+        '--fraud_rate', type=float, required=False, default=FRAUD_RATE,
+        help=f'The probability of a row being fraud. Default: {FRAUD_RATE}.'
+        )
+    parser.add_argument(
+        '--random_state', type=int, required=False, default=None,
+        help='Specify for repeatablity. Default: None.'
+        )
+    parser.add_argument(
+        '--float_format', type=str, required=False, default=None,
+        help="Format string for the floats, e.g. '%%.6f'. Default: full precision."
+        )
+    parser.add_argument(
+        '--n_jobs', type=int, required=False, default=1,
+        help='The number of worker processes writing chunks. Default: 1.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+@traced(category='cli')
+def main() -> None:
+    """
+    Main entry point to write a synthetic creditcard.csv file.
+    """
+    # Get args
+    args = get_args()
+
+    # Write synthetic csv
+    synthetic_csv_creator(
+        csv_file_path=args.csv_file_path,
+        rows=args.rows,
+        chunksize=args.chunksize,
+        fraud_rate=args.fraud_rate,
+        random_state=args.random_state,
+        float_format=args.float_format,
+        n_jobs=args.n_jobs
+    )
+
+
+if __name__ == '__main__':
+    main()
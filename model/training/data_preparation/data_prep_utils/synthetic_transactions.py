@@ -0,0 +1,225 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy
+import pandas
+from model.training.data_preparation.data_prep_utils.sharded_prep import concat_files
+from model.training.data_preparation.data_prep_utils.dataset_schema import CREDITCARD_COLUMNS
+
+
+# Kaggle creditcard.csv: about 284807 transactions over 172792 seconds, 0.172% of them fraud
+KAGGLE_ROWS = 284807
+KAGGLE_SECONDS = 172792
+FRAUD_RATE = 0.00172
+COLUMNS = CREDITCARD_COLUMNS
+PCA_COLUMNS = [column for column in COLUMNS if column.startswith('V')]
+
+# Standard deviations of the PCA components of legitimate transactions, decreasing like principal components
+PCA_STD = numpy.geomspace(1.96, 0.33, len(PCA_COLUMNS))
+
+# Approximate mean shift of the fraud transactions on the components that separate them
+FRAUD_SHIFT = {
+    'V1': -4.8, 'V2': 3.6, 'V3': -7.0, 'V4': 4.5, 'V5': -3.2, 'V6': -1.4, 'V7': -5.6, 'V9': -2.6, 'V10': -5.7,
+    'V11': 3.8, 'V12': -6.3, 'V14': -7.0, 'V16': -4.1, 'V17': -6.7, 'V18': -2.2, 'V19': 0.7, 'V21': 0.7
+}
+
+
+def chunk_plan(
+    rows: int,
+    chunksize: int=1000000,
+    random_state: int=None
+) -> list:
+    """
+    Plan the chunks of a synthetic dataset: the rows, random seed and starting time of every chunk.
+    The starting times are found by drawing only the arrival gaps of each chunk,
+    So the chunks can then be generated independently, in any order or in parallel.
+
+    :param rows:
+        Number of rows to generate.
+    :param chunksize:
+        The number of rows in each chunk. Default: 1000000.
+    :param random_state:
+        Specify for repeatablity. Default: None.
+
+    :returns:
+        List of (first row, number of rows, SeedSequence, starting time) tuples.
+    """
+    seeds = numpy.random.SeedSequence(random_state).spawn((rows + chunksize - 1) // chunksize)
+    mean_gap = KAGGLE_SECONDS / KAGGLE_ROWS
+    plan = []
+    clock = 0.0
+    for start, seed in zip(range(0, rows, chunksize), seeds):
+        n = min(chunksize, rows - start)
+        plan.append((start, n, seed, clock))
+        # The arrival gaps are the first draws of the chunk
+        clock = (clock + numpy.cumsum(numpy.random.default_rng(seed).exponential(mean_gap, n)))[-1]
+    return plan
+
+
+def generate_chunk(
+    start: int,
+    rows: int,
+    seed: numpy.random.SeedSequence,
+    clock: float,
+    fraud_rate: float=FRAUD_RATE
+) -> pandas.DataFrame:
+    """
+    Generate one chunk of synthetic transactions, see generate_transaction_chunks.
+
+    :param start:
+        The first row of the chunk, used as the start of its index.
+    :param rows:
+        Number of rows in the chunk.
+    :param seed:
+        SeedSequence of the chunk.
+    :param clock:
+        The time the arrivals of the chunk start from.
+    :param fraud_rate:
+        The probability of a row being fraud. Default: 0.00172.
+
+    :returns:
+        DataFrame with the columns Time, V1 to V28, Amount and Class.
+    """
+    rng = numpy.random.default_rng(seed)
+    shift = numpy.array([FRAUD_SHIFT.get(column, 0.0) for column in PCA_COLUMNS])
+
+    # Time: Poisson arrivals, floored to whole seconds
+    time = numpy.floor(clock + numpy.cumsum(rng.exponential(KAGGLE_SECONDS / KAGGLE_ROWS, rows)))
+
+    # Class
+    fraud = rng.random(rows) < fraud_rate
+    n_fraud = int(fraud.sum())
+
+    # PCA components
+    components = rng.standard_normal((rows, len(PCA_COLUMNS))) * PCA_STD
+    components[fraud] = shift + rng.standard_normal((n_fraud, len(PCA_COLUMNS))) * numpy.maximum(2.5 * PCA_STD, 1.0)
+
+    # Amount
+    amount = rng.lognormal(mean=3.1, sigma=1.65, size=rows)
+    amount[fraud] = rng.lognormal(mean=2.2, sigma=2.3, size=n_fraud)
+    amount[rng.random(rows) < 0.0064] = 0.0
+    amount = numpy.round(numpy.minimum(amount, 25691.16), 2)
+
+    # One block per dtype, like a DataFrame read from a csv file
+    columns = {'Time': time}
+    columns.update({column: components[:, j] for j, column in enumerate(PCA_COLUMNS)})
+    columns['Amount'] = amount
+    columns['Class'] = fraud.astype(numpy.int64)
+    return pandas.DataFrame(columns, index=pandas.RangeIndex(start, start + rows))
+
+
+def generate_transaction_chunks(
+    rows: int,
+    chunksize: int=1000000,
+    fraud_rate: float=FRAUD_RATE,
+    random_state: int=None
+):
+    """
+    Generate synthetic transactions with the schema and class imbalance of the Kaggle creditcard.csv dataset,
+    As DataFrame chunks, so any number of rows can be generated with bounded memory.
+
+    Time is in whole seconds and sorted across chunks, with arrivals at the Kaggle transaction rate.
+    V1 to V28 are independent normal components with decreasing variance, shifted and wider for fraud.
+    Amount is log-normal with a heavy right tail and about 0.6% zero amounts, and smaller for fraud.
+    Class is 1 for fraud with probability fraud_rate.
+
+    :param rows:
+        Number of rows to generate.
+    :param chunksize:
+        The number of rows in each chunk. Default: 1000000.
+    :param fraud_rate:
+        The probability of a row being fraud. Default: 0.00172.
+    :param random_state:
+        Specify for repeatablity. The same random_state and chunksize give the same rows. Default: None.
+
+    :returns:
+        Generator of pandas DataFrames with the columns Time, V1 to V28, Amount and Class.
+    """
+    for start, n, seed, clock in chunk_plan(rows=rows, chunksize=chunksize, random_state=random_state):
+        yield generate_chunk(start=start, rows=n, seed=seed, clock=clock, fraud_rate=fraud_rate)
+
+
+def write_chunk_csv(
+    csv_file_path: str,
+    start: int,
+    rows: int,
+    seed: numpy.random.SeedSequence,
+    clock: float,
+    fraud_rate: float=FRAUD_RATE,
+    header: bool=False,
+    float_format: str=None
+) -> str:
+    """
+    Generate one chunk of synthetic transactions and write it as a csv file. Runs in a worker process.
+
+    :param csv_file_path:
+        The path of the csv file to write.
+    :param header:
+        If the column names should be written. Default: False.
+    :param float_format:
+        Format string for the floats. Default: None, full precision.
+
+    The other parameters are those of generate_chunk.
+
+    :returns:
+        The path of the csv file.
+    """
+    chunk = generate_chunk(start=start, rows=rows, seed=seed, clock=clock, fraud_rate=fraud_rate)
+    chunk.to_csv(csv_file_path, index=False, header=header, float_format=float_format)
+    return csv_file_path
+
+
+def write_synthetic_csv(
+    csv_file_path: str,
+    rows: int,
+    chunksize: int=1000000,
+    fraud_rate: float=FRAUD_RATE,
+    random_state: int=None,
+    float_format: str=None,
+    n_jobs: int=1
+) -> str:
+    """
+    Write synthetic transactions as a csv file with the creditcard.csv schema, one chunk at a time.
+    Formatting the csv text is the slow part, so with n_jobs above 1 the chunks are generated and written
+    to part files by worker processes, then joined in order. The file is the same for any n_jobs.
+
+    :param csv_file_path:
+        The path of the csv file to write.
+    :param rows:
+        Number of rows to generate.
+    :param chunksize:
+        The number of rows generated and written at a time. Default: 1000000.
+    :param fraud_rate:
+        The probability of a row being fraud. Default: 0.00172.
+    :param random_state:
+        Specify for repeatablity. Default: None.
+    :param float_format:
+        Format string for the floats, e.g. '%.6f' to write smaller files. Default: None, full precision.
+    :param n_jobs:
+        The number of worker processes. Default: 1.
+
+    :returns:
+        The path of the csv file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(csv_file_path)), exist_ok=True)
+    plan = chunk_plan(rows=rows, chunksize=chunksize, random_state=random_state)
+
+    # Sequential
+    if n_jobs == 1:
+        with open(csv_file_path, 'w', newline='') as f:
+            for i, (start, n, seed, clock) in enumerate(plan):
+                chunk = generate_chunk(start=start, rows=n, seed=seed, clock=clock, fraud_rate=fraud_rate)
+                chunk.to_csv(f, index=False, header=i == 0, float_format=float_format)
+        return csv_file_path
+
+    # Parallel part files
+    part_paths = [f'{csv_file_path}.part{i}' for i in range(len(plan))]
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [
+            executor.submit(write_chunk_csv, part_path, start, n, seed, clock, fraud_rate, i == 0, float_format)
+            for i, (part_path, (start, n, seed, clock)) in enumerate(zip(part_paths, plan))
+        ]
+        for future in futures:
+            future.result()
+
+    # Join in order
+    return concat_files(part_paths=part_paths, file_path=csv_file_path)
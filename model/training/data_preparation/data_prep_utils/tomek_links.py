@@ -0,0 +1,128 @@
+import numpy
+
+
+def nearest_neighbours(
+    X: numpy.ndarray,
+    queries: numpy.ndarray,
+    algorithm: str='brute',
+    n_jobs: int=None,
+    index=None
+) -> tuple:
+    """
+    Find the nearest other sample of each queried sample.
+
+    :param X:
+        The samples: array of shape (n_samples, n_features).
+    :param queries:
+        Indices of the samples to find the nearest neighbour of.
+    :param algorithm:
+        The neighbour search algorithm of SKLearn's NearestNeighbors: 'kd_tree', 'ball_tree' or 'brute'.
+    :param n_jobs:
+        The number of parallel jobs for the search. -1 uses all processors. Default: None.
+    :param index:
+        NearestNeighbors already fitted on X, to reuse across calls. Default: None.
+
+    :returns:
+        Tuple containing the array of nearest neighbour indices and the fitted NearestNeighbors.
+    """
+    if index is None:
+        from sklearn.neighbors import NearestNeighbors
+        index = NearestNeighbors(n_neighbors=2, algorithm=algorithm, n_jobs=n_jobs).fit(X)
+    if len(queries) == 0:
+        return numpy.empty(0, dtype=numpy.intp), index
+    # The first neighbour of a sample is the sample itself
+    neighbours = index.kneighbors(X[queries], n_neighbors=2, return_distance=False)[:, 1]
+    return neighbours, index
+
+
+def find_tomek_links(
+    X,
+    y,
+    algorithm: str='brute',
+    n_jobs: int=None,
+    dtype: str='float32'
+) -> numpy.ndarray:
+    """
+    Find the non-minority samples that are in a Tomek link, as removed by imblearn's TomekLinks with its
+    default sampling strategy. A Tomek link is a pair of samples of different classes that are each other's
+    nearest neighbour.
+
+    For two classes, only minority-adjacent candidates are searched: the nearest neighbour of every minority
+    sample is found, and then the nearest neighbour of those neighbours that are not minority samples.
+    A candidate is in a link if its nearest neighbour is the minority sample that found it.
+    This needs two small batches of queries instead of a query for every sample.
+    With more than two classes, every non-minority sample is queried.
+
+    :param X:
+        The features: array-like of shape (n_samples, n_features).
+    :param y:
+        The target: array-like of shape (n_samples,).
+    :param algorithm:
+        The neighbour search algorithm: 'brute' (blocked brute force), 'kd_tree' or 'ball_tree'. Default: 'brute'.
+    :param n_jobs:
+        The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.
+    :param dtype:
+        The dtype the features are converted to for distances. 'float32' halves the memory of the search,
+        Nearest neighbours only differ from float64 for near ties. Default: 'float32'.
+
+    :returns:
+        Sorted array of the indices of the samples to remove.
+    """
+    X = numpy.ascontiguousarray(X, dtype=dtype)
+    y = numpy.asarray(y)
+    classes, counts = numpy.unique(y, return_counts=True)
+    if len(classes) < 2:
+        return numpy.empty(0, dtype=numpy.intp)
+    minority = classes[numpy.argmin(counts)]
+
+    # More than two classes: query every non-minority sample
+    if len(classes) > 2:
+        candidates = numpy.flatnonzero(y != minority)
+        candidate_nn, index = nearest_neighbours(X, candidates, algorithm=algorithm, n_jobs=n_jobs)
+        checks = numpy.flatnonzero(y[candidate_nn] != y[candidates])
+        partner_nn, _ = nearest_neighbours(X, candidate_nn[checks], index=index)
+        return numpy.sort(candidates[checks][partner_nn == candidates[checks]])
+
+    # Nearest neighbour of the minority samples
+    minority_samples = numpy.flatnonzero(y == minority)
+    minority_nn, index = nearest_neighbours(X, minority_samples, algorithm=algorithm, n_jobs=n_jobs)
+
+    # Majority samples found by a minority sample
+    found = y[minority_nn] != minority
+    candidates = numpy.unique(minority_nn[found])
+    candidate_nn, _ = nearest_neighbours(X, candidates, index=index)
+
+    # Links are mutual nearest neighbours
+    positions = numpy.minimum(numpy.searchsorted(minority_samples, candidate_nn), len(minority_samples) - 1)
+    is_link = (y[candidate_nn] == minority) & (minority_nn[positions] == candidates)
+
+    return candidates[is_link]
+
+
+def tomek_links_sample_indices(
+    X,
+    y,
+    algorithm: str='brute',
+    n_jobs: int=None,
+    dtype: str='float32'
+) -> numpy.ndarray:
+    """
+    Get the indices of the samples kept by Tomek links undersampling, like imblearn's TomekLinks sample_indices_.
+
+    :param X:
+        The features: array-like of shape (n_samples, n_features).
+    :param y:
+        The target: array-like of shape (n_samples,).
+    :param algorithm:
+        The neighbour search algorithm: 'brute', 'kd_tree' or 'ball_tree'. Default: 'brute'.
+    :param n_jobs:
+        The number of parallel jobs for the neighbour search. -1 uses all processors. Default: None.
+    :param dtype:
+        The dtype the features are converted to for distances. Default: 'float32'.
+
+    :returns:
+        Sorted array of the indices of the kept samples.
+    """
+    keep = numpy.ones(len(y), dtype=bool)
+    keep[find_tomek_links(X, y, algorithm=algorithm, n_jobs=n_jobs, dtype=dtype)] = False
+    return numpy.flatnonzero(keep)
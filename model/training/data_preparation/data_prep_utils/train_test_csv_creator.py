@@ -1,5 +1,7 @@
 import argparse
 from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from src.tracing import traced
 
 
 def train_test_csv_creator(
@@ -12,7 +14,12 @@ def train_test_csv_creator(
     sort_ascend: bool=True,
     reset_index: bool=False,
     reset_index_drop: bool=True,
-    random_state: int=None
+    random_state: int=None,
+    use_cache: bool=False,
+    chunksize: int=None,
+    compact_schema: bool=False,
+    n_shards: int=None,
+    n_jobs: int=None
 ) -> None:
     """
     Import a csv file as a Pandas DataFrame, split it into train and test sets, and export both sets as CSV files.
@@ -38,6 +45,19 @@ def train_test_csv_creator(
         If the new index column from resetting index (if reset_index=True) should be dropped. Default: True.
     :param random_state:
         Specify for repeatablity. Default: None.
+    :param use_cache:
+        If the columnar binary cache should be used to import the csv file and written for the exported csv file(s).
+        Default: False.
+    :param chunksize:
+        If specified, the split is done out of core in a single pass over chunks of this many rows. Default: None.
+    :param compact_schema:
+        If the csv file should be imported with the compact dataset schema: float32 features and an int8 target.
+        Default: False.
+    :param n_shards:
+        If specified, the csv file is parsed and the sets are written in this many shards by worker processes,
+        With the same split and files. Default: None.
+    :param n_jobs:
+        The number of worker processes when n_shards is specified. Default: None, one per shard.
     """
     # DataFrameMan
     dataframe_man = DataFrameManipulator()
@@ -53,7 +73,12 @@ def train_test_csv_creator(
         sort_ascend=sort_ascend,
         reset_index=reset_index,
         reset_index_drop=reset_index_drop,
-        random_state=random_state
+        random_state=random_state,
+        use_cache=use_cache,
+        chunksize=chunksize,
+        schema=get_schema(compact_schema),
+        n_shards=n_shards,
+        n_jobs=n_jobs
     )
 
 
@@ -108,13 +133,34 @@ def get_args() -> argparse.ArgumentParser:
         '--random_state', type=int, required=False, default=None,
         help='Specify for repeatablity. Default: None.'
         )
-    
+    parser.add_argument(
+        '--use_cache', action='store_true',
+        help='Use the columnar binary cache to import the csv file and write it for the exported csv file(s).'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=None,
+        help='If specified, split out of core in a single pass over chunks of this many rows. Default: None.'
+        )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import the csv file with the compact dataset schema: float32 features and an int8 target.'
+        )
+    parser.add_argument(
+        '--n_shards', type=int, required=False, default=None,
+        help='If specified, parse and write the sets in this many shards with worker processes. Default: None.'
+        )
+    parser.add_argument(
+        '--n_jobs', type=int, required=False, default=None,
+        help='The number of worker processes when n_shards is specified. Default: one per shard.'
+        )
+
     # Parse args
     args = parser.parse_args()
 
     return args
 
 
+@traced(category='cli')
 def main() -> None:
     """
     Main entry point to create train and test files.
@@ -134,7 +180,12 @@ def main() -> None:
         sort_ascend=args.sort_ascend,
         reset_index=args.reset_index,
         reset_index_drop=args.reset_index_drop,
-        random_state=args.random_state
+        random_state=args.random_state,
+        use_cache=args.use_cache,
+        chunksize=args.chunksize,
+        compact_schema=args.compact_schema,
+        n_shards=args.n_shards,
+        n_jobs=args.n_jobs
     )
 
 
@@ -6,16 +6,36 @@ from model.training.modelling.model_classes.voting_classifier_model import Votin
 
 @timing_decorator
 def create(
-    clf_path='../../classifiers'
+    clf_path='../../classifiers',
+    knn_backend='exact',
+    knn_params=None,
+    svm_backend='exact',
+    svm_params=None,
+    n_jobs=None,
+    parallel_backend='loky'
 ) -> None:
     """
     Create the voting classifier model instance. Export the model as a pickle file.
 
     :param clf_path:
         The folder path to save the pickled model.
+    :param knn_backend:
+        The nearest neighbour backend of the KNN classifier: 'exact', 'kd_tree', 'ball_tree', 'ivf' or 'condensed'.
+    :param knn_params:
+        Dictionary of other parameters of the KNN backend, e.g. {'n_probe': 16} for 'ivf'.
+    :param svm_backend:
+        The SVM classifier: 'exact', 'nystroem', 'rff' or 'reduced'.
+    :param svm_params:
+        Dictionary of other parameters of the SVM backend, e.g. {'n_vectors': 100} for 'reduced'.
+    :param n_jobs:
+        The number of parallel workers fitting the model. -1 uses every core. Default: None, one.
+    :param parallel_backend:
+        The joblib backend of the workers: 'loky' or 'multiprocessing' for processes, 'threading' for threads.
     """
     # Model instance
-    clf = VotingClassifierModel(random_state=42)
+    clf = VotingClassifierModel(random_state=42, knn_backend=knn_backend, knn_params=knn_params,
+                                svm_backend=svm_backend, svm_params=svm_params,
+                                n_jobs=n_jobs, parallel_backend=parallel_backend)
 
     # Create directory if it doesn't exist
     os.makedirs(clf_path, exist_ok=True)
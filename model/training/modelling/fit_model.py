@@ -4,10 +4,14 @@ from model.training.modelling.modelling_utils.csv_fitter import csv_fitter
 @timing_decorator
 def fit(
     clf_path = '../../classifiers',
-    data_location = '../../../data/processed'
+    data_location = '../../../data/processed',
+    compact_schema = False,
+    export_artifact = False
 ) -> None:
     """
     Function to fit the voting clf imported from a pickle file and export it.
+    Set compact_schema to fit on float32 features and an int8 target.
+    Set export_artifact to also save its fitted state as a memory mappable model artifact, fitted_model.artifact.
     """
     # Fit and export model
     csv_fitter(
@@ -15,7 +19,9 @@ def fit(
         data_file='processed_train.csv',
         data_location=data_location,
         target_variable='Class',
-        import_dir=clf_path
+        import_dir=clf_path,
+        compact_schema=compact_schema,
+        export_artifact=export_artifact
     )
 
 
@@ -0,0 +1,184 @@
+import numpy
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.utils.validation import check_array, check_is_fitted
+from model.training.modelling.model_classes.fast_voting_classifier import nearest_neighbours, ivf_nearest
+
+
+# Neighbour backends of the KNN member of VotingClassifierModel
+KNN_BACKENDS = ('exact', 'kd_tree', 'ball_tree', 'ivf', 'condensed')
+
+
+class IVFNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """
+    An approximate 1-nearest neighbour classifier with an inverted file index: the training rows are clustered
+    With mini-batch k-means into n_lists lists, and each query is only compared with the rows of the n_probe
+    Lists with the nearest centroids. More probes are slower and closer to the exact nearest neighbour.
+    """
+    def __init__(
+        self,
+        n_lists: int=None,
+        n_probe: int=8,
+        p: float=1,
+        random_state: int=None
+    ):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.p = p
+        self.random_state = random_state
+
+    def fit(self, X, y) -> object:
+        """
+        Cluster the training rows into lists.
+
+        :param X:
+            The input data: array-like, shape(n_samples, n_features).
+        :param y:
+            The labels for the input data: array-like, shape (n_samples,)
+
+        :returns:
+            An instance of self.
+        """
+        X = check_array(X, dtype=numpy.float64)
+        self.classes_, y = numpy.unique(y, return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        n_lists = min(self.n_lists or max(1, int(numpy.sqrt(len(X)))), len(X))
+
+        # Lists of training rows, stored contiguously list by list
+        from sklearn.cluster import MiniBatchKMeans
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, n_init=3, random_state=self.random_state).fit(X)
+        order = numpy.argsort(kmeans.labels_, kind='stable')
+        self.centroids_ = kmeans.cluster_centers_
+        self.X_ = X[order]
+        self.y_ = y[order]
+        self.offsets_ = numpy.concatenate([[0], numpy.cumsum(numpy.bincount(kmeans.labels_, minlength=n_lists))])
+        return self
+
+    def predict(self, X):
+        """
+        Predict the labels of the nearest training rows found in the probed lists.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            The predicted labels for the input data: array-like, shape (n_samples,)
+        """
+        check_is_fitted(self, 'centroids_')
+        X = check_array(X, dtype=numpy.float64)
+        best_index = ivf_nearest(X, centroids=self.centroids_, X_lists=self.X_, offsets=self.offsets_,
+                                 n_probe=self.n_probe, p=self.p)
+        return self.classes_[self.y_[best_index]]
+
+
+class CondensedNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """
+    A 1-nearest neighbour classifier of the prototypes of a condensed nearest neighbour (Hart) reduction
+    Of the training rows: the rows that the prototypes chosen so far misclassify are added as prototypes,
+    Over passes of the rows in a random order, until a pass adds none. The rows are classified in blocks,
+    Adding the misclassified rows of a block together, so a few more prototypes may be kept than one at a time.
+    The prototypes then classify every training row correctly, with far fewer rows to search.
+    """
+    def __init__(
+        self,
+        p: float=1,
+        algorithm: str='auto',
+        block_size: int=1000,
+        max_passes: int=10,
+        random_state: int=None
+    ):
+        self.p = p
+        self.algorithm = algorithm
+        self.block_size = block_size
+        self.max_passes = max_passes
+        self.random_state = random_state
+
+    def fit(self, X, y) -> object:
+        """
+        Choose the prototypes and fit a 1-nearest neighbour classifier on them.
+
+        :param X:
+            The input data: array-like, shape(n_samples, n_features).
+        :param y:
+            The labels for the input data: array-like, shape (n_samples,)
+
+        :returns:
+            An instance of self.
+        """
+        X = check_array(X, dtype=numpy.float64)
+        self.classes_, y = numpy.unique(y, return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        rng = numpy.random.default_rng(self.random_state)
+        order = rng.permutation(len(X))
+
+        # One prototype of each class to start with
+        prototypes = [order[numpy.flatnonzero(y[order] == label)[0]] for label in range(len(self.classes_))]
+        is_prototype = numpy.zeros(len(X), dtype=bool)
+        is_prototype[prototypes] = True
+
+        # Passes over the rows, adding the misclassified rows of each block
+        for _ in range(self.max_passes):
+            added = 0
+            for start in range(0, len(order), self.block_size):
+                block = order[start:start + self.block_size]
+                block = block[~is_prototype[block]]
+                if not len(block):
+                    continue
+                index, _ = nearest_neighbours(X[block], X[prototypes], p=self.p)
+                wrong = block[y[numpy.asarray(prototypes)[index]] != y[block]]
+                prototypes.extend(wrong.tolist())
+                is_prototype[wrong] = True
+                added += len(wrong)
+            if not added:
+                break
+
+        self.prototype_indices_ = numpy.sort(numpy.asarray(prototypes))
+        from sklearn.neighbors import KNeighborsClassifier
+        self.knn_ = KNeighborsClassifier(n_neighbors=1, p=self.p, algorithm=self.algorithm).fit(
+            X[self.prototype_indices_], self.classes_[y[self.prototype_indices_]]
+        )
+        return self
+
+    def predict(self, X):
+        """
+        Predict the labels of the nearest prototypes.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            The predicted labels for the input data: array-like, shape (n_samples,)
+        """
+        check_is_fitted(self, 'knn_')
+        return self.knn_.predict(X)
+
+
+def make_knn_classifier(
+    backend: str='exact',
+    random_state: int=None,
+    **params
+):
+    """
+    Create the 1-nearest neighbour member of VotingClassifierModel with an L1 distance and a neighbour backend.
+
+    :param backend:
+        'exact' for SKLearn's KNeighborsClassifier choosing its own search, 'kd_tree' or 'ball_tree' for a
+        KNeighborsClassifier with a tree built when fitting, 'ivf' for the approximate IVFNeighborsClassifier,
+        Or 'condensed' for the prototypes of CondensedNeighborsClassifier. Default: 'exact'.
+    :param random_state:
+        Random state of the 'ivf' and 'condensed' backends. Default: None.
+    :param params:
+        Other parameters of the backend's classifier, e.g. leaf_size for the trees or n_probe for 'ivf'.
+
+    :returns:
+        The unfitted classifier.
+    """
+    from sklearn.neighbors import KNeighborsClassifier
+    if backend == 'exact':
+        return KNeighborsClassifier(n_neighbors=1, p=1, **params)
+    if backend in ('kd_tree', 'ball_tree'):
+        return KNeighborsClassifier(n_neighbors=1, p=1, algorithm=backend, **params)
+    if backend == 'ivf':
+        return IVFNeighborsClassifier(p=1, random_state=random_state, **params)
+    if backend == 'condensed':
+        return CondensedNeighborsClassifier(p=1, random_state=random_state, **params)
+    raise ValueError(f'knn_backend must be one of {KNN_BACKENDS}, got {backend}')
@@ -0,0 +1,128 @@
+import json
+import mmap
+import pickle
+import struct
+import numpy
+from model.training.modelling.model_classes.fast_voting_classifier import FastVotingClassifier
+
+
+ARTIFACT_FILE_NAME = 'fitted_model.artifact'
+ARTIFACT_MAGIC = b'FRAUDART'
+ARTIFACT_FORMAT_VERSION = 1
+
+# Arrays start at multiples of this many bytes, so they can be viewed in place
+ARTIFACT_ALIGNMENT = 64
+
+# Members of FastVotingClassifier stored in the artifact
+ARTIFACT_MEMBERS = ('svm', 'knn', 'bagging')
+
+
+def save_artifact(
+    fast_clf: FastVotingClassifier,
+    file_path: str
+) -> None:
+    """
+    Save the fitted state of a compiled voting classifier as a model artifact: the magic bytes 'FRAUDART',
+    The length of a JSON header as a little-endian uint64, the JSON header, and then the raw bytes of every array
+    At aligned offsets. The header has the format version, the scalar parameters of the members and the dtype,
+    Shape and offset of every array, so the arrays can be memory mapped without parsing or copying them.
+
+    :param fast_clf:
+        FastVotingClassifier, see VotingClassifierModel.compile.
+    :param file_path:
+        Path of the artifact file.
+    """
+    # Scalar parameters and arrays of the members, by dotted name
+    params = {}
+    arrays = {'classes': numpy.asarray(fast_clf.classes)}
+    for member in ARTIFACT_MEMBERS:
+        for key, value in getattr(fast_clf, member).items():
+            if isinstance(value, numpy.ndarray):
+                arrays[f'{member}.{key}'] = value
+            elif isinstance(value, (int, float, numpy.integer, numpy.floating)):
+                params[f'{member}.{key}'] = value.item() if isinstance(value, numpy.generic) else value
+            else:
+                raise ValueError(f'{member}.{key} of type {type(value).__name__} cannot be saved as an artifact, '
+                                 f'only arrays and numbers can')
+
+    # Array table, with the offsets after the header
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f'{name} of dtype object cannot be saved as an artifact')
+        offset = -(-offset // ARTIFACT_ALIGNMENT) * ARTIFACT_ALIGNMENT
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = {'version': ARTIFACT_FORMAT_VERSION, 'model': type(fast_clf).__name__, 'params': params, 'arrays': table}
+
+    # Header padded so the arrays start aligned
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(ARTIFACT_MAGIC) + 8 + len(header_bytes)) // ARTIFACT_ALIGNMENT) * ARTIFACT_ALIGNMENT
+    header_bytes += b' ' * (data_start - len(ARTIFACT_MAGIC) - 8 - len(header_bytes))
+
+    with open(file_path, 'wb') as f:
+        f.write(ARTIFACT_MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.write(b'\0' * (data_start + table[name]['offset'] - f.tell()))
+            f.write(numpy.ascontiguousarray(array).tobytes())
+
+
+def load_artifact(file_path: str) -> FastVotingClassifier:
+    """
+    Load a model artifact saved with save_artifact. The file is memory mapped and the arrays are read-only views
+    Of it, so loading takes about as long as parsing the header, and processes loading the same file share its pages.
+
+    :param file_path:
+        Path of the artifact file.
+
+    :returns:
+        FastVotingClassifier with the predictions of the saved model.
+    """
+    with open(file_path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC:
+        raise ValueError(f'{file_path} is not a model artifact')
+    (header_length,) = struct.unpack('<Q', buffer[len(ARTIFACT_MAGIC):len(ARTIFACT_MAGIC) + 8])
+    data_start = len(ARTIFACT_MAGIC) + 8 + header_length
+    header = json.loads(buffer[len(ARTIFACT_MAGIC) + 8:data_start])
+    if header.get('version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f'{file_path} has artifact format version {header.get("version")}, '
+                         f'this version reads {ARTIFACT_FORMAT_VERSION}')
+
+    # Members from the arrays and scalar parameters
+    members = {member: {} for member in ARTIFACT_MEMBERS}
+    classes = None
+    for name, entry in header['arrays'].items():
+        dtype = numpy.dtype(entry['dtype'])
+        count = int(numpy.prod(entry['shape'], dtype=numpy.int64))
+        array = numpy.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + entry['offset']) if count \
+            else numpy.empty(0, dtype=dtype)
+        array = array.reshape(entry['shape'])
+        if name == 'classes':
+            classes = array
+        else:
+            member, key = name.split('.', 1)
+            members[member][key] = array
+    for name, value in header['params'].items():
+        member, key = name.split('.', 1)
+        members[member][key] = value
+
+    return FastVotingClassifier(classes=classes, **members)
+
+
+def load_model(file_path: str):
+    """
+    Load a fitted model from a model artifact or a pickle file, whichever the file is.
+
+    :param file_path:
+        Path of the model artifact or pickle file.
+
+    :returns:
+        The FastVotingClassifier of a model artifact, or the unpickled model.
+    """
+    with open(file_path, 'rb') as f:
+        if f.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+            f.seek(0)
+            return pickle.load(f)
+    return load_artifact(file_path)
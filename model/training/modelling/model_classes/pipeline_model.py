@@ -1,8 +1,5 @@
 from src.utils import timing_decorator
-from sklearn.preprocessing import RobustScaler
-from imblearn.under_sampling import RandomUnderSampler, TomekLinks
 from model.training.modelling.model_classes.voting_classifier_model import VotingClassifierModel
-from imblearn.pipeline import Pipeline
 
 
 class PipelineModel:
@@ -14,6 +11,10 @@ class PipelineModel:
     Voting Classifier(SVM+KNN+Bagging(LogReg))
     """
     def __init__(self, random_state: int=None):
+        # SKLearn and imblearn are imported when a model is created, not with this module
+        from sklearn.preprocessing import RobustScaler
+        from imblearn.under_sampling import RandomUnderSampler, TomekLinks
+        from imblearn.pipeline import Pipeline
         self.scaler = RobustScaler()
         self.rus = RandomUnderSampler(random_state=random_state)
         self.tl = TomekLinks()
@@ -0,0 +1,380 @@
+import time
+import numpy
+from scipy.spatial.distance import cdist
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.utils.validation import check_array, check_is_fitted
+
+
+# SVM backends of the SVM member of VotingClassifierModel
+SVM_BACKENDS = ('exact', 'nystroem', 'rff', 'reduced')
+
+
+def rbf_gamma(
+    gamma,
+    n_features: int
+) -> float:
+    """
+    Get the RBF kernel coefficient like SVC does for gamma='auto'.
+
+    :param gamma:
+        'auto' for 1 / n_features, or a float.
+    :param n_features:
+        Number of features.
+
+    :returns:
+        The kernel coefficient.
+    """
+    return 1.0 / n_features if gamma == 'auto' else float(gamma)
+
+
+class KernelExpansionSVC(ClassifierMixin, BaseEstimator):
+    """
+    Base class of the SVM approximations whose decision value is an RBF kernel expansion like an SVC's,
+    Sum of dual_coef_ * exp(-gamma_ * |x - v|^2) over the rows v of support_vectors_, plus intercept_,
+    But over far fewer vectors. The second class is predicted when the decision value is not negative.
+    FastVotingClassifier compiles them like an SVC.
+    """
+    kernel = 'rbf'
+
+    def decision_function(self, X) -> numpy.ndarray:
+        """
+        Get the decision values, positive for the second class.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            Array of decision values, shape (n_samples,)
+        """
+        check_is_fitted(self, 'support_vectors_')
+        X = check_array(X, dtype=numpy.float64)
+        kernel = numpy.exp(-self.gamma_ * cdist(X, self.support_vectors_, 'sqeuclidean'))
+        return kernel @ self.dual_coef_[0] + self.intercept_[0]
+
+    def predict(self, X):
+        """
+        Predict the labels for the input data.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            The predicted labels for the input data: array-like, shape (n_samples,)
+        """
+        return self.classes_[(self.decision_function(X) >= 0).astype(numpy.intp)]
+
+
+class NystroemSVC(KernelExpansionSVC):
+    """
+    A linear SVM on a Nyström approximation of the RBF kernel, with n_components training rows as landmarks.
+    The features of the approximation are the kernel values of the landmarks times a normalisation matrix,
+    So the fitted linear model folds back into a kernel expansion over the landmarks alone.
+    """
+    def __init__(
+        self,
+        n_components: int=200,
+        C: float=100,
+        gamma='auto',
+        max_iter: int=5000,
+        random_state: int=None
+    ):
+        self.n_components = n_components
+        self.C = C
+        self.gamma = gamma
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def fit(self, X, y) -> object:
+        """
+        Fit the Nyström features and the linear SVM, and fold them into a kernel expansion.
+
+        :param X:
+            The input data: array-like, shape(n_samples, n_features).
+        :param y:
+            The labels for the input data: array-like, shape (n_samples,)
+
+        :returns:
+            An instance of self.
+        """
+        X = check_array(X, dtype=numpy.float64)
+        self.classes_ = numpy.unique(y)
+        if len(self.classes_) != 2:
+            raise ValueError(f'{type(self).__name__} supports two classes, got {len(self.classes_)}')
+        self.n_features_in_ = X.shape[1]
+        self.gamma_ = rbf_gamma(self.gamma, X.shape[1])
+
+        from sklearn.kernel_approximation import Nystroem
+        from sklearn.svm import LinearSVC
+        nystroem = Nystroem(
+            gamma=self.gamma_, n_components=min(self.n_components, len(X)), random_state=self.random_state
+        ).fit(X)
+        linear_svc = LinearSVC(C=self.C, max_iter=self.max_iter, random_state=self.random_state).fit(
+            nystroem.transform(X), y
+        )
+
+        self.support_vectors_ = numpy.ascontiguousarray(nystroem.components_, dtype=numpy.float64)
+        self.dual_coef_ = (nystroem.normalization_.T @ linear_svc.coef_[0]).reshape(1, -1)
+        self.intercept_ = linear_svc.intercept_.astype(numpy.float64)
+        return self
+
+
+class ReducedSetSVC(KernelExpansionSVC):
+    """
+    An SVC reduced to n_vectors kernel centres: the exact SVC is fitted, its support vectors are clustered with
+    K-means weighted by the sizes of their dual coefficients, and new coefficients and intercept of the
+    Cluster centres are fitted by ridge least squares to the decision values of the exact SVC on the training rows.
+    With no more support vectors than n_vectors, the exact SVC is kept as it is.
+    """
+    def __init__(
+        self,
+        n_vectors: int=100,
+        C: float=100,
+        gamma='auto',
+        ridge: float=1e-6,
+        random_state: int=None
+    ):
+        self.n_vectors = n_vectors
+        self.C = C
+        self.gamma = gamma
+        self.ridge = ridge
+        self.random_state = random_state
+
+    def fit(self, X, y) -> object:
+        """
+        Fit the exact SVC and reduce its support vectors.
+
+        :param X:
+            The input data: array-like, shape(n_samples, n_features).
+        :param y:
+            The labels for the input data: array-like, shape (n_samples,)
+
+        :returns:
+            An instance of self.
+        """
+        X = check_array(X, dtype=numpy.float64)
+        self.classes_ = numpy.unique(y)
+        if len(self.classes_) != 2:
+            raise ValueError(f'{type(self).__name__} supports two classes, got {len(self.classes_)}')
+        self.n_features_in_ = X.shape[1]
+        self.gamma_ = rbf_gamma(self.gamma, X.shape[1])
+
+        from sklearn.cluster import KMeans
+        from sklearn.svm import SVC
+        svc = SVC(C=self.C, gamma=self.gamma_, random_state=self.random_state).fit(X, y)
+        self.n_support_exact_ = len(svc.support_vectors_)
+        if self.n_support_exact_ <= self.n_vectors:
+            self.support_vectors_ = numpy.ascontiguousarray(svc.support_vectors_, dtype=numpy.float64)
+            self.dual_coef_ = svc.dual_coef_.astype(numpy.float64)
+            self.intercept_ = svc.intercept_.astype(numpy.float64)
+            return self
+
+        # Kernel centres: clusters of the support vectors, weighted by the sizes of their coefficients
+        kmeans = KMeans(n_clusters=self.n_vectors, n_init=1, random_state=self.random_state).fit(
+            svc.support_vectors_, sample_weight=numpy.abs(svc.dual_coef_[0])
+        )
+        centres = numpy.ascontiguousarray(kmeans.cluster_centers_, dtype=numpy.float64)
+
+        # Coefficients and intercept matching the exact decision values, the intercept not penalised
+        kernel = numpy.exp(-self.gamma_ * cdist(X, centres, 'sqeuclidean'))
+        design = numpy.hstack([kernel, numpy.ones((len(X), 1))])
+        penalty = numpy.full(design.shape[1], self.ridge * len(X))
+        penalty[-1] = 0.0
+        solution = numpy.linalg.solve(design.T @ design + numpy.diag(penalty), design.T @ svc.decision_function(X))
+
+        self.support_vectors_ = centres
+        self.dual_coef_ = solution[:-1].reshape(1, -1)
+        self.intercept_ = solution[-1:]
+        return self
+
+
+class RandomFourierSVC(ClassifierMixin, BaseEstimator):
+    """
+    A linear SVM on n_components random Fourier features of the RBF kernel, sqrt(2 / n_components) *
+    Cos(x @ random_weights_ + random_offset_). The cost of a prediction does not depend on the training data.
+    """
+    kernel = 'rbf'
+
+    def __init__(
+        self,
+        n_components: int=300,
+        C: float=100,
+        gamma='auto',
+        max_iter: int=5000,
+        random_state: int=None
+    ):
+        self.n_components = n_components
+        self.C = C
+        self.gamma = gamma
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def fit(self, X, y) -> object:
+        """
+        Draw the random features and fit the linear SVM on them.
+
+        :param X:
+            The input data: array-like, shape(n_samples, n_features).
+        :param y:
+            The labels for the input data: array-like, shape (n_samples,)
+
+        :returns:
+            An instance of self.
+        """
+        X = check_array(X, dtype=numpy.float64)
+        self.classes_ = numpy.unique(y)
+        if len(self.classes_) != 2:
+            raise ValueError(f'{type(self).__name__} supports two classes, got {len(self.classes_)}')
+        self.n_features_in_ = X.shape[1]
+        self.gamma_ = rbf_gamma(self.gamma, X.shape[1])
+
+        from sklearn.kernel_approximation import RBFSampler
+        from sklearn.svm import LinearSVC
+        sampler = RBFSampler(gamma=self.gamma_, n_components=self.n_components, random_state=self.random_state).fit(X)
+        self.random_weights_ = numpy.ascontiguousarray(sampler.random_weights_, dtype=numpy.float64)
+        self.random_offset_ = numpy.ascontiguousarray(sampler.random_offset_, dtype=numpy.float64)
+        linear_svc = LinearSVC(C=self.C, max_iter=self.max_iter, random_state=self.random_state).fit(
+            self.transform(X), y
+        )
+        self.coef_ = linear_svc.coef_.astype(numpy.float64)
+        self.intercept_ = linear_svc.intercept_.astype(numpy.float64)
+        return self
+
+    def transform(self, X) -> numpy.ndarray:
+        """
+        Get the random Fourier features.
+
+        :param X:
+            2D float64 array of the input data.
+
+        :returns:
+            2D array of the features, shape (n_samples, n_components).
+        """
+        features = X @ self.random_weights_
+        features += self.random_offset_
+        numpy.cos(features, out=features)
+        features *= numpy.sqrt(2.0 / self.random_weights_.shape[1])
+        return features
+
+    def decision_function(self, X) -> numpy.ndarray:
+        """
+        Get the decision values, positive for the second class.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            Array of decision values, shape (n_samples,)
+        """
+        check_is_fitted(self, 'coef_')
+        X = check_array(X, dtype=numpy.float64)
+        return self.transform(X) @ self.coef_[0] + self.intercept_[0]
+
+    def predict(self, X):
+        """
+        Predict the labels for the input data.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            The predicted labels for the input data: array-like, shape (n_samples,)
+        """
+        return self.classes_[(self.decision_function(X) >= 0).astype(numpy.intp)]
+
+
+def make_svm_classifier(
+    backend: str='exact',
+    random_state: int=None,
+    **params
+):
+    """
+    Create the RBF SVM member of VotingClassifierModel with C=100 and gamma='auto', exact or accelerated.
+
+    :param backend:
+        'exact' for SKLearn's SVC, 'nystroem' for the Nyström landmarks of NystroemSVC, 'rff' for the random
+        Fourier features of RandomFourierSVC, or 'reduced' for the support vectors of the exact SVC reduced to
+        Cluster centres by ReducedSetSVC. Default: 'exact'.
+    :param random_state:
+        Random state of the classifier. Default: None.
+    :param params:
+        Other parameters of the backend's classifier, e.g. n_components for 'nystroem' and 'rff',
+        Or n_vectors for 'reduced'.
+
+    :returns:
+        The unfitted classifier.
+    """
+    if backend == 'exact':
+        from sklearn.svm import SVC
+        return SVC(**{'C': 100, 'degree': 2, 'gamma': 'auto', 'random_state': random_state, **params})
+    if backend == 'nystroem':
+        return NystroemSVC(random_state=random_state, **params)
+    if backend == 'rff':
+        return RandomFourierSVC(random_state=random_state, **params)
+    if backend == 'reduced':
+        return ReducedSetSVC(random_state=random_state, **params)
+    raise ValueError(f'svm_backend must be one of {SVM_BACKENDS}, got {backend}')
+
+
+def svm_fidelity_report(
+    X_train,
+    y_train,
+    X_test,
+    y_test,
+    backends: list=None,
+    random_state: int=None
+) -> dict:
+    """
+    Compare the SVM approximations with the exact SVC on a test set: the share of test predictions the same as
+    The exact SVC's, recall and specificity of the second class with their differences from the exact SVC's,
+    The number of kernel centres or random features each prediction evaluates, fit seconds and rows predicted per second.
+
+    :param X_train:
+        The training data: array-like, shape (n_samples, n_features).
+    :param y_train:
+        The training labels, 1 for fraud.
+    :param X_test:
+        The test data: array-like, shape (n_samples, n_features).
+    :param y_test:
+        The test labels, 1 for fraud.
+    :param backends:
+        List of backends or (name, backend, params) tuples to compare with 'exact'. Default: every backend.
+    :param random_state:
+        Specify for repeatablity. Default: None.
+
+    :returns:
+        Dictionary of the results of each backend, 'exact' first.
+    """
+    X_test = numpy.asarray(X_test, dtype=numpy.float64)
+    y_test = numpy.asarray(y_test) == 1
+    configs = [('exact', 'exact', {})]
+    for config in (backends or SVM_BACKENDS):
+        config = (config, config, {}) if isinstance(config, str) else config
+        if config[0] != 'exact':
+            configs.append(config)
+
+    report = {}
+    exact_pred = None
+    for name, backend, params in configs:
+        clf = make_svm_classifier(backend=backend, random_state=random_state, **params)
+        start = time.perf_counter()
+        clf.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        pred = clf.predict(X_test) == 1
+        predict_seconds = time.perf_counter() - start
+        if exact_pred is None:
+            exact_pred = pred
+
+        recall = float((pred & y_test).sum() / max(y_test.sum(), 1))
+        specificity = float((~pred & ~y_test).sum() / max((~y_test).sum(), 1))
+        report[name] = {
+            'size': len(clf.support_vectors_) if hasattr(clf, 'support_vectors_') else clf.random_weights_.shape[1],
+            'fit_seconds': round(fit_seconds, 3),
+            'rows_per_second': round(len(X_test) / max(predict_seconds, 1e-9), 1),
+            'agreement': float((pred == exact_pred).mean()),
+            'recall': recall,
+            'specificity': specificity,
+            'recall_delta': recall - report.get('exact', {}).get('recall', recall),
+            'specificity_delta': specificity - report.get('exact', {}).get('specificity', specificity)
+        }
+    return report
@@ -1,22 +1,34 @@
 from src.utils import timing_decorator
-from sklearn.ensemble import BaggingClassifier, VotingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
+from model.training.modelling.model_classes.fast_voting_classifier import FastVotingClassifier
 
 
 class VotingClassifierModel:
     """
     A class that creates a voting classifier model consisting of an SVM classifier, a KNN classifier,
     and a bagging classifier.
+    The 1-nearest neighbour search of the KNN classifier is chosen with knn_backend, see make_knn_classifier:
+    'exact' (default), 'kd_tree', 'ball_tree', the approximate 'ivf', or the prototypes of 'condensed',
+    With other parameters of the backend in knn_params.
+    The SVM classifier is chosen with svm_backend, see make_svm_classifier: the 'exact' SVC (default),
+    Or the faster approximations 'nystroem', 'rff' and 'reduced', with other parameters of the backend in svm_params.
+    Fitting runs the members, and the logistic regressions of the bagging classifier, in n_jobs parallel workers
+    Of joblib's parallel_backend: 'loky' or 'multiprocessing' for processes, or 'threading' for threads.
+    The workers only apply to fit, and the random states of the bagging estimators are drawn before they start,
+    So the fitted model and its predictions are the same for any n_jobs and backend.
     """
-    def __init__(self, random_state: int=None):
-        self.svm_clf = SVC(C=100,
-                           degree=2,
-                           gamma='auto',
-                           random_state=random_state)
-        self.knn_clf = KNeighborsClassifier(n_neighbors=1,
-                                            p=1)
+    def __init__(self, random_state: int=None, knn_backend: str='exact', knn_params: dict=None,
+                 svm_backend: str='exact', svm_params: dict=None, n_jobs: int=None, parallel_backend: str='loky'):
+        # SKLearn estimators and the backends are imported when a model is created, not with this module
+        from sklearn.ensemble import BaggingClassifier, VotingClassifier
+        from sklearn.linear_model import LogisticRegression
+        from model.training.modelling.model_classes.knn_backends import make_knn_classifier
+        from model.training.modelling.model_classes.svm_backends import make_svm_classifier
+        self.svm_clf = make_svm_classifier(backend=svm_backend,
+                                           random_state=random_state,
+                                           **(svm_params or {}))
+        self.knn_clf = make_knn_classifier(backend=knn_backend,
+                                           random_state=random_state,
+                                           **(knn_params or {}))
         self.bagging_estimator = LogisticRegression(C=100,
                                                          max_iter=500,
                                                          random_state=random_state)
@@ -27,6 +39,9 @@ class VotingClassifierModel:
         self.voting_clf = VotingClassifier(estimators=[('svm', self.svm_clf),
                                                        ('knn', self.knn_clf),
                                                        ('bagging', self.bagging_clf)])
+        self.n_jobs = n_jobs
+        self.parallel_backend = parallel_backend
+        self.fast_clf = None
 
     @timing_decorator
     def fit(self, X, y) -> object:
@@ -41,7 +56,19 @@ class VotingClassifierModel:
         :returns:
             An instance of self.
         """
-        self.voting_clf.fit(X, y)
+        # The members take the workers of the context, and the bagging classifier asks for its own,
+        # Which are threads within a process worker. Both only while fitting
+        from joblib import parallel_config
+        n_jobs = getattr(self, 'n_jobs', None)
+        self.bagging_clf.n_jobs = n_jobs
+        try:
+            with parallel_config(backend=getattr(self, 'parallel_backend', 'loky'), n_jobs=n_jobs):
+                self.voting_clf.fit(X, y)
+        finally:
+            self.bagging_clf.n_jobs = None
+        # Predict with one job, so the bagging probabilities are added in the order of the estimators
+        self.voting_clf.estimators_[2].n_jobs = None
+        self.fast_clf = None
         return self
 
     @timing_decorator
@@ -69,3 +96,42 @@ class VotingClassifierModel:
             The class probabilities for the input data: array-like, shape (n_samples, n_classes).
         """
         return self.voting_clf.predict_proba(X)
+
+    def compile(self) -> FastVotingClassifier:
+        """
+        Compile the fitted estimators into plain NumPy arrays for predict_one and predict_fast.
+        Models pickled before compiling are compiled on their first fast prediction.
+
+        :returns:
+            The compiled FastVotingClassifier.
+        """
+        self.fast_clf = FastVotingClassifier.from_voting_classifier(self.voting_clf)
+        return self.fast_clf
+
+    def predict_fast(self, X):
+        """
+        Predict the labels for a small batch of input data with the compiled estimators,
+        Without input validation or timing. The labels are the same as predict's.
+
+        :param X:
+            The input data: array-like, shape (n_samples, n_features).
+
+        :returns:
+            The predicted labels for the input data: array, shape (n_samples,)
+        """
+        fast_clf = getattr(self, 'fast_clf', None) or self.compile()
+        return fast_clf.predict(X)
+
+    def predict_one(self, x):
+        """
+        Predict the label of one transaction with the compiled estimators,
+        Without input validation or timing. The label is the same as predict's.
+
+        :param x:
+            The features of the transaction: array-like, shape (n_features,).
+
+        :returns:
+            The predicted label.
+        """
+        fast_clf = getattr(self, 'fast_clf', None) or self.compile()
+        return fast_clf.predict_one(x)
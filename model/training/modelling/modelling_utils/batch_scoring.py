@@ -0,0 +1,194 @@
+import os
+import time
+import numpy
+import pandas
+from model.training.data_preparation.data_prep_utils.sharded_prep import csv_shard_ranges, read_csv_shard
+from model.training.data_preparation.data_prep_utils.streaming_robust_scaler import StreamingRobustScaler
+from src.tracing import traced, add_span_attributes
+
+
+# The model and scaler of this process, loaded once by load_scorer and used for every chunk it scores
+SCORER = {'model': None, 'scaler': None}
+
+
+def csv_chunk_ranges(
+    csv_file_path: str,
+    chunksize: int=100000,
+    sample_lines: int=1000
+) -> tuple:
+    """
+    Split a csv file into byte ranges of whole lines of about chunksize rows each,
+    From the mean line length of its first lines, so the rows are not counted first.
+
+    :param csv_file_path:
+        Path of the csv file.
+    :param chunksize:
+        The number of rows in each chunk, approximately. Default: 100000.
+    :param sample_lines:
+        The number of lines to find the mean line length from. Default: 1000.
+
+    :returns:
+        Tuple containing the header line as bytes and the list of (start, end) byte offsets of the chunks.
+    """
+    size = os.path.getsize(csv_file_path)
+    with open(csv_file_path, 'rb') as f:
+        header = f.readline()
+        lines = [len(line) for _, line in zip(range(sample_lines), f)]
+    line_bytes = sum(lines) / len(lines) if lines else 1
+    n_chunks = max(1, int(numpy.ceil((size - len(header)) / line_bytes / chunksize)))
+    return csv_shard_ranges(csv_file_path=csv_file_path, n_shards=n_chunks)
+
+
+def scoring_estimator(model):
+    """
+    Get the estimator that makes the predictions of a pickled model. The model classes of this repository wrap
+    a SKLearn or imblearn estimator, whose predict methods are used directly so chunks are not timed and printed.
+
+    :param model:
+        Fitted model, such as a VotingClassifierModel, a PipelineModel or an estimator.
+
+    :returns:
+        The estimator.
+    """
+    for attribute in ('voting_clf', 'pipeline'):
+        if hasattr(model, attribute):
+            return getattr(model, attribute)
+    return model
+
+
+def load_scorer(
+    model_file_path: str,
+    scaler_json: str=None
+) -> None:
+    """
+    Load a fitted model and the scaler of its training data for scoring in this process.
+    The initializer of the worker processes, so each loads them once.
+
+    :param model_file_path:
+        Path of the pickled fitted model, or of its model artifact.
+    :param scaler_json:
+        Path of the StreamingRobustScaler JSON file the training data was scaled with.
+        If not specified, the features are not scaled. Default: None.
+    """
+    from model.training.modelling.model_classes.model_artifact import load_model
+    SCORER['model'] = scoring_estimator(load_model(model_file_path))
+    SCORER['scaler'] = StreamingRobustScaler.load(scaler_json) if scaler_json else None
+
+
+def score_df(
+    df: pandas.DataFrame,
+    estimator,
+    scaler: StreamingRobustScaler=None,
+    target_variable: str=None,
+    keep_columns: list=None
+) -> pandas.DataFrame:
+    """
+    Score the rows of a DataFrame, scaled as the training data was.
+
+    :param df:
+        DataFrame of the features, in the order the model was fitted with, and optionally the target column.
+    :param estimator:
+        Fitted estimator, see scoring_estimator.
+    :param scaler:
+        Fitted scaler of the training data. Default: None, the features are not scaled.
+    :param target_variable:
+        Name of the target column, left out of the features if present. Default: None.
+    :param keep_columns:
+        Columns of df to copy to the scores, e.g. an identifier or the target. Default: None.
+
+    :returns:
+        DataFrame of the kept columns, 'prediction', and 'score' if the estimator has predict_proba or
+        decision_function: the probability or decision value of the last class.
+    """
+    scores = df[list(keep_columns)].reset_index(drop=True) if keep_columns else pandas.DataFrame(index=pandas.RangeIndex(len(df)))
+
+    # Features, scaled as the training data was
+    features = df.drop(columns=[target_variable]) if target_variable in df.columns else df
+    if scaler is not None:
+        features = scaler.transform(features)
+    X = features.to_numpy()
+
+    # Predictions and scores
+    scores['prediction'] = estimator.predict(X)
+    if len(X) and hasattr(estimator, 'predict_proba'):
+        scores['score'] = estimator.predict_proba(X)[:, -1]
+    elif len(X) and hasattr(estimator, 'decision_function'):
+        decision = estimator.decision_function(X)
+        scores['score'] = decision if decision.ndim == 1 else decision[:, -1]
+    return scores
+
+
+@traced(category='shard')
+def score_csv_chunk(
+    csv_file_path: str,
+    header: bytes,
+    start: int,
+    end: int,
+    dtype: dict,
+    part_path: str,
+    write_header: bool,
+    target_variable: str=None,
+    keep_columns: list=None,
+    float_format: str=None
+) -> tuple:
+    """
+    Parse one chunk of a csv file, score it with the model of this process and write the scores
+    As a part csv file. Runs in a worker process, after load_scorer.
+
+    :param part_path:
+        Path of the part csv file to write.
+    :param write_header:
+        If the column names should be written, for the first part.
+    :param target_variable:
+        Name of the target column, left out of the features if present. Default: None.
+    :param keep_columns:
+        Columns to copy to the scores. Default: None.
+    :param float_format:
+        Format string for the scores. Default: None, full precision.
+
+    The other parameters are those of read_csv_shard.
+
+    :returns:
+        Tuple containing the number of rows scored and the seconds taken.
+    """
+    chunk_start = time.perf_counter()
+    df = read_csv_shard(csv_file_path=csv_file_path, header=header, start=start, end=end, dtype=dtype)
+    scores = score_df(
+        df=df, estimator=SCORER['model'], scaler=SCORER['scaler'], target_variable=target_variable,
+        keep_columns=keep_columns
+    )
+    scores.to_csv(part_path, index=False, header=write_header, float_format=float_format)
+    add_span_attributes(shard_bytes=end - start, rows=len(df))
+    return len(df), time.perf_counter() - chunk_start
+
+
+def latency_report(
+    rows: list,
+    seconds: list,
+    total_seconds: float
+) -> dict:
+    """
+    Summarise the throughput of a scoring run and the latency of its chunks.
+
+    :param rows:
+        List of the number of rows of every chunk.
+    :param seconds:
+        List of the seconds every chunk took.
+    :param total_seconds:
+        Wall time of the whole run.
+
+    :returns:
+        Dictionary of rows, chunks, seconds, rows_per_second and the mean, median, 95th percentile
+        and maximum chunk latency in milliseconds.
+    """
+    latency = numpy.array(seconds) * 1000 if seconds else numpy.zeros(1)
+    return {
+        'rows': int(sum(rows)),
+        'chunks': len(rows),
+        'seconds': round(total_seconds, 3),
+        'rows_per_second': round(sum(rows) / max(total_seconds, 1e-9)),
+        'chunk_latency_mean_ms': round(float(latency.mean()), 1),
+        'chunk_latency_p50_ms': round(float(numpy.percentile(latency, 50)), 1),
+        'chunk_latency_p95_ms': round(float(numpy.percentile(latency, 95)), 1),
+        'chunk_latency_max_ms': round(float(latency.max()), 1)
+    }
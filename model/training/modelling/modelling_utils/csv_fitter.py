@@ -1,5 +1,7 @@
 import argparse
 from model.training.modelling.modelling_utils.model_man import ModelManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from src.tracing import traced
 
 
 def csv_fitter(
@@ -8,7 +10,9 @@ def csv_fitter(
     data_location: str=None,
     target_variable: str=None,
     import_dir: str=None,
-    export_dir: str=None
+    export_dir: str=None,
+    compact_schema: bool=False,
+    export_artifact: bool=False
 ) -> None:
     """
     Trains a model imported from a pickle file using data in a csv file.
@@ -25,6 +29,12 @@ def csv_fitter(
         The directory path where the base model is. If not specified, will use current directory.
     :param export_dir:
         The directory path to save the fitted model to. If not specified, same as import_dir.
+    :param compact_schema:
+        If the csv file should be imported and fitted with the compact dataset schema: float32 features and an int8 target.
+        Default: False.
+    :param export_artifact:
+        If the fitted state of the model should also be saved as a memory mappable model artifact,
+        'fitted_model.artifact'. Default: False.
     """
     # ModelMan
     model_man = ModelManipulator()
@@ -36,7 +46,9 @@ def csv_fitter(
         data_location=data_location,
         target_variable=target_variable,
         import_dir=import_dir,
-        export_dir=export_dir
+        export_dir=export_dir,
+        schema=get_schema(compact_schema),
+        export_artifact=export_artifact
     )
 
 
@@ -75,6 +87,14 @@ def get_args() -> argparse.ArgumentParser:
         '--export_dir', type=str, required=False, default=None,
         help='The path to the folder for exporting the fitted model. If not specified, same as import_dir.'
         )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import and fit the csv file with the compact dataset schema: float32 features and an int8 target.'
+        )
+    parser.add_argument(
+        '--export_artifact', action='store_true',
+        help='Also save the fitted state of the model as a memory mappable model artifact, fitted_model.artifact.'
+        )
     
     # Parse args
     args = parser.parse_args()
@@ -82,6 +102,7 @@ def get_args() -> argparse.ArgumentParser:
     return args
 
 
+@traced(category='cli')
 def main() -> None:
     """
     Main entry point to fit a base model using a csv file for data and pickle file for model.
@@ -97,7 +118,9 @@ def main() -> None:
         data_location=args.data_location,
         target_variable=args.target_variable,
         import_dir=args.import_dir,
-        export_dir=args.export_dir
+        export_dir=args.export_dir,
+        compact_schema=args.compact_schema,
+        export_artifact=args.export_artifact
     )
 
 
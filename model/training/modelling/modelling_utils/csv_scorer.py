@@ -0,0 +1,159 @@
+import argparse
+from model.training.modelling.modelling_utils.model_man import ModelManipulator
+from model.training.data_preparation.data_prep_utils.dataset_schema import get_schema
+from src.tracing import traced
+
+
+def csv_scorer(
+    model_name: str,
+    data_file: str,
+    data_location: str=None,
+    import_dir: str=None,
+    export_dir: str=None,
+    scaler_json: str=None,
+    target_variable: str=None,
+    keep_columns: list=None,
+    chunksize: int=100000,
+    n_jobs: int=None,
+    compact_schema: bool=False
+) -> dict:
+    """
+    Scores the rows of a csv file with a fitted model imported from a pickle file, chunk by chunk in worker processes,
+    And exports the predictions, and scores where the model has them, as a csv file in the same order.
+
+    :param model_name:
+        The name of the fitted model file.
+    :param data_file:
+        The name of the csv data file to score.
+    :param data_location:
+        The path to the csv data file to score. If not specified, will use current directory.
+    :param import_dir:
+        The directory path where the fitted model is. If not specified, will use current directory.
+    :param export_dir:
+        The directory path to save the scores to. If not specified, same as data_location.
+    :param scaler_json:
+        Path of the scaler JSON file saved when the training data was processed, to scale the features with.
+        If not specified, the features are scored as they are.
+    :param target_variable:
+        Target feature to leave out of the features, if present. Default: None.
+    :param keep_columns:
+        Columns of the csv file to copy to the scores file. Default: None.
+    :param chunksize:
+        The number of rows in each chunk, approximately. Default: 100000.
+    :param n_jobs:
+        The number of worker processes. Default: None, one per CPU.
+    :param compact_schema:
+        If the csv file should be imported with the compact dataset schema: float32 features and an int8 target.
+        Default: False.
+
+    :returns:
+        Dictionary of the scores file, rows, seconds, rows per second and chunk latencies.
+    """
+    # ModelMan
+    model_man = ModelManipulator()
+
+    # Score csv file and export scores.
+    return model_man.score_csv_export(
+        model_name=model_name,
+        data_file=data_file,
+        data_location=data_location,
+        import_dir=import_dir,
+        export_dir=export_dir,
+        scaler_json=scaler_json,
+        target_variable=target_variable,
+        keep_columns=keep_columns,
+        chunksize=chunksize,
+        n_jobs=n_jobs,
+        schema=get_schema(compact_schema)
+    )
+
+
+def get_args() -> argparse.ArgumentParser:
+    """
+    Argument parser function for this file. Sets arguments and parses them for this file.
+
+    :returns:
+        Passed arguments.
+    """
+    # Argument parser
+    parser = argparse.ArgumentParser()
+
+    # Add arguments
+    parser.add_argument(
+        '--model_name', type=str, required=True,
+        help='The name of the fitted model file.'
+        )
+    parser.add_argument(
+        '--data_file', type=str, required=True,
+        help='The csv file name.'
+        )
+    parser.add_argument(
+        '--data_location', type=str, required=False, default=None,
+        help='The csv data file path. If not specified, uses current directory.'
+        )
+    parser.add_argument(
+        '--import_dir', type=str, required=False, default=None,
+        help='The path to the folder containing the fitted model. If not specified, uses current directory.'
+        )
+    parser.add_argument(
+        '--export_dir', type=str, required=False, default=None,
+        help='The path to the folder for exporting the scores. If not specified, same as data_location.'
+        )
+    parser.add_argument(
+        '--scaler_json', type=str, required=False, default=None,
+        help='The scaler JSON file of the processed training data. If not specified, features are not scaled.'
+        )
+    parser.add_argument(
+        '--target_variable', type=str, required=False, default=None,
+        help='Target feature of the data if present, left out of the features. Default: None.'
+        )
+    parser.add_argument(
+        '--keep_columns', nargs='*', type=str, required=False, default=None,
+        help='Columns of the csv file to copy to the scores file. Default: None.'
+        )
+    parser.add_argument(
+        '--chunksize', type=int, required=False, default=100000,
+        help='The number of rows in each chunk, approximately. Default: 100000.'
+        )
+    parser.add_argument(
+        '--n_jobs', type=int, required=False, default=None,
+        help='The number of worker processes. Default: one per CPU.'
+        )
+    parser.add_argument(
+        '--compact_schema', action='store_true',
+        help='Import the csv file with the compact dataset schema: float32 features and an int8 target.'
+        )
+
+    # Parse args
+    args = parser.parse_args()
+
+    return args
+
+
+@traced(category='cli')
+def main() -> None:
+    """
+    Main entry point to score a csv file with a fitted model from a pickle file.
+    The scores are exported as '<data file name>_scores.csv'.
+    """
+    # Get args
+    args = get_args()
+
+    # Score and export
+    csv_scorer(
+        model_name=args.model_name,
+        data_file=args.data_file,
+        data_location=args.data_location,
+        import_dir=args.import_dir,
+        export_dir=args.export_dir,
+        scaler_json=args.scaler_json,
+        target_variable=args.target_variable,
+        keep_columns=args.keep_columns,
+        chunksize=args.chunksize,
+        n_jobs=args.n_jobs,
+        compact_schema=args.compact_schema
+    )
+
+
+if __name__ == '__main__':
+    main()
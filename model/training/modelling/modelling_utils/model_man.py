@@ -1,7 +1,16 @@
 import os
+import time
+import shutil
 import pickle
+import numpy
 import pandas
+from concurrent.futures import ProcessPoolExecutor
 from model.training.data_preparation.data_prep_utils.dataframe_man import DataFrameManipulator
+from model.training.data_preparation.data_prep_utils.feature_store import open_feature_store
+from model.training.data_preparation.data_prep_utils.dataset_schema import DatasetSchema
+from model.training.data_preparation.data_prep_utils.sharded_prep import csv_dtype
+from model.training.modelling.modelling_utils.batch_scoring import csv_chunk_ranges, load_scorer, score_csv_chunk, latency_report
+from src.tracing import traced
 
 
 class ModelManipulator:
@@ -14,38 +23,54 @@ class ModelManipulator:
         features: pandas.DataFrame,
         target: pandas.Series=None,
         import_dir: str=None,
-        export_dir: str=None
+        export_dir: str=None,
+        export_artifact: bool=False
     ) -> None:
         """
         Import a pickle file as a model,
         Fit the model using feature and target variables,
-        Export the model as a pickle file.
+        Export the model as a pickle file, and optionally its fitted state as a model artifact.
 
         :param model_name:
             Name of model to fit.
-        :param X:
-            Feature variables.
-        :param y:
-            Target variable.
+        :param features:
+            Feature variables: pandas DataFrame or array-like, such as a memory mapped feature store matrix.
+        :param target:
+            Target variable: pandas Series or array-like.
         :param import_dir:
             The directory path where the base model is. If not specified, will use current directory.
         :param export_dir:
             The directory path to save the fitted model to. If not specified, same as import_dir.
+        :param export_artifact:
+            If the compiled fitted state of the model should also be saved as a memory mappable model artifact,
+            'fitted_model.artifact', see save_artifact. Only for models with a compile method. If the model cannot
+            Be saved as one, ValueError is raised before any file is written. Default: False.
         """
         # Base model
         with open(str(os.path.join(import_dir, model_name)), 'rb') as f:
             model = pickle.load(f)
 
+        # Arrays are used as they are, so memory mapped arrays are not copied
+        if isinstance(features, (pandas.DataFrame, pandas.Series)):
+            features = features.values
+        if isinstance(target, (pandas.DataFrame, pandas.Series)):
+            target = target.values
+
         # Fit model
         if type(target) == type(None):
-            model.fit(features.values)
+            model.fit(features)
         else:
-            model.fit(features.values, target.values.ravel())
+            model.fit(features, numpy.ravel(target))
 
         # Export path
         if not export_dir:
             export_dir = import_dir
 
+        # Save the fitted state as a model artifact, first, so a model that cannot be saved as one exports nothing
+        if export_artifact:
+            from model.training.modelling.model_classes.model_artifact import ARTIFACT_FILE_NAME, save_artifact
+            save_artifact(fast_clf=model.compile(), file_path=str(os.path.join(export_dir, ARTIFACT_FILE_NAME)))
+
         # Save the model as a pickle file
         with open(str(os.path.join(export_dir, 'fitted_model.pkl')), 'wb') as f:
             pickle.dump(model, f)
@@ -57,7 +82,9 @@ class ModelManipulator:
         data_location: str=None,
         target_variable: str=None,
         import_dir: str=None,
-        export_dir: str=None
+        export_dir: str=None,
+        schema: DatasetSchema=None,
+        export_artifact: bool=False
     ) -> None:
         """
         Import a csv file as a pandas DataFrame,
@@ -77,16 +104,56 @@ class ModelManipulator:
             The directory path where the base model is. If not specified, will use current directory.
         :param export_dir:
             The directory path to save the fitted model to. If not specified, same as import_dir.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with, which the model is then fitted in.
+            If not specified, pandas infers them. Default: None.
+        :param export_artifact:
+            If the fitted state of the model should also be saved as a model artifact. Default: False.
         """
         # DataFrameMan
         dataframe_man = DataFrameManipulator()
 
         # Import csv file as DataFrame
-        df = dataframe_man.csv_to_df(csv_file_name=data_file, import_dir=data_location)
+        df = dataframe_man.csv_to_df(csv_file_name=data_file, import_dir=data_location, schema=schema)
 
         # X and y
         X, y = dataframe_man.extract_features_target(df=df, target_variable=target_variable)
 
+        # Import model, fit X and y, then export.
+        self.fit_export_pkl(
+            model_name=model_name,
+            features=X,
+            target=y,
+            import_dir=import_dir,
+            export_dir=export_dir,
+            export_artifact=export_artifact
+        )
+
+    def fit_store_export_pkl(
+        self,
+        model_name: str,
+        store_dir: str,
+        import_dir: str=None,
+        export_dir: str=None
+    ) -> None:
+        """
+        Open a feature store as memory mapped arrays,
+        Import a pickle file as a model,
+        Fit the feature matrix and label vector to the model without copying them into a DataFrame,
+        Export the model.
+
+        :param model_name:
+            The name of the base model to be fitted.
+        :param store_dir:
+            The folder path of the feature store to fit the base model with.
+        :param import_dir:
+            The directory path where the base model is. If not specified, will use current directory.
+        :param export_dir:
+            The directory path to save the fitted model to. If not specified, same as import_dir.
+        """
+        # Open feature store
+        X, y, meta = open_feature_store(store_dir=store_dir)
+
         # Import model, fit X and y, then export.
         self.fit_export_pkl(
             model_name=model_name,
@@ -94,4 +161,113 @@ class ModelManipulator:
             target=y,
             import_dir=import_dir,
             export_dir=export_dir
-        )
\ No newline at end of file
+        )
+
+    @traced()
+    def score_csv_export(
+        self,
+        model_name: str,
+        data_file: str,
+        data_location: str=None,
+        import_dir: str=None,
+        export_dir: str=None,
+        scaler_json: str=None,
+        target_variable: str=None,
+        keep_columns: list=None,
+        chunksize: int=100000,
+        n_jobs: int=None,
+        schema: DatasetSchema=None,
+        float_format: str=None
+    ) -> dict:
+        """
+        Score a csv file with a fitted model imported from a pickle file, chunk by chunk,
+        And export the scores as a csv file in the export directory, named '<data file name>_scores.csv'.
+
+        The chunks are byte ranges of the csv file, parsed, scaled and scored by a pool of worker processes,
+        Which each import the model and scaler once. The scores of every chunk are appended to the scores file
+        In the order of the rows as soon as the chunks before it are done, so memory is bounded by the chunks in flight.
+
+        :param model_name:
+            The name of the fitted model file.
+        :param data_file:
+            The name of the csv data file to score.
+        :param data_location:
+            The path to the csv data file to score. If not specified, will use current directory.
+        :param import_dir:
+            The directory path where the fitted model is. If not specified, will use current directory.
+        :param export_dir:
+            The directory path to save the scores to. If not specified, same as data_location.
+        :param scaler_json:
+            Path of the scaler JSON file saved when the training data was processed, to scale the features with.
+            If not specified, the features are scored as they are. Default: None.
+        :param target_variable:
+            Target feature to leave out of the features, if present. Default: None.
+        :param keep_columns:
+            Columns of the csv file to copy to the scores file, e.g. an identifier or the target. Default: None.
+        :param chunksize:
+            The number of rows in each chunk, approximately. Default: 100000.
+        :param n_jobs:
+            The number of worker processes. 1 scores in this process. Default: None, one per CPU.
+        :param schema:
+            DatasetSchema of the dtypes to import the csv file with. If not specified, pandas infers them.
+            Default: None.
+        :param float_format:
+            Format string for the scores. Default: None, full precision.
+
+        :returns:
+            Dictionary of the scores file, rows, chunks, seconds, rows per second and chunk latencies, see latency_report.
+        """
+        start = time.perf_counter()
+
+        # Paths
+        csv_file_path = str(os.path.join(data_location, data_file)) if data_location else data_file
+        model_file_path = str(os.path.join(import_dir, model_name)) if import_dir else model_name
+        if not export_dir:
+            export_dir = data_location or '.'
+        os.makedirs(export_dir, exist_ok=True)
+        scores_csv = str(os.path.join(export_dir, f'{os.path.splitext(os.path.basename(data_file))[0]}_scores.csv'))
+
+        # Chunks of the csv file, parsed with the same dtypes
+        header, ranges = csv_chunk_ranges(csv_file_path=csv_file_path, chunksize=chunksize)
+        dtype = csv_dtype(csv_file_path=csv_file_path, schema=schema, target_variable=target_variable)
+        part_paths = [f'{scores_csv}.part{i}' for i in range(len(ranges))]
+        chunk_args = [
+            (csv_file_path, header, chunk_start, chunk_end, dtype, part_path, i == 0, target_variable, keep_columns, float_format)
+            for i, (part_path, (chunk_start, chunk_end)) in enumerate(zip(part_paths, ranges))
+        ]
+
+        # Score the chunks, appending their scores in order
+        print(f"Scoring CSV file in {len(ranges)} chunks...")
+        chunk_rows, chunk_seconds = [], []
+        with open(scores_csv, 'wb') as f:
+            if n_jobs == 1:
+                load_scorer(model_file_path=model_file_path, scaler_json=scaler_json)
+                results = (score_csv_chunk(*args) for args in chunk_args)
+            else:
+                executor = ProcessPoolExecutor(
+                    max_workers=n_jobs, initializer=load_scorer, initargs=(model_file_path, scaler_json)
+                )
+                futures = [executor.submit(score_csv_chunk, *args) for args in chunk_args]
+                results = (future.result() for future in futures)
+            try:
+                for part_path, (rows, seconds) in zip(part_paths, results):
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, f, 1 << 24)
+                    os.remove(part_path)
+                    chunk_rows.append(rows)
+                    chunk_seconds.append(seconds)
+            finally:
+                if n_jobs != 1:
+                    executor.shutdown(cancel_futures=True)
+        print("Done.\n")
+
+        # Throughput and latency
+        report = {'scores_file': scores_csv, **latency_report(
+            rows=chunk_rows, seconds=chunk_seconds, total_seconds=time.perf_counter() - start
+        )}
+        print(
+            f"Scored {report['rows']} rows in {report['seconds']} seconds ({report['rows_per_second']} rows/second), "
+            f"chunk latency p50 {report['chunk_latency_p50_ms']} ms, p95 {report['chunk_latency_p95_ms']} ms, "
+            f"max {report['chunk_latency_max_ms']} ms\n"
+        )
+        return report
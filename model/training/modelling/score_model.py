@@ -0,0 +1,39 @@
+import os
+from src.utils import timing_decorator
+from model.training.modelling.modelling_utils.csv_scorer import csv_scorer
+
+@timing_decorator
+def score(
+    clf_path = '../../classifiers',
+    data_location = '../../../data/raw/train_test',
+    data_file = 'test.csv',
+    processed_path = '../../../data/processed',
+    scores_path = '../../../data/scores',
+    keep_columns = None,
+    chunksize = 100000,
+    n_jobs = None,
+    compact_schema = False
+) -> dict:
+    """
+    Function to score a csv file of transactions with the fitted voting clf imported from a pickle file,
+    Scaled with the scaler saved when the training data was processed, and export the predictions.
+    Set compact_schema to score float32 features.
+    """
+    # Score and export predictions
+    return csv_scorer(
+        model_name='fitted_model.pkl',
+        data_file=data_file,
+        data_location=data_location,
+        import_dir=clf_path,
+        export_dir=scores_path,
+        scaler_json=str(os.path.join(processed_path, 'scaler.json')),
+        target_variable='Class',
+        keep_columns=keep_columns,
+        chunksize=chunksize,
+        n_jobs=n_jobs,
+        compact_schema=compact_schema
+    )
+
+
+if __name__ == '__main__':
+    score()
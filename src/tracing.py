@@ -0,0 +1,433 @@
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+
+
+# Environment variables of the tracing options, so worker processes trace like their parent
+TRACE_FILE_ENV = 'TRACE_FILE'
+TRACE_PROFILE_ENV = 'TRACE_PROFILE'
+TRACE_MEMORY_ENV = 'TRACE_MEMORY'
+TRACE_ROOT_PID_ENV = 'TRACE_ROOT_PID'
+
+# Number of functions by cumulative time kept in the attributes of a profiled span
+PROFILE_TOP = 15
+
+
+class Span:
+    """
+    A span of a trace: a named, timed region of a run with attributes, nested in the span open when it started.
+    Created by Tracer.span, or NO_SPAN when tracing is off.
+    """
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = None
+        self.profiler = None
+        self.peak = 0
+
+    def set(self, **attributes) -> None:
+        """
+        Add attributes to the span, such as row counts and file sizes.
+
+        :param attributes:
+            JSON serialisable values.
+        """
+        self.attributes.update(attributes)
+
+
+class NoSpan:
+    """
+    The span used when tracing is off. Every method does nothing.
+    """
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+class Tracer:
+    """
+    A class collecting the spans of a run as Chrome trace events, timed with perf_counter_ns.
+
+    Spans nest per thread. Finished spans are appended to the events file '<trace_file>.events.jsonl'
+    Whenever an outermost span of a process ends, so spans of worker processes are kept too,
+    And export writes the events of all processes as a Chrome trace JSON file, to open in chrome://tracing
+    Or Perfetto. Optionally, each outermost span (or each span named in profile) is profiled with cProfile,
+    And the current and peak traced memory of every span is recorded with tracemalloc.
+    """
+    def __init__(
+        self,
+        trace_file: str,
+        profile=False,
+        memory: bool=False
+    ):
+        self.trace_file = trace_file
+        self.events_file = f'{trace_file}.events.jsonl'
+        self.profile = profile
+        self.memory = memory
+        self.events = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def reset(self) -> None:
+        """
+        Forget the open spans and unflushed events copied from the parent process into a forked worker process,
+        So the spans of the worker are outermost in it and flushed when they end.
+        """
+        if any(span.profiler for span in self.stack()):
+            sys.setprofile(None)
+        self.events = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def stack(self) -> list:
+        """
+        Get the open spans of the current thread, innermost last.
+
+        :returns:
+            List of spans.
+        """
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def should_profile(self, span: Span, stack: list) -> bool:
+        """
+        Check if a span should be profiled: one profiler runs at a time, for outermost spans if profile is True,
+        Or for the spans named in profile if it is a collection of names.
+        """
+        if not self.profile or any(open_span.profiler for open_span in stack):
+            return False
+        if self.profile is True:
+            return not stack
+        return span.name in self.profile
+
+    def start(self, span: Span) -> None:
+        """
+        Start a span, nested in the open span of the current thread.
+
+        :param span:
+            The span to start.
+        """
+        stack = self.stack()
+        if self.memory:
+            # Keep the peak of the parent span before resetting the peak for this span
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            span.attributes['memory_start_bytes'] = current
+        if self.should_profile(span, stack):
+            span.profiler = cProfile.Profile()
+            span.profiler.enable()
+        stack.append(span)
+        span.start_ns = time.perf_counter_ns()
+
+    def end(self, span: Span) -> None:
+        """
+        End a span and record it as a Chrome trace complete event.
+
+        :param span:
+            The span to end, the innermost open span of the current thread.
+        """
+        end_ns = time.perf_counter_ns()
+        stack = self.stack()
+        stack.pop()
+
+        # Profile
+        if span.profiler:
+            span.profiler.disable()
+            span.attributes['profile_top'] = profile_top(span.profiler)
+            file_name = re.sub(r'[^\w.-]', '_', span.name)
+            profile_file = f'{self.trace_file}.{os.getpid()}.{len(self.events)}.{file_name}.prof'
+            span.profiler.dump_stats(profile_file)
+            span.attributes['profile_file'] = profile_file
+            span.profiler = None
+
+        # Memory
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            span.peak = max(span.peak, peak)
+            span.attributes['memory_end_bytes'] = current
+            span.attributes['memory_peak_bytes'] = span.peak
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, span.peak)
+
+        span.attributes['depth'] = len(stack)
+        event = {
+            'name': span.name,
+            'cat': span.attributes.pop('category', 'span'),
+            'ph': 'X',
+            'ts': span.start_ns / 1000,
+            'dur': (end_ns - span.start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': span.attributes
+        }
+        with self.lock:
+            self.events.append(event)
+        if not stack:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Append the recorded events to the events file.
+        """
+        with self.lock:
+            events, self.events = self.events, []
+        if not events:
+            return
+        lines = ''.join(json.dumps(event, default=str) + '\n' for event in events)
+        with open(self.events_file, 'a') as f:
+            f.write(lines)
+
+    def export(self, trace_file: str=None) -> str:
+        """
+        Write the events of every process so far as a Chrome trace JSON file.
+
+        :param trace_file:
+            Path of the trace file. If not specified, the trace file of the tracer.
+
+        :returns:
+            The path of the trace file.
+        """
+        self.flush()
+        trace_file = trace_file or self.trace_file
+        events = []
+        if os.path.exists(self.events_file):
+            with open(self.events_file, 'r') as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        events.sort(key=lambda event: event['ts'])
+        with open(trace_file, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return trace_file
+
+
+def profile_top(profiler: cProfile.Profile, top: int=PROFILE_TOP) -> list:
+    """
+    Get the functions of a profile that took the most cumulative time.
+
+    :param profiler:
+        The disabled profiler.
+    :param top:
+        The number of functions. Default: PROFILE_TOP.
+
+    :returns:
+        List of dictionaries of function, number of calls, total seconds and cumulative seconds.
+    """
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (file_name, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(file_name)}:{line}({function})',
+            'calls': calls,
+            'total_seconds': round(total, 6),
+            'cumulative_seconds': round(cumulative, 6)
+        })
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:top]
+
+
+# The tracer of this process, None when tracing is off
+TRACER = {'tracer': None}
+
+
+def enable_tracing(
+    trace_file: str,
+    profile=False,
+    memory: bool=False
+) -> Tracer:
+    """
+    Start tracing this process, and the worker processes it starts, to a Chrome trace file.
+    The trace file is written by export_trace, and when this process exits.
+
+    :param trace_file:
+        Path of the Chrome trace JSON file.
+    :param profile:
+        True to profile every outermost span with cProfile, or a list of span names to profile. Default: False.
+    :param memory:
+        If the current and peak traced memory of every span should be recorded with tracemalloc,
+        Which slows the run down. Default: False.
+
+    :returns:
+        The tracer.
+    """
+    trace_file = os.path.abspath(trace_file)
+    if isinstance(profile, str):
+        profile = True if profile == '1' else [name for name in profile.split(',') if name]
+    tracer = Tracer(trace_file=trace_file, profile=profile, memory=memory)
+    TRACER['tracer'] = tracer
+
+    # The root process starts a new events file and exports the trace on exit
+    root_pid = os.environ.get(TRACE_ROOT_PID_ENV)
+    if root_pid is None or os.environ.get(TRACE_FILE_ENV) != trace_file:
+        os.environ[TRACE_ROOT_PID_ENV] = str(os.getpid())
+        os.environ[TRACE_FILE_ENV] = trace_file
+        os.environ[TRACE_PROFILE_ENV] = ','.join(profile) if isinstance(profile, (list, tuple, set)) else ('1' if profile else '')
+        os.environ[TRACE_MEMORY_ENV] = '1' if memory else ''
+        if os.path.exists(tracer.events_file):
+            os.remove(tracer.events_file)
+        atexit.register(export_trace)
+    elif root_pid == str(os.getpid()):
+        atexit.register(export_trace)
+    else:
+        atexit.register(tracer.flush)
+    return tracer
+
+
+def disable_tracing() -> None:
+    """
+    Stop tracing this process, after writing its events to the events file.
+    """
+    tracer = TRACER['tracer']
+    if tracer is not None:
+        tracer.flush()
+    TRACER['tracer'] = None
+    for env in (TRACE_FILE_ENV, TRACE_PROFILE_ENV, TRACE_MEMORY_ENV, TRACE_ROOT_PID_ENV):
+        os.environ.pop(env, None)
+
+
+def export_trace(trace_file: str=None) -> str:
+    """
+    Write the Chrome trace file of the run so far.
+
+    :param trace_file:
+        Path of the trace file. If not specified, the trace file given to enable_tracing.
+
+    :returns:
+        The path of the trace file, or None if tracing is off.
+    """
+    tracer = TRACER['tracer']
+    if tracer is None:
+        return None
+    return tracer.export(trace_file=trace_file)
+
+
+def tracing_enabled() -> bool:
+    """
+    Check if this process is tracing.
+
+    :returns:
+        True if tracing is on.
+    """
+    return TRACER['tracer'] is not None
+
+
+class SpanContext:
+    """
+    Context manager starting and ending a span of the tracer.
+    """
+    def __init__(self, tracer: Tracer, span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.tracer.start(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is not None:
+            self.span.set(error=exc_type.__name__)
+        self.tracer.end(self.span)
+        return False
+
+
+def trace_span(name: str, **attributes):
+    """
+    Open a span for a with block, nested in the open span. When tracing is off, this returns NO_SPAN,
+    Which does nothing.
+
+    e.g. with trace_span('sort', rows=len(df)) as span: ...; span.set(sorted=True)
+
+    :param name:
+        Name of the span.
+    :param attributes:
+        Attributes of the span. 'category' sets the Chrome trace category.
+
+    :returns:
+        Context manager giving the span.
+    """
+    tracer = TRACER['tracer']
+    if tracer is None:
+        return NO_SPAN
+    return SpanContext(tracer, Span(name, attributes))
+
+
+def add_span_attributes(**attributes) -> None:
+    """
+    Add attributes to the innermost open span of the current thread, if tracing.
+
+    :param attributes:
+        JSON serialisable values, such as row counts and file sizes.
+    """
+    tracer = TRACER['tracer']
+    if tracer is None:
+        return
+    stack = tracer.stack()
+    if stack:
+        stack[-1].set(**attributes)
+
+
+def traced(name: str=None, category: str='function'):
+    """
+    Trace every call of the decorated function as a span.
+
+    :param name:
+        Name of the span. Default: the qualified name of the function.
+    :param category:
+        Chrome trace category of the span. Default: 'function'.
+
+    :returns:
+        The decorated function.
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = TRACER['tracer']
+            if tracer is None:
+                return func(*args, **kwargs)
+            with SpanContext(tracer, Span(span_name, {'category': category})):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def reset_tracing_after_fork() -> None:
+    """
+    Reset the tracer in a forked worker process, see Tracer.reset.
+    """
+    tracer = TRACER['tracer']
+    if tracer is not None:
+        tracer.reset()
+
+
+os.register_at_fork(after_in_child=reset_tracing_after_fork)
+
+# Trace from the start when the environment asks for it, as in worker processes of a traced run
+if os.environ.get(TRACE_FILE_ENV):
+    enable_tracing(
+        trace_file=os.environ[TRACE_FILE_ENV],
+        profile=os.environ.get(TRACE_PROFILE_ENV, ''),
+        memory=bool(os.environ.get(TRACE_MEMORY_ENV))
+    )
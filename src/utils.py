@@ -1,10 +1,13 @@
 import time
 import os
+import functools
+from src.tracing import trace_span
 
 
 def timing_decorator(func):
     """
     Times the execution of a function and prints the elapsed time.
+    When tracing (see src.tracing), the call is also recorded as a span, nested in the open span.
 
     :param func:
         The function to be timed.
@@ -12,10 +15,12 @@ def timing_decorator(func):
     :returns:
         The decorated function.
     """
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start = time.time()
-        result = func(*args, **kwargs)
-        end = time.time()
+        with trace_span(func.__qualname__, category='stage'):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            end = time.perf_counter()
         print(f'function took {end - start:.4f} seconds to run')
         return result
     return wrapper
@@ -33,6 +38,7 @@ def print_custom_string(custom_string: str):
         The decorated function.
     """
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             print(custom_string)
             result = func(*args, **kwargs)